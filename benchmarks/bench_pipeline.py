@@ -0,0 +1,380 @@
+"""
+Throughput benchmarks for the ingestion pipeline.
+
+Builds deterministic, seeded data sets, then times each stage on its own:
+process_all_files, write_reports, load_by_product and load_by_date.
+Results are written as JSON and compared against a stored baseline.
+
+    python -m benchmarks.bench_pipeline --sizes 10k,100k,1m
+    python -m benchmarks.bench_pipeline --sizes 10m --engines columnar --workers 4
+    python -m benchmarks.bench_pipeline --sizes 1m --compression gz
+    python -m benchmarks.bench_pipeline --update-baseline
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import resource
+import tracemalloc
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src import processor, reports  # noqa: E402
+from src.analytics import plots  # noqa: E402
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, "results.json")
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+STAGES = ("process_all_files", "write_reports", "load_by_product", "load_by_date")
+
+# Input file codecs (see prefetch.CODECS); gzip headers get a fixed mtime
+# so data sets stay byte-identical
+COMPRESSIONS = {
+    "gz": {"method": "gzip", "mtime": 0},
+    "bz2": {"method": "bz2"},
+    "xz": {"method": "xz"},
+}
+
+# A stage is a regression when throughput drops, or a memory peak grows,
+# by more than this vs. baseline
+DEFAULT_TOLERANCE = 0.15
+
+# Compared fields: (name, higher is better)
+METRICS = (
+    ("items_per_sec", True),
+    ("peak_rss_bytes", False),
+    ("children_peak_rss_bytes", False),
+    ("alloc_peak_bytes", False),
+)
+
+# ============================================================
+# DATA SETS
+# ============================================================
+def parse_size(text):
+    text = text.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1], 1)
+    return int(float(text.rstrip("km")) * scale)
+
+def make_dataset(directory, rows, files=10, products=200, error_rate=0.0,
+                 days=30, seed=42, compression=None):
+    """
+    Write `rows` rows split over `files` CSVs. Same arguments, same bytes.
+
+    error_rate:  fraction of rows made invalid (bad date, qty or price)
+    compression: None, or a COMPRESSIONS key (files are bench_*.csv.<key>)
+    """
+    suffix = f".{compression}" if compression else ""
+    rng = np.random.default_rng(seed)
+    names = np.array([f"Product {i:06d}" for i in range(products)], dtype=object)
+    start = np.datetime64("2025-11-01")
+
+    per_file = np.full(files, rows // files)
+    per_file[: rows % files] += 1
+
+    for i, n in enumerate(per_file):
+        dates = (start + rng.integers(0, days, n)).astype(str).astype(object)
+        product = names[rng.integers(0, products, n)]
+        qty = rng.integers(1, 11, n).astype(str).astype(object)
+        price = rng.integers(1000, 50_000, n).astype(str).astype(object)
+
+        if error_rate:
+            bad = rng.random(n) < error_rate
+            kind = rng.integers(0, 3, n)
+            dates[bad & (kind == 0)] = "BAD_DATE"
+            qty[bad & (kind == 1)] = "x"
+            price[bad & (kind == 2)] = "-1"
+
+        pd.DataFrame({"date": dates, "product": product, "qty": qty, "price": price}).to_csv(
+            os.path.join(directory, f"bench_{i:04d}.csv{suffix}"), index=False,
+            compression=COMPRESSIONS[compression] if compression else None,
+        )
+
+# ============================================================
+# MEASUREMENT
+# ============================================================
+# Writing "5" here resets this process's RSS high-water mark (Linux only)
+_CLEAR_REFS = "/proc/self/clear_refs"
+_STATUS = "/proc/self/status"
+
+def _maxrss_bytes(who):
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def _reset_peak_rss():
+    """
+    Start a fresh RSS peak where the OS allows it. Elsewhere the peak stays
+    the process lifetime peak, which run_case_isolated limits to one case.
+    """
+    try:
+        with open(_CLEAR_REFS, "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+def _peak_rss_bytes():
+    try:
+        with open(_STATUS) as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return _maxrss_bytes(resource.RUSAGE_SELF)
+
+def _children_peak_rss_bytes():
+    """
+    Largest peak RSS of any reaped child (pool workers), 0 if none.
+    """
+    return _maxrss_bytes(resource.RUSAGE_CHILDREN)
+
+@contextmanager
+def _measure(result, trace_allocations):
+    if trace_allocations:
+        tracemalloc.start()
+    _reset_peak_rss()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        result["seconds"] = time.perf_counter() - start
+        result["peak_rss_bytes"] = _peak_rss_bytes()
+        if trace_allocations:
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            result["alloc_peak_bytes"] = peak
+            result["alloc_live_blocks"] = sum(s.count for s in snapshot.statistics("filename"))
+
+@contextmanager
+def _sandbox(root):
+    """
+    Point processor + reports at a scratch tree for the duration.
+    """
+    saved_proc = {
+        k: getattr(processor, k)
+        for k in ("DATA_IN", "DATA_OUT", "DATA_ERR", "DATA_DUP", "INDEX_FILE", "CLAIM_DIR",
+                  "write_reports")
+    }
+    saved_rep = {k: getattr(reports, k) for k in ("REPORT_DIR", "SUMMARY_FILE", "PRODUCT_FILE", "DATE_FILE", "DB_FILE")}
+
+    dirs = {name: os.path.join(root, "data", name) for name in ("in", "out", "err", "dup")}
+    for d in dirs.values():
+        os.makedirs(d, exist_ok=True)
+    report_dir = os.path.join(root, "reports")
+    os.makedirs(report_dir, exist_ok=True)
+
+    processor.DATA_IN, processor.DATA_OUT, processor.DATA_ERR = dirs["in"], dirs["out"], dirs["err"]
+    processor.DATA_DUP = dirs["dup"]
+    processor.INDEX_FILE = os.path.join(root, "data", "ingested.jsonl")
+    processor.CLAIM_DIR = os.path.join(root, "data", "claimed")
+    reports.REPORT_DIR = report_dir
+    reports.SUMMARY_FILE = os.path.join(report_dir, "summary.csv")
+    reports.PRODUCT_FILE = os.path.join(report_dir, "by_product.csv")
+    reports.DATE_FILE = os.path.join(report_dir, "by_date.csv")
+    reports.DB_FILE = os.path.join(report_dir, "reports.db")
+    try:
+        yield dirs, report_dir
+    finally:
+        for k, v in saved_proc.items():
+            setattr(processor, k, v)
+        for k, v in saved_rep.items():
+            setattr(reports, k, v)
+
+def _throughput(stage, items, unit):
+    stage["items"] = items
+    stage["unit"] = unit
+    stage["items_per_sec"] = items / stage["seconds"] if stage["seconds"] else float("inf")
+
+def run_case(rows, engine, workers, stream, products, error_rate, seed,
+             trace_allocations=False, report_runs=20, compression=None):
+    """
+    Time every stage for one data-set / configuration.
+
+    report_runs: write_reports is repeated this many times so the
+                 loaders see a realistic multi-run history.
+    """
+    case = {
+        "rows": rows, "engine": engine, "workers": workers, "stream": stream,
+        "products": products, "error_rate": error_rate, "seed": seed,
+        "compression": compression, "stages": {},
+    }
+
+    root = tempfile.mkdtemp(prefix="sales-bench-")
+    try:
+        with _sandbox(root) as (dirs, report_dir):
+            make_dataset(dirs["in"], rows, products=products,
+                         error_rate=error_rate, seed=seed, compression=compression)
+            case["input_bytes"] = sum(
+                os.path.getsize(os.path.join(dirs["in"], f)) for f in os.listdir(dirs["in"])
+            )
+
+            captured = {}
+            processor.write_reports = lambda run_id, stats: captured.update(stats=stats)
+
+            stage = case["stages"]["process_all_files"] = {}
+            with _measure(stage, trace_allocations):
+                processor.process_all_files(engine=engine, workers=workers, stream=stream)
+            # Workers only show up in RUSAGE_CHILDREN once reaped
+            processor.shutdown_pool()
+            stage["children_peak_rss_bytes"] = _children_peak_rss_bytes()
+            _throughput(stage, rows, "input rows")
+
+            stats = captured["stats"]
+            report_rows = len(stats["by_product"]) + len(stats["by_date"])
+            stage = case["stages"]["write_reports"] = {}
+            with _measure(stage, trace_allocations):
+                for i in range(report_runs):
+                    reports.write_reports(f"bench{i:03d}", stats)
+            _throughput(stage, report_rows * report_runs, "report rows")
+
+            for name, loader, field in (
+                ("load_by_product", plots.load_by_product, "by_product"),
+                ("load_by_date", plots.load_by_date, "by_date"),
+            ):
+                stage = case["stages"][name] = {}
+                with _measure(stage, trace_allocations):
+                    df = loader(report_dir)
+                stage["result_rows"] = len(df)
+                _throughput(stage, len(stats[field]) * report_runs, "report rows")
+    finally:
+        from src.report_store import dispose_engines
+        dispose_engines()
+        shutil.rmtree(root, ignore_errors=True)
+
+    return case
+
+def run_case_isolated(*args, **kwargs):
+    """
+    run_case in a fresh interpreter, so its RSS peaks and pool children
+    are this case's alone.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(run_case, *args, **kwargs).result()
+
+# ============================================================
+# BASELINE
+# ============================================================
+def case_key(case):
+    return (
+        f"rows={case['rows']} engine={case['engine']} workers={case['workers']} "
+        f"stream={case['stream']} products={case['products']} errors={case['error_rate']} "
+        f"compression={case['compression']}"
+    )
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Returns:
+        list of (case key, stage, metric, baseline value, current value, change)
+        for every metric worse than baseline by more than `tolerance`
+    """
+    base_cases = {case_key(c): c for c in baseline.get("cases", [])}
+    regressions = []
+    for case in results["cases"]:
+        base = base_cases.get(case_key(case))
+        if base is None:
+            continue
+        for stage, values in case["stages"].items():
+            for metric, higher_is_better in METRICS:
+                before = base["stages"].get(stage, {}).get(metric)
+                after = values.get(metric)
+                if not before or after is None:
+                    continue
+                change = after / before - 1
+                if (change < -tolerance) if higher_is_better else (change > tolerance):
+                    regressions.append((case_key(case), stage, metric, before, after, change))
+    return regressions
+
+# ============================================================
+# CLI
+# ============================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the sales ingestion pipeline")
+    parser.add_argument("--sizes", default="10k,100k,1m",
+                        help="comma-separated row counts, e.g. 10k,100k,1m,10m")
+    parser.add_argument("--engines", default=",".join(processor.ENGINES))
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--products", type=int, default=200, help="product cardinality")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--compression", choices=sorted(COMPRESSIONS),
+                        help="write the input files compressed with this codec")
+    parser.add_argument("--allocations", action="store_true",
+                        help="trace allocations (slower; timings include tracemalloc overhead)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "cases": [],
+    }
+
+    for size in args.sizes.split(","):
+        for engine in args.engines.split(","):
+            case = run_case_isolated(
+                parse_size(size), engine.strip(), args.workers, args.stream,
+                args.products, args.error_rate, args.seed,
+                trace_allocations=args.allocations, compression=args.compression,
+            )
+            results["cases"].append(case)
+            print(case_key(case))
+            for stage in STAGES:
+                values = case["stages"][stage]
+                print(
+                    f"  {stage:<18} {values['seconds']:>9.3f}s "
+                    f"{values['items_per_sec']:>14,.0f} {values['unit']}/s "
+                    f"rss={values['peak_rss_bytes'] / 2**20:,.0f}MiB"
+                    + (f" workers_rss={values['children_peak_rss_bytes'] / 2**20:,.0f}MiB"
+                       if values.get("children_peak_rss_bytes") else "")
+                    + (f" alloc_peak={values['alloc_peak_bytes'] / 2**20:,.1f}MiB"
+                       if "alloc_peak_bytes" in values else "")
+                )
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.update_baseline:
+        shutil.copyfile(args.output, args.baseline)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline found; run with --update-baseline to create one")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressions = compare(results, baseline, args.tolerance)
+    for key, stage, metric, before, after, change in regressions:
+        print(f"REGRESSION {key} {stage} {metric}: {before:,.0f} -> {after:,.0f} ({change:+.1%})")
+    if not regressions:
+        print("No regressions against baseline")
+
+    return 1 if regressions and args.fail_on_regression else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
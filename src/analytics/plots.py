@@ -1,30 +1,211 @@
 import os
-import pandas as pd
-import seaborn as sns
+import json
+
+from .. import reports
+
+# pandas is imported by the loaders themselves: report_signature() is
+# polled by the GUI and the query API, which must start without it
+DB_NAME = "reports.db"
+
+PARTS_DIR_NAME = "parts"
+
+# Where cumulative totals are read from, when several backends hold them
+SOURCE_ORDER = ("sqlite", "parts", "csv")
+
+def _db_path(report_dir):
+    path = os.path.join(report_dir, DB_NAME)
+    return path if os.path.exists(path) else None
+
+def _has_parts(report_dir):
+    return os.path.isdir(os.path.join(report_dir, PARTS_DIR_NAME))
+
+def _backends(report_dir):
+    """
+    Backends the latest run was written to (see reports.write_reports);
+    the configured ones for report directories written before that was
+    recorded.
+    """
+    try:
+        with open(os.path.join(report_dir, reports.BACKENDS_NAME), encoding="utf-8") as f:
+            return tuple(json.load(f))
+    except (FileNotFoundError, ValueError):
+        return tuple(reports.REPORT_BACKENDS)
+
+def _source(report_dir, candidates=SOURCE_ORDER):
+    """
+    First of `candidates` that the latest run wrote and that exists:
+    "sqlite", "parts", "csv" (the loaders check the CSV files), or None.
+    """
+    backends = _backends(report_dir)
+    present = {"sqlite": _db_path(report_dir) is not None, "parts": _has_parts(report_dir)}
+    for name in candidates:
+        if name in backends and present.get(name, True):
+            return name
+    return None
+
+# The store, partitions and sketches keep revenue in integer minor units
+# (money.py); loaders hand out major units, ready to chart or serve
+def _major(df, column="total_revenue"):
+    from ..money import to_major
+    df[column] = to_major(df[column])
+    return df
+
+def _csv_minor(df):
+    # CSV reports hold major-unit decimals: sum them as minor units
+    from ..money import MINOR_UNITS
+    df["total_revenue"] = (df["total_revenue"] * MINOR_UNITS).round().astype("int64")
+    return df
+
+def _load_parts(report_dir, kind):
+    import pandas as pd
+    from ..report_parts import load_totals
+    keys, qty, rev = load_totals(report_dir, kind)
+    return _major(pd.DataFrame({kind: keys, "total_quantity": qty, "total_revenue": rev}))
+
+def report_signature(report_dir):
+    """
+    Cheap change stamp for the report data: (size, mtime_ns) of every
+    file the loaders read. The SQLite store runs in WAL mode, so its
+    -wal file is included; new binary partitions bump the parts/ mtime.
+    Equal stamps mean nothing new was written.
+    """
+    names = (DB_NAME, DB_NAME + "-wal", PARTS_DIR_NAME, "by_product.csv", "by_date.csv",
+             "sketches.npz", reports.BACKENDS_NAME)
+    stamp = []
+    for name in names:
+        try:
+            st = os.stat(os.path.join(report_dir, name))
+        except FileNotFoundError:
+            stamp.append(None)
+            continue
+        stamp.append((st.st_size, st.st_mtime_ns))
+    return tuple(stamp)
 
 def load_by_product(report_dir):
+    import pandas as pd
+    source = _source(report_dir)
+    if source == "sqlite":
+        from ..report_store import load_product_totals
+        # Precomputed cumulative totals: O(products), no regrouping
+        return _major(pd.DataFrame(
+            load_product_totals(_db_path(report_dir)),
+            columns=["product", "total_quantity", "total_revenue"],
+        ))
+
+    if source == "parts":
+        # Memory-mapped binary partitions: no text parsing
+        return _load_parts(report_dir, "product")
+
     path = os.path.join(report_dir, "by_product.csv")
-    if not os.path.exists(path):
+    if source is None or not os.path.exists(path):
         return pd.DataFrame()
 
-    df = pd.read_csv(path)
+    df = _csv_minor(pd.read_csv(path))
 
     # Aggregate across runs
-    return (
+    return _major(
         df.groupby("product", as_index=False)
           .agg(total_quantity=("total_quantity", "sum"),
                total_revenue=("total_revenue", "sum"))
     )
 
 def load_by_date(report_dir):
+    import pandas as pd
+    source = _source(report_dir)
+    if source == "sqlite":
+        from ..report_store import load_date_totals
+        df = pd.DataFrame(
+            load_date_totals(_db_path(report_dir)),
+            columns=["date", "total_quantity", "total_revenue"],
+        )
+        return _major(df)[["date", "total_revenue"]]
+
+    if source == "parts":
+        df = _load_parts(report_dir, "date")
+        return df[["date", "total_revenue"]].sort_values("date", ignore_index=True)
+
     path = os.path.join(report_dir, "by_date.csv")
-    if not os.path.exists(path):
+    if source is None or not os.path.exists(path):
         return pd.DataFrame()
 
-    df = pd.read_csv(path)
+    df = _csv_minor(pd.read_csv(path))
 
-    return (
+    return _major(
         df.groupby("date", as_index=False)
           .agg(total_revenue=("total_revenue", "sum"))
           .sort_values("date")
     )
+
+# approx: 1 for approximate-mode runs, which are not in the exact
+# per-product / per-date totals
+RUN_COLUMNS = [
+    "run_id", "files", "rows", "valid", "invalid", "total_quantity", "total_revenue", "approx",
+]
+
+def load_runs(report_dir, limit=None):
+    """
+    Per-run summaries, newest first.
+    """
+    import pandas as pd
+    source = _source(report_dir, ("sqlite", "csv"))
+    if source == "sqlite":
+        from ..report_store import load_runs as load_store_runs
+        return _major(pd.DataFrame(load_store_runs(_db_path(report_dir), limit), columns=RUN_COLUMNS))
+
+    path = os.path.join(report_dir, "summary.csv")
+    if source is None or not os.path.exists(path):
+        return pd.DataFrame(columns=RUN_COLUMNS)
+
+    df = pd.read_csv(path, dtype={"run_id": str})
+    # Files written before the approx column have none, or blanks
+    df["approx"] = df.get("approx", pd.Series(0, index=df.index)).fillna(0).astype("int64")
+    df = df[RUN_COLUMNS]
+    df = df.iloc[::-1].reset_index(drop=True)
+    return df if limit is None else df.head(limit)
+
+def load_rollup(report_dir, grain, product=None, start=None, end=None):
+    """
+    Product x period totals from the store's precomputed rollups
+    (grain: day, week or month). Empty without a store.
+    """
+    import pandas as pd
+    from ..report_store import load_rollup as load_store_rollup
+    columns = ["product", grain if grain != "day" else "date", "total_quantity", "total_revenue"]
+    if _source(report_dir, ("sqlite",)) is None:
+        return pd.DataFrame(columns=columns)
+    db_path = _db_path(report_dir)
+    return _major(pd.DataFrame(load_store_rollup(db_path, grain, product, start, end), columns=columns))
+
+def load_top_products(report_dir, grain, period, n=10, by="revenue"):
+    """
+    Top n products in one day / week / month, largest first.
+    """
+    import pandas as pd
+    from ..report_store import load_top_products as load_store_top
+    columns = ["product", "total_quantity", "total_revenue"]
+    if _source(report_dir, ("sqlite",)) is None:
+        return pd.DataFrame(columns=columns)
+    db_path = _db_path(report_dir)
+    return _major(pd.DataFrame(load_store_top(db_path, grain, period, n, by), columns=columns))
+
+def load_top_estimates(report_dir, n=10, by="revenue"):
+    """
+    Top n products from the approximate-mode sketches, largest first.
+    estimate - error <= true total <= estimate (see sketches.py).
+    """
+    import pandas as pd
+    from ..sketches import load, sketch_path
+    heavy, _ = load(sketch_path(report_dir))
+    df = pd.DataFrame(heavy.top(n, by), columns=["product", "estimate", "error"])
+    if by == "revenue":
+        df = _major(_major(df, "estimate"), "error")
+    return df
+
+def load_distinct_products(report_dir):
+    """
+    Estimated distinct products per date from the approximate-mode sketches.
+    """
+    import pandas as pd
+    from ..sketches import load, sketch_path
+    _, distinct = load(sketch_path(report_dir))
+    return pd.DataFrame(list(distinct.counts().items()), columns=["date", "distinct_products"])
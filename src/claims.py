@@ -0,0 +1,200 @@
+import os
+import time
+import socket
+import logging
+import threading
+
+from .context import RUN_ID
+
+# ============================================================
+# LAYOUT
+# ============================================================
+# <claim root>/
+#   <worker id>/          files this worker is processing
+#     .lease              heartbeat; its mtime is the last renewal
+#
+# A worker claims an inbox file by renaming it into its own directory,
+# which is atomic: of several workers racing for one file exactly one
+# rename succeeds. Leases are renewed in the background while a worker
+# holds files; a worker whose lease has expired is presumed dead and its
+# files are renamed back into the inbox for anyone to claim.
+LEASE_FILE = ".lease"
+
+# A worker silent for this long loses its claimed files
+LEASE_SECONDS = 300.0
+
+# Expired directories are renamed to <prefix><worker id>-<ns> before reclaiming
+RECLAIM_PREFIX = ".reclaim-"
+
+# Host + pid identify the process; RUN_ID guards against pid reuse
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}-{RUN_ID}"
+
+
+class LeaseLost(Exception):
+    """
+    A claimed file was reclaimed by another worker (our lease expired).
+    """
+
+
+class Claims:
+    """
+    This worker's claim directory under `root`.
+    """
+
+    def __init__(self, root, worker_id=WORKER_ID, lease_seconds=LEASE_SECONDS):
+        self.root = root
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.dir = os.path.join(root, worker_id)
+        self._lease = os.path.join(self.dir, LEASE_FILE)
+        self._stop = None
+        self._thread = None
+
+    # ------------------------------------------------------------
+    # Lease
+    # ------------------------------------------------------------
+    def renew(self):
+        try:
+            os.utime(self._lease)
+        except FileNotFoundError:
+            # First claim, or the directory was reclaimed: start a new one
+            os.makedirs(self.dir, exist_ok=True)
+            with open(self._lease, "a"):
+                pass
+
+    def _heartbeat(self, stop):
+        while not stop.wait(self.lease_seconds / 3):
+            try:
+                self.renew()
+            except OSError as e:
+                logging.warning(f"Lease renewal failed: {e}")
+
+    def __enter__(self):
+        """
+        Hold the lease (renewed in the background) for the with-block.
+        """
+        self.renew()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._heartbeat, args=(self._stop,), name="lease", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    # ------------------------------------------------------------
+    # Claim / release
+    # ------------------------------------------------------------
+    def claim(self, paths):
+        """
+        Rename paths into this worker's directory.
+
+        Returns:
+            claimed paths; files another worker took first are left out
+        """
+        self.renew()
+        claimed = []
+        for path in paths:
+            target = os.path.join(self.dir, os.path.basename(path))
+            try:
+                os.rename(path, target)
+            except FileNotFoundError:
+                continue  # claimed elsewhere
+            claimed.append(target)
+        return claimed
+
+    def move(self, path, target):
+        """
+        Move a claimed file out (OUT / ERR / DUP); raises LeaseLost if it
+        has been reclaimed meanwhile.
+        """
+        try:
+            os.rename(path, target)
+        except FileNotFoundError:
+            raise LeaseLost(os.path.basename(path)) from None
+
+    def release(self, paths, inbox):
+        """
+        Return claimed files that were not processed to the inbox.
+        """
+        for path in paths:
+            try:
+                _return_to_inbox(path, inbox)
+            except FileNotFoundError:
+                pass
+
+# ============================================================
+# RECLAIM
+# ============================================================
+def _return_to_inbox(path, inbox):
+    name = os.path.basename(path)
+    target = os.path.join(inbox, name)
+    if os.path.exists(target):
+        # Never overwrite a newer delivery of the same name
+        stem, ext = os.path.splitext(name)
+        target = os.path.join(inbox, f"{stem}.reclaimed-{time.time_ns()}{ext}")
+    os.rename(path, target)
+
+def _last_renewal(worker_dir):
+    try:
+        return os.stat(os.path.join(worker_dir, LEASE_FILE)).st_mtime
+    except FileNotFoundError:
+        return os.stat(worker_dir).st_mtime
+
+def reclaim_expired(root, inbox, lease_seconds=LEASE_SECONDS, own=None, now=None):
+    """
+    Move files of workers whose lease has expired back to the inbox.
+
+    The expired directory is first renamed aside (atomic), so a worker
+    that renews just after the check keeps claiming into a fresh
+    directory, and files it claimed before are reported as LeaseLost
+    when it tries to move them: every file is counted exactly once.
+    Safe to run from any number of workers.
+
+    Returns:
+        number of files reclaimed
+    """
+    try:
+        workers = os.listdir(root)
+    except FileNotFoundError:
+        return 0
+    now = time.time() if now is None else now
+
+    reclaimed = 0
+    for worker in workers:
+        worker_dir = os.path.join(root, worker)
+        if worker == own or not os.path.isdir(worker_dir):
+            continue
+        try:
+            if now - _last_renewal(worker_dir) < lease_seconds:
+                continue
+            if not worker.startswith(RECLAIM_PREFIX):
+                # A tombstone left by a reclaimer that died is picked up as is
+                tombstone = os.path.join(root, f"{RECLAIM_PREFIX}{worker}-{time.time_ns()}")
+                os.rename(worker_dir, tombstone)
+                worker_dir = tombstone
+            names = [n for n in os.listdir(worker_dir) if n != LEASE_FILE]
+        except FileNotFoundError:
+            continue  # taken by another reclaimer
+
+        for name in names:
+            try:
+                _return_to_inbox(os.path.join(worker_dir, name), inbox)
+            except FileNotFoundError:
+                continue
+            reclaimed += 1
+            logging.warning(f"Reclaimed {name} from expired worker {worker}")
+
+        try:
+            os.remove(os.path.join(worker_dir, LEASE_FILE))
+        except FileNotFoundError:
+            pass
+        try:
+            os.rmdir(worker_dir)
+        except OSError:
+            pass
+    return reclaimed
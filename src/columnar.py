@@ -0,0 +1,303 @@
+import io
+import os
+import csv
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from .validators import REQUIRED_COLUMNS, CSV_ENCODING, compile_schema, is_valid_date
+from .money import MAX_MINOR, parse_minor, add_total
+
+# ============================================================
+# COLUMN PARSERS
+# ============================================================
+# Each parser is applied once per *distinct* value (pd.factorize),
+# then broadcast back to the column. Per-value checks mirror
+# validators.validate_row exactly, so both engines agree row for row.
+
+def _to_int(value):
+    try:
+        return int(value)
+    except Exception:
+        return None
+
+def _is_product(value):
+    return isinstance(value, str) and bool(value.strip())
+
+def _map_unique(uniques, fn, dtype, missing):
+    """
+    Apply fn once per distinct value. The extra trailing slot holds
+    `missing`, so indexing with factorize code -1 (NaN) picks it up.
+    """
+    parsed = np.fromiter((fn(v) for v in uniques), dtype=dtype, count=len(uniques))
+    return np.append(parsed, np.asarray(missing, dtype=dtype))
+
+def _parse_numeric(uniques, fn):
+    """
+    Per-unique (ok mask, fits mask, int64 value) for an integer column.
+    Values beyond +-MAX_MINOR do not fit int64: they are stored clamped
+    (so the sign checks still hold) with fits False.
+    """
+    values = [fn(v) for v in uniques]
+    ok = np.fromiter((v is not None for v in values), dtype=bool, count=len(values))
+    fits = np.fromiter(
+        (v is not None and -MAX_MINOR <= v <= MAX_MINOR for v in values),
+        dtype=bool, count=len(values),
+    )
+    parsed = np.fromiter(
+        (0 if v is None else max(-MAX_MINOR, min(v, MAX_MINOR)) for v in values),
+        dtype=np.int64, count=len(values),
+    )
+    return np.append(ok, False), np.append(fits, False), np.append(parsed, np.int64(0))
+
+# ============================================================
+# LOADING
+# ============================================================
+# The header is compiled with the row engine's rules (compile_schema),
+# then pandas parses only the required columns, by position. Rows with
+# extra fields keep their first ones and short rows get empty fields,
+# as csv.reader + SchemaPlan.extract do.
+
+class _Replay(io.RawIOBase):
+    """
+    Bytes already read (the header line), then the rest of the stream.
+    """
+
+    def __init__(self, head, rest):
+        self._head = head
+        self._rest = rest
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if self._head:
+            n = min(len(b), len(self._head))
+            b[:n] = self._head[:n]
+            self._head = self._head[n:]
+            return n
+        return self._rest.readinto(b)
+
+@contextmanager
+def _open_csv(source):
+    """
+    (binary stream from the first byte, SchemaPlan) for a path or an
+    open binary stream; only a file opened here is closed.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            with _open_csv(f) as opened:
+                yield opened
+        return
+    head = source.readline()
+    plan = compile_schema(next(csv.reader([head.decode(CSV_ENCODING)]), []))
+    yield io.BufferedReader(_Replay(head, source)), plan
+
+def _read_options(plan):
+    return dict(_READ_OPTIONS, usecols=sorted(plan.indices[c] for c in REQUIRED_COLUMNS))
+
+def _canonical(df, plan):
+    """
+    Name the parsed columns (file order) by their canonical names.
+    """
+    by_position = {plan.indices[c]: c for c in REQUIRED_COLUMNS}
+    df.columns = [by_position[i] for i in sorted(by_position)]
+    return df
+
+def _factorize(df, name):
+    """
+    (codes, uniques) for a column; NaN cells (short rows) get code -1.
+    """
+    codes, uniques = pd.factorize(df[name])
+    return codes, np.asarray(uniques, dtype=object)
+
+_READ_OPTIONS = {
+    "dtype": str,
+    "keep_default_na": False,
+    "na_filter": False,
+    "encoding": CSV_ENCODING,
+    # Never promote a column to the index when rows are wider than the header
+    "index_col": False,
+}
+
+def read_frame(source):
+    """
+    Read a whole CSV into a DataFrame of raw strings with canonical headers.
+    """
+    with _open_csv(source) as (f, plan):
+        return _canonical(pd.read_csv(f, **_read_options(plan)), plan)
+
+def iter_frames(source, chunk_rows):
+    """
+    Yield chunk_rows-sized frames; closing the generator closes the file.
+    """
+    with _open_csv(source) as (f, plan):
+        with pd.read_csv(f, chunksize=chunk_rows, **_read_options(plan)) as reader:
+            for chunk in reader:
+                yield _canonical(chunk, plan)
+
+# ============================================================
+# VALIDATION + AGGREGATION
+# ============================================================
+def validate_frame(df):
+    """
+    Validate a frame column-wise.
+
+    Returns:
+        (valid mask, qty int64 array, price int64 array in minor units,
+        reasons, keys)
+        where reasons holds validate_row reason codes per row and keys
+        maps "product"/"date" to their (codes, uniques) factorization.
+    """
+    return validate_columns({name: _factorize(df, name) for name in REQUIRED_COLUMNS})
+
+def validate_columns(columns):
+    """
+    validate_frame on already factorized columns: REQUIRED_COLUMNS name
+    -> (codes, object array of distinct raw strings); code -1 = missing.
+    """
+    date_codes, date_uniques = columns["date"]
+    product_codes, product_uniques = columns["product"]
+    qty_codes, qty_uniques = columns["quantity"]
+    price_codes, price_uniques = columns["price"]
+
+    date_ok = _map_unique(date_uniques, is_valid_date, bool, False)[date_codes]
+    product_ok = _map_unique(product_uniques, _is_product, bool, False)[product_codes]
+
+    qty_ok, qty_fits, qty = (a[qty_codes] for a in _parse_numeric(qty_uniques, _to_int))
+
+    # parse_minor already keeps prices within int64
+    price_ok, _, price = (a[price_codes] for a in _parse_numeric(price_uniques, parse_minor))
+
+    # qty * price <= MAX_MINOR, checked without forming the product
+    # (qty <= MAX_MINOR // price for positive integers)
+    amount_ok = qty_fits & (qty <= MAX_MINOR // np.maximum(price, 1))
+
+    # Same precedence as validate_row: first failing check wins
+    conditions = [
+        ~date_ok,
+        ~product_ok,
+        ~qty_ok,
+        qty <= 0,
+        ~price_ok,
+        price <= 0,
+        ~amount_ok,
+    ]
+    choices = [
+        "invalid_date",
+        "empty_product",
+        "quantity_not_integer",
+        "quantity_non_positive",
+        "price_not_number",
+        "price_non_positive",
+        "amount_out_of_range",
+    ]
+    reasons = np.select(conditions, choices, default="ok")
+    valid = reasons == "ok"
+
+    keys = {
+        "product": (product_codes, product_uniques),
+        "date": (date_codes, date_uniques),
+    }
+    return valid, qty, price, reasons, keys
+
+def product_date_keys(keys, valid):
+    """
+    Factorize (product, date) pairs over the valid rows.
+
+    Returns:
+        (codes, object array of (product, date) tuples)
+    """
+    product_codes, product_uniques = keys["product"]
+    date_codes, date_uniques = keys["date"]
+    n_dates = len(date_uniques)
+
+    pair = product_codes[valid].astype(np.int64) * n_dates + date_codes[valid]
+    present, codes = np.unique(pair, return_inverse=True)
+
+    uniques = np.empty(len(present), dtype=object)
+    for i, p in enumerate(present.tolist()):
+        uniques[i] = (product_uniques[p // n_dates], date_uniques[p % n_dates])
+    return codes.ravel(), uniques
+
+def aggregate_frame(df, stats):
+    """
+    Validate df and fold it into a stats dict (see processor._new_stats).
+
+    Returns:
+        number of invalid rows in df
+    """
+    t0 = time.perf_counter()
+    valid, qty, price, reasons, keys = validate_frame(df)
+
+    n = len(df)
+    invalid = int(n - valid.sum())
+
+    stats["rows"] += n
+    stats["valid"] += n - invalid
+    stats["invalid"] += invalid
+    if invalid:
+        codes, counts = np.unique(reasons[~valid], return_counts=True)
+        stats["errors_by_reason"].update(dict(zip(codes.tolist(), counts.tolist())))
+
+    t1 = time.perf_counter()
+    stats["timings"]["validate"] += t1 - t0
+
+    if n == invalid:
+        return invalid
+
+    qty = qty[valid]
+    # int64 minor units: sums are exact in any order
+    revenue = qty * price[valid]
+
+    stats["quantity"] = add_total(stats["quantity"], qty, "quantity total")
+    stats["revenue"] = add_total(stats["revenue"], revenue, "revenue total")
+
+    for field, column in (("by_product", "product"), ("by_date", "date")):
+        codes, uniques = keys[column]
+        stats[field].add_coded(uniques, codes[valid], qty, revenue)
+    codes, uniques = product_date_keys(keys, valid)
+    stats["by_product_date"].add_coded(uniques, codes, qty, revenue)
+
+    stats["timings"]["aggregate"] += time.perf_counter() - t1
+    return invalid
+
+def process_file_columnar(filepath, stats):
+    """
+    Columnar engine: load the whole file into columns and validate /
+    aggregate with vectorized masks and grouped reductions.
+
+    Returns:
+        error_count for the file
+    """
+    t0 = time.perf_counter()
+    df = read_frame(filepath)
+    stats["timings"]["read"] += time.perf_counter() - t0
+    return aggregate_frame(df, stats)
+
+def process_file_chunked(filepath, stats, chunk_rows, abort_after):
+    """
+    Streaming variant: read chunk_rows at a time so memory stays flat,
+    and stop once the error count exceeds abort_after.
+
+    Returns:
+        error_count for the rows read so far
+    """
+    error_count = 0
+    chunks = iter_frames(filepath, chunk_rows)
+    try:
+        while True:
+            t0 = time.perf_counter()
+            chunk = next(chunks, None)
+            stats["timings"]["read"] += time.perf_counter() - t0
+            if chunk is None:
+                break
+            error_count += aggregate_frame(chunk, stats)
+            if error_count > abort_after:
+                stats["aborted"] = True
+                break
+    finally:
+        chunks.close()
+    return error_count
@@ -1,16 +1,15 @@
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QPushButton, QLabel,
-    QVBoxLayout, QWidget, QTextEdit, QCheckBox, QComboBox
+    QVBoxLayout, QWidget, QPlainTextEdit, QCheckBox, QComboBox
 )
-from PySide6.QtCore import QTimer
-
-from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg
-from matplotlib.figure import Figure
-from matplotlib.ticker import FuncFormatter
+from PySide6.QtCore import QTimer, Signal
 
+# matplotlib is imported once the window is up (_init_chart), so it
+# does not delay the first paint
 from test_data_create.generate_test_csv import (
     start_csv_generator, stop_csv_generator
 )
@@ -21,7 +20,8 @@ from .main import (
     stop_file_processing,
 )
 
-from .analytics.plots import load_by_product
+from .analytics.plots import load_by_product, report_signature
+from .log_tail import LogTailer
 
 
 # ============================================================
@@ -31,6 +31,23 @@ PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 LOG_FILE = os.path.join(PROJECT_ROOT, "logs", "system.log")
 REPORT_DIR = os.path.join(PROJECT_ROOT, "src", "reports")
 
+# Lines kept in the viewer (ring buffer per level in LogTailer)
+LOG_VIEW_MAX_LINES = 5000
+
+CHART_TOP_N = 10
+LEVEL_FRACTIONS = {"LOW": 0.3, "MEDIUM": 0.6, "HIGH": 0.9}
+
+
+def _load_chart_data(signature):
+    """
+    Worker thread: load + aggregate the top products for the chart.
+    """
+    df = load_by_product(REPORT_DIR)
+    if df.empty:
+        return signature, [], []
+    df = df.sort_values("total_revenue", ascending=False).head(CHART_TOP_N)
+    return signature, df["product"].tolist(), df["total_revenue"].tolist()
+
 
 # ============================================================
 # STYLES
@@ -56,6 +73,9 @@ QPushButton {
 # GUI
 # ============================================================
 class App(QMainWindow):
+    # Emitted from the chart worker thread; delivered on the UI thread
+    chart_data_ready = Signal(object)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Sales Data Processor")
@@ -73,6 +93,7 @@ class App(QMainWindow):
         self.level_select = QComboBox()
         self.level_select.addItems(["ALL", "INFO", "WARNING", "ERROR"])
         self.level_select.setCurrentText("ALL")
+        self.level_select.currentTextChanged.connect(self.rebuild_log_view)
 
         # ---------------- BUTTONS ----------------
         self.start_gen = QPushButton("Start CSV Generator")
@@ -86,13 +107,21 @@ class App(QMainWindow):
         self.exit_btn.setStyleSheet(DANGER_RED)
 
         # ---------------- LOG VIEW ----------------
-        self.log_view = QTextEdit()
+        self.log_view = QPlainTextEdit()
         self.log_view.setReadOnly(True)
+        self.log_view.setMaximumBlockCount(LOG_VIEW_MAX_LINES)
+        self.log_tailer = LogTailer(LOG_FILE, max_lines=LOG_VIEW_MAX_LINES)
 
         # ---------------- CHART ----------------
-        self.figure = Figure(figsize=(9, 4.5))
-        self.ax = self.figure.add_subplot(111)
-        self.chart = FigureCanvasQTAgg(self.figure)
+        # Placeholder until _init_chart swaps in the matplotlib canvas
+        self.figure = self.ax = self.chart = None
+        self._chart_slot = QLabel("Loading chart...")
+        self._chart_executor = ThreadPoolExecutor(max_workers=1)
+        self._chart_loading = False
+        self._chart_signature = None
+        self._bars = None
+        self._level_lines = {}
+        self.chart_data_ready.connect(self._on_chart_data)
 
         # ---------------- SIGNALS ----------------
         self.start_gen.clicked.connect(self.start_generator)
@@ -120,7 +149,8 @@ class App(QMainWindow):
         layout.addWidget(self.log_view)
 
         layout.addWidget(QLabel("Live Revenue Dashboard"))
-        layout.addWidget(self.chart)
+        layout.addWidget(self._chart_slot)
+        self._layout = layout
 
         container = QWidget()
         container.setLayout(layout)
@@ -131,6 +161,19 @@ class App(QMainWindow):
         self.timer.timeout.connect(self.refresh_logs)
         self.timer.timeout.connect(self.refresh_chart)
         self.timer.start(3000)
+        QTimer.singleShot(0, self._init_chart)
+
+    def _init_chart(self):
+        from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg
+        from matplotlib.figure import Figure
+
+        self.figure = Figure(figsize=(9, 4.5))
+        self.ax = self.figure.add_subplot(111)
+        self.chart = FigureCanvasQTAgg(self.figure)
+        self._layout.replaceWidget(self._chart_slot, self.chart)
+        self._chart_slot.deleteLater()
+        self._chart_slot = None
+        self.refresh_chart()
 
     # ========================================================
     # GENERATOR CONTROL
@@ -172,63 +215,120 @@ class App(QMainWindow):
     # LOG VIEWER
     # ========================================================
     def refresh_logs(self):
-        if not os.path.exists(LOG_FILE):
+        new = self.log_tailer.poll()
+        if not new:
             return
 
         selected = self.level_select.currentText()
-        with open(LOG_FILE, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-
         if selected != "ALL":
-            lines = [l for l in lines if f"[{selected}]" in l]
+            new = [(level, line) for level, line in new if level == selected]
+        if not new:
+            return
 
-        self.log_view.setPlainText("".join(lines))
+        # Push only the delta; the block limit keeps the view bounded
+        self.log_view.appendPlainText("\n".join(line for _, line in new))
+        self._scroll_logs_to_end()
+
+    def rebuild_log_view(self, level):
+        self.log_view.setPlainText("\n".join(self.log_tailer.lines(level)))
+        self._scroll_logs_to_end()
+
+    def _scroll_logs_to_end(self):
         self.log_view.verticalScrollBar().setValue(
             self.log_view.verticalScrollBar().maximum()
         )
 
     # ========================================================
-    # LIVE CHART (FIXED)
+    # LIVE CHART
     # ========================================================
     def refresh_chart(self):
-        self.ax.clear()
+        # A couple of stat() calls: skip everything if nothing changed
+        if self.chart is None:
+            return
+        signature = report_signature(REPORT_DIR)
+        if self._chart_loading or signature == self._chart_signature:
+            return
+
+        self._chart_loading = True
+        future = self._chart_executor.submit(_load_chart_data, signature)
+        future.add_done_callback(self._emit_chart_data)
 
-        df = load_by_product(REPORT_DIR)
-        if df.empty:
-            self.ax.set_title("Waiting for data...", color="white")
-            self.chart.draw()
+    def _emit_chart_data(self, future):
+        try:
+            result = future.result()
+        except Exception:
+            result = None
+        self.chart_data_ready.emit(result)
+
+    def _on_chart_data(self, result):
+        self._chart_loading = False
+        if result is None:
             return
 
-        df = df.sort_values("total_revenue", ascending=False).head(10)
+        signature, products, revenue = result
+        self._chart_signature = signature
 
-        products = df["product"]
-        revenue = df["total_revenue"]
+        if not products:
+            self._draw_waiting()
+        elif self._bars is not None and len(self._bars) == len(products):
+            self._update_chart(products, revenue)
+        else:
+            self._draw_chart(products, revenue)
+
+    def _draw_waiting(self):
+        self.ax.clear()
+        self._bars = None
+        self._level_lines = {}
+        self.ax.set_title("Waiting for data...", color="white")
+        self.chart.draw_idle()
+
+    def _update_chart(self, products, revenue):
+        """
+        Same products count: reuse the existing bar and level artists.
+        """
+        max_rev = max(revenue)
+        for bar, value in zip(self._bars, revenue):
+            bar.set_height(value)
+        for label, line in self._level_lines.items():
+            y = max_rev * LEVEL_FRACTIONS[label]
+            line.set_ydata([y, y])
+
+        self.ax.set_xticks(range(len(products)), products)
+        self.ax.tick_params(axis="x", colors="white", rotation=35)
+        self.ax.relim()
+        self.ax.autoscale_view()
+        self.chart.draw_idle()
+
+    def _draw_chart(self, products, revenue):
+        from matplotlib.ticker import FuncFormatter
+
+        self.ax.clear()
 
         # ---- Theme ----
         self.figure.patch.set_facecolor("#0b1220")
         self.ax.set_facecolor("#0b1220")
 
         # ---- Bars (FIXED WIDTH) ----
-        self.ax.bar(
-            products,
+        self._bars = self.ax.bar(
+            range(len(products)),
             revenue,
             width=0.55,
             color="#e5e7eb"
         )
+        self.ax.set_xticks(range(len(products)), products)
 
         # ---- Levels ----
-        max_rev = revenue.max()
-        levels = {
-            "LOW": max_rev * 0.3,
-            "MEDIUM": max_rev * 0.6,
-            "HIGH": max_rev * 0.9,
-        }
-
-        for label, y in levels.items():
-            self.ax.axhline(y=y, linestyle="--", color="#64748b", linewidth=1)
+        max_rev = max(revenue)
+        self._level_lines = {}
+
+        for label, fraction in LEVEL_FRACTIONS.items():
+            y = max_rev * fraction
+            self._level_lines[label] = self.ax.axhline(
+                y=y, linestyle="--", color="#64748b", linewidth=1
+            )
             self.ax.text(
                 0.02,
-                y / max_rev,
+                fraction,
                 label,
                 transform=self.ax.transAxes,
                 color="#94a3b8",
@@ -251,7 +351,7 @@ class App(QMainWindow):
             spine.set_visible(False)
 
         self.figure.tight_layout()
-        self.chart.draw()
+        self.chart.draw_idle()
 
     # ========================================================
     # CLEAR LOGS
@@ -259,6 +359,7 @@ class App(QMainWindow):
     def clear_logs(self):
         if os.path.exists(LOG_FILE):
             open(LOG_FILE, "w").close()
+        self.log_tailer.reset()
         self.log_view.clear()
         self.status.setText("Status: Logs Cleared")
 
@@ -268,6 +369,7 @@ class App(QMainWindow):
     def stop_program(self):
         stop_csv_generator()
         stop_file_processing()
+        self._chart_executor.shutdown(wait=False, cancel_futures=True)
         self.status.setText("Status: Program Stopped")
         QApplication.quit()
 
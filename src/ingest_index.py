@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import hashlib
+
+from .locks import file_lock
+
+# ============================================================
+# SETTINGS
+# ============================================================
+# Files are hashed in reads of this size (one reusable buffer)
+HASH_BUFFER_BYTES = 1024 * 1024
+
+# Entries older than this are dropped at compaction
+RETENTION_SECONDS = 30 * 24 * 3600
+
+# Rewrite the log once it holds this many times more lines than live entries
+COMPACT_RATIO = 2
+
+# ============================================================
+# HASHING
+# ============================================================
+def file_digest(path):
+    """
+    BLAKE2b-128 of the file contents, read in HASH_BUFFER_BYTES blocks.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    buf = bytearray(HASH_BUFFER_BYTES)
+    view = memoryview(buf)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(view[:n])
+    return h.hexdigest()
+
+# ============================================================
+# INDEX
+# ============================================================
+class IngestIndex:
+    """
+    Persistent record of files already ingested.
+
+    An append-only JSON-lines log; one entry per file:
+        {"hash", "size", "name", "mtime_ns", "at"}
+
+    A file is a duplicate when its content hash (and size) matches an
+    entry. A file with the same name, size and mtime as an entry is
+    taken as the same delivery without being read at all.
+
+    Several workers may share one log: writes and compaction hold a
+    lock on <path>.lock, and refresh() reads what others appended.
+    """
+
+    def __init__(self, path, retention=RETENTION_SECONDS):
+        self.path = path
+        self.retention = retention
+        self._by_hash = {}
+        self._by_stat = {}
+        self._lines = 0
+        self._pending = []
+        self._offset = 0   # bytes of the log consumed so far
+        self._inode = None
+        self._load()
+
+    def __len__(self):
+        return len(self._by_hash)
+
+    # ------------------------------------------------------------
+    # Load / compact
+    # ------------------------------------------------------------
+    def _index(self, entry):
+        old = self._by_hash.get(entry["hash"])
+        if old is not None:
+            self._by_stat.pop(_stat_key(old), None)
+        self._by_hash[entry["hash"]] = entry
+        self._by_stat[_stat_key(entry)] = entry
+
+    def refresh(self):
+        """
+        Read entries appended to the log since the last read; start over
+        if it was compacted (replaced) meanwhile.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                st = os.fstat(f.fileno())
+                if st.st_ino != self._inode or st.st_size < self._offset:
+                    self._by_hash, self._by_stat = {}, {}
+                    self._lines, self._offset, self._inode = 0, 0, st.st_ino
+                f.seek(self._offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+
+        # Only complete lines; a write in progress is read next time
+        end = data.rfind(b"\n") + 1
+        self._offset += end
+        cutoff = time.time() - self.retention
+        for raw in data[:end].split(b"\n")[:-1]:
+            if not raw:
+                continue
+            self._lines += 1
+            try:
+                entry = json.loads(raw)
+            except ValueError:
+                continue  # torn write
+            if entry["at"] >= cutoff:
+                self._index(entry)
+        # Not yet written, so never in the log: keep them on top
+        for entry in self._pending:
+            self._index(entry)
+
+    def _load(self):
+        self.refresh()
+        if self._lines > COMPACT_RATIO * max(len(self._by_hash), 1):
+            with file_lock(self.path + ".lock"):
+                self.refresh()
+                self.compact()
+
+    def compact(self, now=None):
+        """
+        Drop expired entries and rewrite the log with one line per hash.
+        With other writers, call it under the lock after refresh().
+        """
+        cutoff = (time.time() if now is None else now) - self.retention
+        live = [e for e in self._by_hash.values() if e["at"] >= cutoff]
+        self._by_hash, self._by_stat = {}, {}
+        for entry in live:
+            self._index(entry)
+
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("".join(json.dumps(e) + "\n" for e in live))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        st = os.stat(self.path)
+        self._lines, self._offset, self._inode = len(live), st.st_size, st.st_ino
+
+    # ------------------------------------------------------------
+    # Lookup / record
+    # ------------------------------------------------------------
+    def check(self, path):
+        """
+        Returns:
+            (entry to record for this file, earlier entry it duplicates or None)
+        """
+        st = os.stat(path)
+        entry = {
+            "hash": None,
+            "size": st.st_size,
+            "name": os.path.basename(path),
+            "mtime_ns": st.st_mtime_ns,
+            "at": time.time(),
+        }
+
+        same = self._by_stat.get(_stat_key(entry))
+        if same is not None:
+            entry["hash"] = same["hash"]
+            return entry, same
+
+        entry["hash"] = file_digest(path)
+        earlier = self._by_hash.get(entry["hash"])
+        if earlier is not None and earlier["size"] == entry["size"]:
+            return entry, earlier
+        return entry, None
+
+    def add(self, entry):
+        """
+        Record an ingested file (written on the next flush()).
+        """
+        self._index(entry)
+        self._pending.append(entry)
+
+    def flush(self):
+        if not self._pending:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with file_lock(self.path + ".lock"):
+            # Others' entries first, so the offset lands after our append
+            self.refresh()
+            data = "".join(json.dumps(e) + "\n" for e in self._pending).encode("utf-8")
+            with open(self.path, "ab") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+                st = os.fstat(f.fileno())
+            self._offset, self._inode = st.st_size, st.st_ino
+            self._lines += len(self._pending)
+            self._pending.clear()
+
+            if self._lines > COMPACT_RATIO * max(len(self._by_hash), 1):
+                self.compact()
+
+
+def _stat_key(entry):
+    return entry["name"], entry["size"], entry["mtime_ns"]
@@ -3,6 +3,8 @@ import shutil
 import logging
 from datetime import datetime
 
+from .prefetch import INPUT_SUFFIXES
+
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(PROJECT_ROOT, "data")
 
@@ -10,17 +12,18 @@ INPUT_DIR = os.path.join(DATA_DIR, "in")
 OUTPUT_DIR = os.path.join(DATA_DIR, "out")
 ERROR_DIR = os.path.join(DATA_DIR, "err")
 
-for d in (INPUT_DIR, OUTPUT_DIR, ERROR_DIR):
-    os.makedirs(d, exist_ok=True)
-
 def get_input_files():
+    if not os.path.isdir(INPUT_DIR):
+        return []
     return [
         os.path.join(INPUT_DIR, f)
         for f in os.listdir(INPUT_DIR)
-        if f.endswith(".csv")
+        if f.endswith(INPUT_SUFFIXES)
     ]
 
 def _move(src, dest_dir):
+    # Created on first use: nothing happens at import
+    os.makedirs(dest_dir, exist_ok=True)
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
     name = os.path.basename(src)
     dest = os.path.join(dest_dir, f"{name}_{ts}")
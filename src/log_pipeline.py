@@ -0,0 +1,192 @@
+import os
+import queue
+import logging
+import threading
+from logging.handlers import QueueHandler
+
+from . import metrics
+
+# ============================================================
+# SETTINGS
+# ============================================================
+# Records waiting for the listener; when full, new records are dropped
+# (and counted) rather than blocking the thread that logged them
+QUEUE_SIZE = 10_000
+
+# Most records the listener formats before one write + flush
+BATCH_SIZE = 512
+
+# Per call site: at most SAMPLE_BURST records per SAMPLE_WINDOW_SECONDS.
+# Records above SAMPLE_MAX_LEVEL (errors) are never sampled.
+SAMPLE_BURST = 20
+SAMPLE_WINDOW_SECONDS = 1.0
+SAMPLE_MAX_LEVEL = logging.WARNING
+
+_STOP = object()
+
+# ============================================================
+# PRODUCER SIDE
+# ============================================================
+class SamplingFilter(logging.Filter):
+    """
+    Rate-limit repeated records per call site (pathname, lineno).
+
+    Per-file messages are f-strings, so the text differs every time but
+    the call site does not. The first SAMPLE_BURST records of a window
+    pass; the rest are counted, and the count is appended to the first
+    record let through in a later window.
+    """
+
+    def __init__(self, burst=SAMPLE_BURST, window=SAMPLE_WINDOW_SECONDS,
+                 max_level=SAMPLE_MAX_LEVEL):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.max_level = max_level
+        self._lock = threading.Lock()
+        self._sites = {}  # (pathname, lineno) -> [window start, passed, suppressed]
+
+    def filter(self, record):
+        if record.levelno > self.max_level:
+            return True
+
+        key = (record.pathname, record.lineno)
+        carried = 0
+        with self._lock:
+            state = self._sites.get(key)
+            if state is None or record.created - state[0] >= self.window:
+                if state is not None:
+                    carried = state[2]
+                state = self._sites[key] = [record.created, 0, 0]
+            allowed = state[1] < self.burst
+            if allowed:
+                state[1] += 1
+            else:
+                state[2] += 1
+
+        if not allowed:
+            metrics.LOG_SUPPRESSED.inc(site=_site(key))
+            return False
+        if carried:
+            record.msg = f"{record.msg} [{carried} similar messages suppressed]"
+        return True
+
+    def drain(self):
+        """
+        Suppressed counts not yet reported in the log: {site: count}.
+        """
+        with self._lock:
+            pending = {_site(k): s[2] for k, s in self._sites.items() if s[2]}
+            for state in self._sites.values():
+                state[2] = 0
+        return pending
+
+
+def _site(key):
+    return f"{os.path.basename(key[0])}:{key[1]}"
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hand records to the listener thread; never blocks the caller.
+    """
+
+    def prepare(self, record):
+        # Same process: formatting is left to the listener thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.LOG_DROPPED.inc()
+
+# ============================================================
+# CONSUMER SIDE
+# ============================================================
+class _Batching:
+    """
+    emit() only formats into a buffer; flush() writes the buffer in one
+    call. The listener flushes after every drained batch.
+    """
+
+    def _init_batch(self):
+        self._pending = []
+
+    def emit(self, record):
+        try:
+            self._pending.append(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        with self.lock:
+            if self._pending and self.stream is not None:
+                self.stream.write("".join(self._pending))
+                self._pending.clear()
+            if self.stream is not None and hasattr(self.stream, "flush"):
+                self.stream.flush()
+
+
+class BatchFileHandler(_Batching, logging.FileHandler):
+    def __init__(self, filename, encoding="utf-8"):
+        self._init_batch()
+        super().__init__(filename, encoding=encoding)
+
+
+class BatchStreamHandler(_Batching, logging.StreamHandler):
+    def __init__(self, stream=None):
+        self._init_batch()
+        super().__init__(stream)
+
+
+class LogListener:
+    """
+    Background thread that drains the queue into the handlers.
+
+    Blocks until a record arrives, then takes whatever else is already
+    queued (up to BATCH_SIZE) and writes it with one flush per handler.
+    A quiet log is written record by record; a busy one in batches.
+    """
+
+    def __init__(self, log_queue, handlers, batch_size=BATCH_SIZE):
+        self.queue = log_queue
+        self.handlers = list(handlers)
+        self.batch_size = batch_size
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="log-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Write everything queued so far, then stop the thread.
+        """
+        if self._thread is None:
+            return
+        self.queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            try:
+                while len(batch) < self.batch_size:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            stopping = False
+            for record in batch:
+                if record is _STOP:
+                    stopping = True
+                    continue
+                for handler in self.handlers:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+            for handler in self.handlers:
+                handler.flush()
+            if stopping:
+                return
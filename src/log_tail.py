@@ -0,0 +1,115 @@
+import os
+import re
+from collections import deque
+
+LEVELS = ("INFO", "WARNING", "ERROR", "CRITICAL")
+
+# Matches the "[LEVEL]" tag written by main.configure_logging
+_LEVEL_RE = re.compile(r"\[(INFO|WARNING|ERROR|CRITICAL)\]")
+
+# On first read (or when far behind) only the tail of the log is loaded
+INITIAL_BACKLOG_BYTES = 1024 * 1024
+
+
+class LogTailer:
+    """
+    Incrementally follow a log file.
+
+    Remembers the byte offset between polls and only reads what was
+    appended. Truncation (size < offset) and rotation (inode change)
+    restart from the beginning of the new file. Lines are kept in a
+    bounded ring buffer plus one bounded buffer per level, so switching
+    the level filter never rescans the file.
+    """
+
+    def __init__(self, path, max_lines=5000):
+        self.path = path
+        self.max_lines = max_lines
+        self._offset = None
+        self._inode = None
+        self._partial = b""
+        self._all = deque(maxlen=max_lines)
+        self._by_level = {lvl: deque(maxlen=max_lines) for lvl in LEVELS}
+
+    def reset(self):
+        """
+        Drop buffered lines; the next poll starts at the current end of file.
+        """
+        self._all.clear()
+        for buf in self._by_level.values():
+            buf.clear()
+        self._partial = b""
+        self._offset = None
+        self._inode = None
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        self._offset = st.st_size
+        self._inode = st.st_ino
+
+    def _start_offset(self, size):
+        return max(0, size - INITIAL_BACKLOG_BYTES)
+
+    def poll(self):
+        """
+        Read newly appended complete lines.
+
+        Returns:
+            list of (level, line) for the new lines, oldest first
+        """
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return []
+
+        skip_first = False
+        if self._offset is None:
+            self._offset = self._start_offset(st.st_size)
+            skip_first = self._offset > 0  # landed mid-line
+        elif st.st_ino != self._inode or st.st_size < self._offset:
+            # Rotated or truncated: follow the new file from the start
+            self._offset = 0
+            self._partial = b""
+        self._inode = st.st_ino
+
+        if st.st_size - self._offset > INITIAL_BACKLOG_BYTES:
+            # Too far behind to matter: skip ahead to the tail
+            self._offset = self._start_offset(st.st_size)
+            self._partial = b""
+            skip_first = True
+
+        if st.st_size == self._offset:
+            return []
+
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read(st.st_size - self._offset)
+            self._offset = f.tell()
+
+        data = self._partial + data
+        lines = data.split(b"\n")
+        self._partial = lines.pop()  # incomplete trailing line (or b"")
+        if skip_first and lines:
+            lines.pop(0)
+
+        new = []
+        for raw in lines:
+            line = raw.decode("utf-8", errors="replace").rstrip("\r")
+            if not line:
+                continue
+            m = _LEVEL_RE.search(line)
+            level = m.group(1) if m else None
+            self._all.append(line)
+            if level:
+                self._by_level[level].append(line)
+            new.append((level, line))
+        return new
+
+    def lines(self, level="ALL"):
+        """
+        Buffered lines for a level filter ("ALL" or one of LEVELS).
+        """
+        if level == "ALL":
+            return list(self._all)
+        return list(self._by_level.get(level, ()))
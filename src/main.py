@@ -1,16 +1,31 @@
 import os
 import sys
-import time
+import queue
+import atexit
+import argparse
 import threading
 import logging
 
+from . import reports
 from .context import RUN_ID
-from .processor import process_all_files
+from .metrics import start_metrics_server
+from .query_api import start_query_server
+from .log_pipeline import (
+    QUEUE_SIZE, SamplingFilter, NonBlockingQueueHandler,
+    BatchFileHandler, BatchStreamHandler, LogListener,
+)
+from .prefetch import PREFETCH_DEPTH, READ_BUFFER_BYTES
+from .profiling import RunProfiler
+from .readers import READERS, DEFAULT_READER
+from .processor import (
+    DATA_IN, init_dirs,
+    process_all_files, reclaim_expired_claims, shutdown_pool,
+    ENGINES, DEFAULT_ENGINE, DEFAULT_WORKERS,
+)
 
 # ================= PATHS =================
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 LOG_DIR = os.path.join(BASE_DIR, "logs")
-os.makedirs(LOG_DIR, exist_ok=True)
 
 LOG_FILE = os.path.join(LOG_DIR, "system.log")
 
@@ -34,14 +49,21 @@ EMOJI = {
     logging.CRITICAL: "🚫",
 }
 
+_EMOJI_PREFIXES = tuple(set(EMOJI.values()))
+
 class EmojiFormatter(logging.Formatter):
-    def format(self, record):
-        msg = str(record.msg)
-        for e in EMOJI.values():
-            if msg.startswith(e):
-                msg = msg[len(e):].lstrip()
-        record.msg = f"{EMOJI.get(record.levelno, '')} {msg}"
-        return super().format(record)
+    """
+    Prefix the level emoji. Works on record.message (set by format) so
+    record.msg is left alone and can be formatted by several handlers.
+    """
+    def formatMessage(self, record):
+        msg = record.message
+        while msg.startswith(_EMOJI_PREFIXES):
+            for e in _EMOJI_PREFIXES:
+                if msg.startswith(e):
+                    msg = msg[len(e):].lstrip()
+        record.message = f"{EMOJI.get(record.levelno, '')} {msg}"
+        return super().formatMessage(record)
 
 # ================= LOGGING =================
 LEVELS = {
@@ -50,7 +72,20 @@ LEVELS = {
     "ERROR": logging.ERROR,
 }
 
+_listener = None
+_sampler = None
+
 def configure_logging(print_console=True, level="INFO"):
+    """
+    Route the root logger through a bounded queue.
+
+    Callers only enqueue the record; formatting and batched writes to
+    the log file (and stdout) happen on a background listener thread.
+    Repeated records from one call site are rate-limited.
+    """
+    global _listener, _sampler
+    shutdown_logging()
+
     root = logging.getLogger()
     root.setLevel(LEVELS.get(level, logging.INFO))
     root.handlers.clear()
@@ -59,34 +94,210 @@ def configure_logging(print_console=True, level="INFO"):
         "%(asctime)s [%(levelname)s] RunID=%(run_id)s | %(message)s"
     )
 
-    fh = logging.FileHandler(LOG_FILE, encoding="utf-8")
-    fh.setFormatter(formatter)
-    root.addHandler(fh)
-
+    os.makedirs(LOG_DIR, exist_ok=True)
+    handlers = [BatchFileHandler(LOG_FILE)]
     if print_console:
-        ch = logging.StreamHandler(sys.stdout)
-        ch.setFormatter(formatter)
-        root.addHandler(ch)
+        handlers.append(BatchStreamHandler(sys.stdout))
+    for h in handlers:
+        h.setFormatter(formatter)
+
+    _sampler = SamplingFilter()
+    qh = NonBlockingQueueHandler(queue.Queue(QUEUE_SIZE))
+    qh.addFilter(_sampler)
+    root.addHandler(qh)
+
+    _listener = LogListener(qh.queue, handlers)
+    _listener.start()
 
     logging.info("Logging initialized")
 
+def shutdown_logging():
+    """
+    Report pending suppression counts, flush the queue and close handlers.
+    """
+    global _listener, _sampler
+    if _listener is None:
+        return
+
+    for site, count in _sampler.drain().items():
+        logging.info(f"Suppressed {count} repeated log messages from {site}")
+
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        if isinstance(h, NonBlockingQueueHandler):
+            root.removeHandler(h)
+
+    _listener.stop()
+    for h in _listener.handlers:
+        h.close()
+    _listener = None
+    _sampler = None
+
+atexit.register(shutdown_logging)
+
 # ================= PROCESS LOOP =================
-def _processor_loop():
+# Seconds to block for new files per wait; the watcher wakes immediately
+# on a drop (inotify) or on stop, so this only bounds idle wakeups.
+IDLE_WAIT_SECONDS = 5.0
+
+# Pause after a run that raised before retrying its files, so a lasting
+# fault (disk full, unreadable share) does not spin the loop
+FAILED_RUN_BACKOFF_SECONDS = 5.0
+
+_watcher = None
+
+def _make_profiler(every, limit):
+    return RunProfiler(every, limit) if every else None
+
+def _run(profiler, **options):
+    if profiler is None:
+        return process_all_files(**options)
+    return profiler.run(process_all_files, **options)
+
+def _processor_loop(options, profiler=None):
+    global _watcher
+    from .watcher import InboxWatcher
+
     logging.info("Sales Data Processor started")
 
-    while not _stop_event.is_set():
-        summary = process_all_files()
-        if summary.get("processed", 0) == 0:
-            logging.warning("No CSV files found")
-        time.sleep(2)
+    init_dirs()
+    _watcher = InboxWatcher(DATA_IN)
+    idle = False
+    try:
+        while not _stop_event.is_set():
+            ready = _watcher.wait(IDLE_WAIT_SECONDS)
+            if _stop_event.is_set():
+                break
+            if not ready:
+                # Files of crashed workers come back through the inbox
+                reclaim_expired_claims()
+                # Log the transition to idle once, not every wakeup
+                if not idle:
+                    logging.warning("No CSV files found")
+                    idle = True
+                continue
+
+            idle = False
+            try:
+                _run(profiler, files=ready, stop_event=_stop_event, **options)
+            except Exception:
+                # Keep the loop (and the GUI's "running" state) alive
+                logging.exception("Processing run failed; retrying its files")
+                _stop_event.wait(FAILED_RUN_BACKOFF_SECONDS)
+                _watcher.requeue(ready)
+    finally:
+        _watcher.close()
+        _watcher = None
+        shutdown_pool()
 
     logging.info("Sales Data Processor stopped")
 
 # ================= PUBLIC API =================
-def start_file_processing():
+def start_file_processing(engine=DEFAULT_ENGINE, workers=DEFAULT_WORKERS, stream=False,
+                          prefetch=PREFETCH_DEPTH, read_buffer=READ_BUFFER_BYTES,
+                          reader=DEFAULT_READER, approx=False, profile_every=0,
+                          profile_limit=None):
+    """
+    Start the background processing loop.
+
+    engine:  "row" (default) or "columnar" (pandas/NumPy)
+    reader:  row engine input, "csv" (default) or "mmap" fast path
+    workers: number of processes used to parse files in parallel
+    stream:  chunked reads with early abort at the error threshold
+    prefetch, read_buffer:
+             read-ahead depth (blocks) and block size for serial runs
+    approx:  fixed-memory top-N / distinct-count sketches per product
+    profile_every, profile_limit:
+             profile every Nth run (0: off), at most profile_limit
+             times, into the reports directory (see profiling.py)
+    """
+    options = {
+        "engine": engine, "reader": reader, "workers": workers, "stream": stream,
+        "prefetch": prefetch, "read_buffer": read_buffer, "approx": approx,
+    }
+    profiler = _make_profiler(profile_every, profile_limit)
     _stop_event.clear()
-    threading.Thread(target=_processor_loop, daemon=True).start()
+    threading.Thread(target=_processor_loop, args=(options, profiler), daemon=True).start()
 
 def stop_file_processing():
     _stop_event.set()
+    if _watcher is not None:
+        _watcher.wake()
     logging.info("Stop file processing requested")
+
+# ================= CLI =================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sales data processor")
+    parser.add_argument("--engine", choices=ENGINES, default=DEFAULT_ENGINE,
+                        help="row-by-row or columnar (pandas/NumPy) processing")
+    parser.add_argument("--reader", choices=READERS, default=DEFAULT_READER,
+                        help="row engine input: csv module, or mmap fast path with csv fallback")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="processes used to parse files in parallel")
+    parser.add_argument("--stream", action="store_true",
+                        help="bounded-memory chunked reads; abort files past the error threshold")
+    parser.add_argument("--prefetch-depth", type=int, default=PREFETCH_DEPTH,
+                        help="blocks read ahead of the parser (0 disables read-ahead)")
+    parser.add_argument("--read-buffer", type=int, default=READ_BUFFER_BYTES,
+                        help="read block size in bytes")
+    parser.add_argument("--approx", action="store_true",
+                        help="fixed-memory sketches for top products and distinct counts "
+                             "(product estimates go to sketches.npz, not the exact "
+                             "reports; date totals stay exact)")
+    parser.add_argument("--report-backends", default=",".join(reports.REPORT_BACKENDS),
+                        help="comma-separated report outputs: "
+                             + ", ".join(reports.REPORT_BACKEND_CHOICES))
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="serve Prometheus metrics on 127.0.0.1:PORT/metrics")
+    parser.add_argument("--query-port", type=int, default=None,
+                        help="serve the JSON query API on 127.0.0.1:PORT/api")
+    parser.add_argument("--profile", type=int, nargs="?", const=1, default=None, metavar="N",
+                        help="cProfile + tracemalloc every Nth run (default 1) into "
+                             "the reports directory")
+    parser.add_argument("--profile-limit", type=int, default=None, metavar="K",
+                        help="stop profiling after K profiles")
+    parser.add_argument("--once", action="store_true",
+                        help="process the inbox once and exit")
+    parser.add_argument("--level", choices=list(LEVELS), default="INFO")
+    parser.add_argument("--quiet", action="store_true",
+                        help="do not print logs to the terminal")
+    args = parser.parse_args(argv)
+
+    backends = tuple(b.strip() for b in args.report_backends.split(",") if b.strip())
+    unknown = set(backends) - set(reports.REPORT_BACKEND_CHOICES)
+    if unknown:
+        parser.error(f"unknown report backend(s): {', '.join(sorted(unknown))}")
+    reports.REPORT_BACKENDS = backends
+    if args.profile is not None and args.profile < 1:
+        parser.error("--profile must be at least 1")
+    if args.profile_limit is not None and args.profile_limit < 1:
+        parser.error("--profile-limit must be at least 1")
+
+    configure_logging(not args.quiet, args.level)
+    options = {
+        "engine": args.engine, "reader": args.reader,
+        "workers": args.workers, "stream": args.stream,
+        "prefetch": args.prefetch_depth, "read_buffer": args.read_buffer,
+        "approx": args.approx,
+    }
+
+    if args.metrics_port is not None:
+        start_metrics_server(args.metrics_port)
+    if args.query_port is not None:
+        start_query_server(args.query_port)
+
+    profiler = _make_profiler(args.profile, args.profile_limit)
+
+    if args.once:
+        _run(profiler, **options)
+        shutdown_pool()
+        return
+
+    _stop_event.clear()
+    try:
+        _processor_loop(options, profiler)
+    except KeyboardInterrupt:
+        stop_file_processing()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+import bisect
+import logging
+import threading
+
+# ============================================================
+# METRIC TYPES
+# ============================================================
+# Minimal in-process Prometheus-style metrics: counters, gauges and
+# histograms with optional labels, rendered in the text exposition
+# format. Updates take one lock; they happen per file / per run, never
+# per row.
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels.get(l, "")) for l in self.labels)
+
+    def _label_str(self, key, extra=None):
+        pairs = list(zip(self.labels, key))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        body = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+        return "{" + body + "}"
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key, value):
+        return [f"{self.name}{self._label_str(key)} {_num(value)}"]
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets, labels=()):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0, 0.0]
+            i = bisect.bisect_left(self.buckets, value)
+            if i < len(self.buckets):
+                state[0][i] += 1
+            state[1] += 1
+            state[2] += value
+
+    def _render_value(self, key, state):
+        counts, total, sum_ = state
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{self._label_str(key, ('le', _num(bound)))} {cumulative}")
+        lines.append(f"{self.name}_bucket{self._label_str(key, ('le', '+Inf'))} {total}")
+        lines.append(f"{self.name}_sum{self._label_str(key)} {_num(sum_)}")
+        lines.append(f"{self.name}_count{self._label_str(key)} {total}")
+        return lines
+
+    def value(self, **labels):
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return 0 if state is None else state[1]
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _num(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+# ============================================================
+# REGISTRY
+# ============================================================
+REGISTRY = []
+
+def _register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+ROWS = _register(Counter(
+    "sales_rows_total", "Rows read from input files", ["status"]))
+ROW_ERRORS = _register(Counter(
+    "sales_row_errors_total", "Invalid rows by validate_row reason code", ["reason"]))
+BYTES_READ = _register(Counter(
+    "sales_bytes_read_total", "Input bytes read"))
+FILES = _register(Counter(
+    "sales_files_total", "Processed files by outcome", ["result"]))
+FILES_READ = _register(Counter(
+    "sales_files_read_total", "Files read by the row engine's mmap path, by reader used", ["reader"]))
+STAGE_SECONDS = _register(Counter(
+    "sales_stage_seconds_total", "Time spent per pipeline stage", ["stage"]))
+FILE_SECONDS = _register(Histogram(
+    "sales_file_seconds", "Per-file processing latency",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)))
+RUNS = _register(Counter(
+    "sales_runs_total", "Completed process_all_files runs"))
+INBOX_BACKLOG = _register(Gauge(
+    "sales_inbox_backlog_files", "CSV files waiting in the inbox after the last run"))
+LAST_RUN_ROWS_PER_SEC = _register(Gauge(
+    "sales_last_run_rows_per_second", "Throughput of the last run"))
+LOG_SUPPRESSED = _register(Counter(
+    "sales_log_suppressed_total", "Log records dropped by sampling, per call site", ["site"]))
+LOG_DROPPED = _register(Counter(
+    "sales_log_dropped_total", "Log records dropped because the log queue was full"))
+
+def render():
+    """
+    All metrics in Prometheus text exposition format.
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+def reset():
+    for metric in REGISTRY:
+        metric.reset()
+
+# ============================================================
+# HTTP ENDPOINT
+# ============================================================
+_server = None
+
+def create_app():
+    from flask import Flask, Response
+
+    app = Flask("sales-metrics")
+
+    @app.route("/metrics")
+    def metrics():
+        return Response(render(), mimetype="text/plain; version=0.0.4")
+
+    return app
+
+def start_metrics_server(port=9108, host="127.0.0.1"):
+    """
+    Serve /metrics from a daemon thread (local only by default).
+    """
+    global _server
+    if _server is not None:
+        return _server
+
+    from werkzeug.serving import make_server
+
+    _server = make_server(host, port, create_app(), threaded=True)
+    threading.Thread(target=_server.serve_forever, daemon=True).start()
+    logging.info(f"Metrics endpoint on http://{host}:{_server.server_port}/metrics")
+    return _server
+
+def stop_metrics_server():
+    global _server
+    if _server is not None:
+        _server.shutdown()
+        _server.server_close()
+    _server = None
@@ -0,0 +1,108 @@
+# ============================================================
+# SETTINGS
+# ============================================================
+# Money is carried as integer minor units (cents / paise) from parsing to
+# report output: sums are exact, and NumPy accumulates them as int64.
+# Amounts are turned back into decimal major units only where they are
+# written out (CSV reports, charts, the query API).
+MINOR_DIGITS = 2
+MINOR_UNITS = 10 ** MINOR_DIGITS
+
+# int64 range: amounts and running totals beyond it are rejected rather
+# than wrapped
+MAX_MINOR = 2 ** 63 - 1
+
+class TotalOutOfRange(ValueError):
+    """
+    A running total would pass MAX_MINOR.
+    """
+
+# ============================================================
+# PARSE
+# ============================================================
+def parse_minor(text):
+    """
+    Decimal price string -> int minor units, e.g. "12.5" -> 1250.
+
+    Plain decimals only, with at most MINOR_DIGITS significant decimals
+    ("1.250" is fine, "1.255" is not a whole number of minor units).
+    Exponents, inf and nan are rejected.
+
+    Returns:
+        int, or None when text is not such an amount
+    """
+    if not isinstance(text, str):
+        return None
+    whole, _, frac = text.strip().partition(".")
+    if len(frac) > MINOR_DIGITS:
+        if frac[MINOR_DIGITS:].strip("0"):
+            return None
+        frac = frac[:MINOR_DIGITS]
+    if frac:
+        if not frac.isdigit():
+            return None
+    elif not whole[-1:].isdigit():
+        return None  # no digits at all ("", "-", ".")
+    try:
+        # One int() over the digits, sign included: "-0.5" -> int("-050")
+        value = int(whole + frac.ljust(MINOR_DIGITS, "0"))
+    except ValueError:
+        return None
+    if not -MAX_MINOR <= value <= MAX_MINOR:
+        return None
+    return value
+
+def round_minor(value):
+    """
+    Major-unit amount (number or string) -> nearest int minor units.
+
+    For amounts read back from reports, including ones written as floats
+    before money was kept in minor units.
+    """
+    minor = parse_minor(value) if isinstance(value, str) else None
+    if minor is None:
+        minor = round(float(value) * MINOR_UNITS)
+    return minor
+
+# ============================================================
+# TOTALS
+# ============================================================
+def check_total(total, what="total"):
+    if total > MAX_MINOR:
+        raise TotalOutOfRange(f"{what} exceeds the int64 range ({MAX_MINOR})")
+    return total
+
+def add_total(total, values, what="total"):
+    """
+    total + sum(values), exact, for non-negative ints: a sequence or an
+    int64 array. Raises TotalOutOfRange past MAX_MINOR instead of
+    wrapping.
+    """
+    if hasattr(values, "dtype"):
+        # The float estimate is far closer than this margin, so below it
+        # the int64 sum cannot wrap; above it, sum exactly
+        if total + float(values.sum(dtype="float64")) < MAX_MINOR / 2:
+            return total + int(values.sum())
+        values = values.tolist()
+    return check_total(total + sum(values), what)
+
+# ============================================================
+# OUTPUT
+# ============================================================
+def format_minor(value):
+    """
+    int minor units -> exact decimal string, e.g. 239546700 -> "2395467.00".
+    """
+    value = int(value)
+    sign = "-" if value < 0 else ""
+    whole, frac = divmod(abs(value), MINOR_UNITS)
+    if not MINOR_DIGITS:
+        return f"{sign}{whole}"
+    return f"{sign}{whole}.{frac:0{MINOR_DIGITS}d}"
+
+def to_major(value):
+    """
+    Minor units -> major units as float (scalars or NumPy / pandas
+    columns), for charts and JSON; exact up to 2**53 minor units.
+    """
+    return value / MINOR_UNITS
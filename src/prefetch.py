@@ -0,0 +1,224 @@
+import io
+import os
+import queue
+import threading
+import importlib
+
+# ============================================================
+# SETTINGS
+# ============================================================
+# Bytes per read; also the buffer size of the stream handed to parsers
+READ_BUFFER_BYTES = 1024 * 1024
+
+# Blocks the reader may get ahead of the parser (memory ~ depth x buffer)
+PREFETCH_DEPTH = 8
+
+# Compressed inputs (stdlib codecs), decoded block by block as they are
+# read: no temp files, and on the reader thread, so decompression
+# overlaps parsing (zlib / bz2 / lzma release the GIL while they work)
+CODECS = {".gz": "gzip", ".bz2": "bz2", ".xz": "lzma"}
+
+# Inbox file names the pipeline accepts
+INPUT_SUFFIXES = (".csv",) + tuple(".csv" + ext for ext in CODECS)
+
+_EOF = object()
+
+def _ends_file(payload):
+    # A file's items end with _EOF, or with the error that cut it short
+    return payload is _EOF or isinstance(payload, BaseException)
+
+class CorruptInput(ValueError):
+    """
+    A compressed file could not be decoded (corrupt or truncated).
+    """
+
+def is_compressed(path):
+    return path.endswith(tuple(CODECS))
+
+def open_input(path):
+    """
+    Binary stream of the CSV bytes in `path`, decompressed incrementally
+    for .gz / .bz2 / .xz files.
+    """
+    for ext, module in CODECS.items():
+        if path.endswith(ext):
+            return importlib.import_module(module).open(path, "rb")
+    return open(path, "rb", buffering=0)
+
+# ============================================================
+# STREAM
+# ============================================================
+class _BlockStream(io.RawIOBase):
+    """
+    One file's bytes, pulled block by block from the pipeline queue.
+    Closing it early tells the reader to skip the rest of the file.
+    """
+
+    def __init__(self, pipeline, index, first):
+        super().__init__()
+        self._pipeline = pipeline
+        self._index = index
+        self._block = memoryview(b"")
+        self._eof = False
+        self._error = None
+        self._take(first)
+
+    def _take(self, payload):
+        if payload is _EOF:
+            self._eof = True
+        elif isinstance(payload, BaseException):
+            # Raised on first read, like open() failing inside the engine
+            self._eof = True
+            self._error = payload
+        else:
+            self._block = memoryview(payload)
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not len(self._block):
+            # Checked each time round: an error may follow blocks already read
+            if self._error is not None:
+                raise self._error
+            if self._eof:
+                return 0
+            self._take(self._pipeline._next(self._index))
+        n = min(len(b), len(self._block))
+        b[:n] = self._block[:n]
+        self._block = self._block[n:]
+        return n
+
+    def close(self):
+        if not self.closed and not self._eof:
+            self._pipeline._skip = self._index
+            while not _ends_file(self._pipeline._next(self._index)):
+                pass
+            self._eof = True
+        super().close()
+
+# ============================================================
+# PIPELINE
+# ============================================================
+class Prefetcher:
+    """
+    Read files ahead of the parser on a background thread.
+
+    Files are read in order, block by block, into one bounded queue, so
+    while file i is parsed the reader is already fetching file i + 1.
+    Compressed files are decompressed here, ahead of the parser.
+    Iterating yields (path, binary stream) per file.
+
+    stop_event: when set, iteration ends after the file in hand; the
+                reader stops and whatever it fetched ahead is dropped.
+    """
+
+    def __init__(self, paths, depth=PREFETCH_DEPTH, buffer_bytes=READ_BUFFER_BYTES,
+                 stop_event=None):
+        self.paths = list(paths)
+        self.buffer_bytes = buffer_bytes
+        self._queue = queue.Queue(maxsize=max(depth, 1))
+        self._stop = stop_event if stop_event is not None else threading.Event()
+        self._closed = threading.Event()
+        self._skip = -1
+        self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------
+    # Reader thread
+    # ------------------------------------------------------------
+    def _put(self, item):
+        while not self._closed.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _read(self, f, path):
+        try:
+            return f.read(self.buffer_bytes)
+        except Exception as e:
+            if not is_compressed(path):
+                raise
+            # Each codec has its own error types (EOFError, zlib.error, ...)
+            raise CorruptInput(f"{os.path.basename(path)}: {e}") from e
+
+    def _run(self):
+        for i, path in enumerate(self.paths):
+            if self._stop.is_set():
+                break
+            end = _EOF
+            try:
+                with open_input(path) as f:
+                    while self._skip != i:
+                        block = self._read(f, path)
+                        if not block:
+                            break
+                        if not self._put((i, block)):
+                            return
+            except (OSError, CorruptInput) as e:
+                end = e  # in place of _EOF: nothing else follows for this file
+            if not self._put((i, end)):
+                return
+        self._put((None, _EOF))
+
+    # ------------------------------------------------------------
+    # Consumer side
+    # ------------------------------------------------------------
+    def _get(self):
+        while True:
+            try:
+                return self._queue.get(timeout=0.1)
+            except queue.Empty:
+                # Nothing more can arrive once closed or the reader has exited
+                if self._closed.is_set() or not self._thread.is_alive():
+                    return None, _EOF
+
+    def _get_for(self, index):
+        """
+        Next (i, payload) for file `index`; (None, _EOF) once nothing more
+        can arrive. Leftovers of files already handed out are dropped.
+        """
+        while True:
+            i, payload = self._get()
+            if i is None or i == index:
+                return i, payload
+            if i > index:
+                raise RuntimeError(f"prefetch out of order: got {i}, expected {index}")
+
+    def _next(self, index):
+        return self._get_for(index)[1]
+
+    def __iter__(self):
+        self._thread.start()
+        for index, path in enumerate(self.paths):
+            if self._stop.is_set():
+                return
+            i, first = self._get_for(index)
+            if i is None:
+                return  # stopped before this file
+            raw = _BlockStream(self, index, first)
+            try:
+                yield path, io.BufferedReader(raw, self.buffer_bytes)
+            finally:
+                raw.close()
+
+    def close(self):
+        """
+        Stop the reader and release anything it queued.
+        """
+        self._closed.set()
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        if self._thread.is_alive():
+            self._thread.join()
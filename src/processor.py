@@ -1,11 +1,22 @@
 import os
+import io
 import csv
+import time
 import logging
-from collections import defaultdict
+from itertools import islice
+from collections import Counter
 
-from .validators import validate_row, normalize_row
-from .reports import write_reports
+from .validators import check_values, compile_schema, SchemaError, CSV_ENCODING
+from .reports import write_reports, TIMING_STAGES
 from .context import RUN_ID
+from .ingest_index import IngestIndex
+from .claims import Claims, LeaseLost, reclaim_expired
+from .prefetch import (
+    Prefetcher, CorruptInput, PREFETCH_DEPTH, READ_BUFFER_BYTES, INPUT_SUFFIXES, is_compressed,
+)
+from .readers import READERS, DEFAULT_READER
+from .money import format_minor, add_total, check_total, TotalOutOfRange
+from . import metrics
 
 # ============================================================
 # PATHS
@@ -15,88 +26,662 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_IN = os.path.join(BASE_DIR, "data", "in")
 DATA_OUT = os.path.join(BASE_DIR, "data", "out")
 DATA_ERR = os.path.join(BASE_DIR, "data", "err")
+DATA_DUP = os.path.join(BASE_DIR, "data", "dup")
 
-os.makedirs(DATA_OUT, exist_ok=True)
-os.makedirs(DATA_ERR, exist_ok=True)
+# Content hashes of files already ingested (see ingest_index.py)
+INDEX_FILE = os.path.join(BASE_DIR, "data", "ingested.jsonl")
+
+# Per-worker directories of claimed, in-progress files (see claims.py)
+CLAIM_DIR = os.path.join(BASE_DIR, "data", "claimed")
 
 ERROR_THRESHOLD = 5
 
+# Streaming mode: columnar engine reads this many rows per chunk
+CHUNK_ROWS = 50_000
+
+# Row engine reads / validates / aggregates in batches of this many rows,
+# so stage timers cost a few clock reads per batch, not per row
+ROW_BATCH = 10_000
+
+# Rows per batch on the mmap fast path (readers.py)
+MMAP_BATCH_ROWS = 100_000
+
+# Per-run timing breakdown (seconds), in pipeline order
+STAGES = TIMING_STAGES
+
+# Row engine is the reference implementation; columnar loads each file
+# into pandas/NumPy columns and validates / aggregates whole columns.
+ENGINES = ("row", "columnar")
+DEFAULT_ENGINE = "row"
+
+# Files are processed in a process pool when workers > 1
+DEFAULT_WORKERS = 1
+
+_pool = None
+_pool_workers = 0
+
+_index = None
+_claims = None
+
+# NumPy, pandas and the process pool are imported on first use, so the
+# CLI and GUI start without them (see tests/test_import_time.py)
+
+def init_dirs():
+    """
+    Create the data directories. An explicit step, run at the start of
+    every run rather than at import time.
+    """
+    for d in (DATA_IN, DATA_OUT, DATA_ERR, DATA_DUP, CLAIM_DIR):
+        os.makedirs(d, exist_ok=True)
+
 # ============================================================
-# CORE PROCESSOR
+# STATS
 # ============================================================
-def process_all_files():
+def _new_stats(approx=False):
+    """
+    approx: bounded-memory stats (see sketches.py), per file and per run.
+            by_product is a HeavyHitters summary and by_product_date a
+            DistinctProducts sketch (distinct products per date) instead
+            of the exact cube; both accumulate like KeyedTotals.
+    """
+    from .totals import KeyedTotals
+
     stats = {
         "files": 0,
         "rows": 0,
         "valid": 0,
         "invalid": 0,
         "quantity": 0,
-        "revenue": 0,
-        "by_product": defaultdict(lambda: {"qty": 0, "rev": 0}),
-        "by_date": defaultdict(lambda: {"qty": 0, "rev": 0}),
+        "revenue": 0,  # int minor units, like every money total (money.py)
+        "by_product": KeyedTotals(),
+        "by_date": KeyedTotals(),
+        # (product, date) cube; report_store rolls it up by week / month
+        "by_product_date": KeyedTotals(),
+        "bytes": 0,
+        "errors_by_reason": Counter(),
+        "timings": dict.fromkeys(STAGES, 0.0),
     }
+    if approx:
+        from .sketches import HeavyHitters, DistinctProducts
+        stats["approx"] = True
+        stats["by_product"] = HeavyHitters()
+        stats["by_product_date"] = DistinctProducts()
+    return stats
 
-    files = [f for f in os.listdir(DATA_IN) if f.endswith(".csv")]
-    if not files:
-        return {"processed": 0}
+def _merge_cost(stats, partial):
+    """
+    Bytes read and stage time are spent even when a file's rows are
+    discarded, so they are merged for every file.
+    """
+    stats["bytes"] += partial["bytes"]
+    for stage, seconds in partial["timings"].items():
+        stats["timings"][stage] += seconds
 
-    for filename in files:
-        stats["files"] += 1
-        filepath = os.path.join(DATA_IN, filename)
-        error_count = 0
+def _merge_error(stats, partial):
+    """
+    Why `partial` cannot be merged into the run stats, or None: run
+    totals, and with them every per-key total, must stay within int64.
+    """
+    try:
+        for key in ("quantity", "revenue"):
+            check_total(stats[key] + partial[key], f"run {key} total")
+    except TotalOutOfRange as e:
+        return str(e)
+    return None
 
-        logging.info(f"Processing file: {filename}")
+def _merge_stats(stats, partial):
+    """
+    Fold a per-file partial into the run stats (see _merge_error).
+    """
+    for key in ("files", "rows", "valid", "invalid", "quantity", "revenue"):
+        stats[key] += partial[key]
 
-        with open(filepath, newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
+    stats["errors_by_reason"].update(partial["errors_by_reason"])
 
-            for raw_row in reader:
-                stats["rows"] += 1
+    for field in ("by_product", "by_date", "by_product_date"):
+        stats[field].merge(partial[field])
+
+# ============================================================
+# ENGINES
+# ============================================================
+# Engines share the signature (source, stats, abort_after) -> error_count,
+# where source is a path or an open binary stream (see prefetch.py).
+# When abort_after is set, an engine stops reading as soon as the file's
+# error count exceeds it and marks stats["aborted"].
+
+def _open_text(source):
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, newline="", encoding=CSV_ENCODING)
+    return io.TextIOWrapper(source, newline="", encoding=CSV_ENCODING)
+
+def _process_file_rows(source, stats, abort_after=None):
+    error_count = 0
+    timings = stats["timings"]
+    reasons = stats["errors_by_reason"]
+
+    with _open_text(source) as f:
+        reader = csv.reader(f)
+
+        # Header is compiled once; rows stay plain lists
+        plan = compile_schema(next(reader, []))
+        extract = plan.extract
 
-                # Normalize headers (CRITICAL FIX)
-                row = normalize_row(raw_row)
+        while True:
+            t0 = time.perf_counter()
+            batch = list(islice(reader, ROW_BATCH))
+            t1 = time.perf_counter()
+            timings["read"] += t1 - t0
+            if not batch:
+                break
 
-                if not validate_row(row):
+            # ---- Validate ----
+            valid_rows = []
+            for raw_row in batch:
+                if not raw_row:
+                    continue  # blank line (skipped by DictReader too)
+                stats["rows"] += 1
+
+                date, product, quantity, price = extract(raw_row)
+                is_valid, reason, qty, price = check_values(date, product, quantity, price)
+                if not is_valid:
                     stats["invalid"] += 1
+                    reasons[reason] += 1
                     error_count += 1
+                    if abort_after is not None and error_count > abort_after:
+                        stats["aborted"] = True
+                        break
                     continue
 
-                stats["valid"] += 1
+                valid_rows.append((date, product, qty, qty * price))
+            t2 = time.perf_counter()
+            timings["validate"] += t2 - t1
+
+            # ---- Aggregations ----
+            if valid_rows:
+                dates, products, qtys, revenues = zip(*valid_rows)
+                stats["quantity"] = add_total(stats["quantity"], qtys, "quantity total")
+                # Integer minor units: exact in any order, no cumsum needed
+                stats["revenue"] = add_total(stats["revenue"], revenues, "revenue total")
+                stats["by_product"].add(products, qtys, revenues)
+                stats["by_date"].add(dates, qtys, revenues)
+                stats["by_product_date"].add(list(zip(products, dates)), qtys, revenues)
+            stats["valid"] += len(valid_rows)
+            timings["aggregate"] += time.perf_counter() - t2
+
+            if stats.get("aborted"):
+                break
+
+    return error_count
+
+def _process_file_mmap(filepath, stats, abort_after=None):
+    """
+    Row engine over the mmap reader: fields are split on byte offsets
+    and validated once per distinct value; money totals are int64 minor
+    units, so results equal _process_file_rows exactly.
+    Files outside the canonical layout go to _process_file_rows.
+    """
+    import numpy as np
+    from .readers import FastPathUnavailable, iter_mmap_columns
+    from .columnar import validate_columns, product_date_keys
+
+    timings = stats["timings"]
+    batches = iter_mmap_columns(filepath, MMAP_BATCH_ROWS)
+    t0 = time.perf_counter()
+    try:
+        columns = next(batches, None)
+    except FastPathUnavailable as e:
+        logging.debug(f"mmap reader unavailable for {os.path.basename(filepath)}: {e}")
+        stats["reader"] = "csv"
+        return _process_file_rows(filepath, stats, abort_after)
+    stats["reader"] = "mmap"
+
+    error_count = 0
+    try:
+        while columns is not None:
+            t1 = time.perf_counter()
+            timings["read"] += t1 - t0
+
+            # ---- Validate ----
+            valid, qty, price, reasons, keys = validate_columns(columns)
+            invalid = ~valid
+            if abort_after is not None:
+                # Stop on the row that passes the threshold, like the row loop
+                over = np.flatnonzero(np.cumsum(invalid) + error_count > abort_after)
+                if len(over):
+                    cut = over[0] + 1
+                    valid, invalid, qty, price, reasons = (
+                        a[:cut] for a in (valid, invalid, qty, price, reasons)
+                    )
+                    keys = {k: (codes[:cut], u) for k, (codes, u) in keys.items()}
+                    stats["aborted"] = True
+
+            n, n_invalid = len(valid), int(invalid.sum())
+            stats["rows"] += n
+            stats["valid"] += n - n_invalid
+            stats["invalid"] += n_invalid
+            error_count += n_invalid
+            if n_invalid:
+                codes, counts = np.unique(reasons[invalid], return_counts=True)
+                stats["errors_by_reason"].update(dict(zip(codes.tolist(), counts.tolist())))
+            t2 = time.perf_counter()
+            timings["validate"] += t2 - t1
+
+            # ---- Aggregations ----
+            if n_invalid < n:
+                qty = qty[valid]
+                revenue = qty * price[valid]
+                stats["quantity"] = add_total(stats["quantity"], qty, "quantity total")
+                stats["revenue"] = add_total(stats["revenue"], revenue, "revenue total")
+                for field, column in (("by_product", "product"), ("by_date", "date")):
+                    codes, uniques = keys[column]
+                    stats[field].add_coded(uniques, codes[valid], qty, revenue)
+                codes, uniques = product_date_keys(keys, valid)
+                stats["by_product_date"].add_coded(uniques, codes, qty, revenue)
+            timings["aggregate"] += time.perf_counter() - t2
 
-                qty = int(row["quantity"])
-                price = float(row["price"])
-                revenue = qty * price
+            if stats.get("aborted"):
+                break
+            t0 = time.perf_counter()
+            columns = next(batches, None)
+    finally:
+        batches.close()
+    return error_count
 
-                stats["quantity"] += qty
-                stats["revenue"] += revenue
+def _process_file_columnar(source, stats, abort_after=None):
+    # pandas is only imported when the columnar engine is selected
+    from .columnar import process_file_columnar, process_file_chunked
 
-                # ---- Aggregations ----
-                stats["by_product"][row["product"]]["qty"] += qty
-                stats["by_product"][row["product"]]["rev"] += revenue
+    if abort_after is None:
+        return process_file_columnar(source, stats)
+    return process_file_chunked(source, stats, CHUNK_ROWS, abort_after)
 
-                stats["by_date"][row["date"]]["qty"] += qty
-                stats["by_date"][row["date"]]["rev"] += revenue
+_ENGINE_FUNCS = {
+    "row": _process_file_rows,
+    "columnar": _process_file_columnar,
+}
+
+def process_file(filepath, engine=DEFAULT_ENGINE, stream=False, source=None,
+                 reader=DEFAULT_READER, approx=False):
+    """
+    Process a single CSV (plain or .gz / .bz2 / .xz) without moving it.
+
+    stream: read in bounded chunks and stop as soon as the error count
+            passes ERROR_THRESHOLD (partial["aborted"] is then set)
+    source: open binary stream with the file's (decompressed) bytes;
+            default: open filepath, decompressing on a reader thread
+    reader: row engine input backend, "csv" or "mmap" (see readers.py);
+            mmap needs the plain file itself, so it is ignored with a
+            source or a compressed file
+    approx: fixed-size product summaries instead of exact totals
+            (see _new_stats)
+
+    A header without the required columns, a corrupt archive, text that
+    is not UTF-8, or totals beyond the int64 range (money.MAX_MINOR) set
+    partial["rejected"].
+
+    Returns:
+        (partial stats, error_count)
+    """
+    if engine not in _ENGINE_FUNCS:
+        raise ValueError(f"Unknown engine: {engine!r} (expected one of {ENGINES})")
+    if reader not in READERS:
+        raise ValueError(f"Unknown reader: {reader!r} (expected one of {READERS})")
+
+    if source is None and is_compressed(filepath):
+        # Decoded on the Prefetcher thread while this one parses
+        with Prefetcher([filepath]) as pipeline:
+            for _, decoded in pipeline:
+                result = process_file(filepath, engine, stream, decoded, reader, approx)
+        return result
+
+    run = _ENGINE_FUNCS[engine]
+    if engine == "row" and reader == "mmap" and source is None:
+        run = _process_file_mmap
+
+    start = time.perf_counter()
+    partial = _new_stats(approx)
+    partial["files"] = 1
+    abort_after = ERROR_THRESHOLD if stream else None
+    try:
+        error_count = run(filepath if source is None else source, partial, abort_after)
+    except (SchemaError, CorruptInput, TotalOutOfRange, UnicodeDecodeError) as e:
+        # Routed to ERR by the caller; rows read before a decode error are dropped
+        partial = _new_stats(approx)
+        partial["files"] = 1
+        partial["rejected"] = str(e)
+        error_count = 0
+    partial["bytes"] = os.path.getsize(filepath)
+    partial["seconds"] = time.perf_counter() - start
+    return partial, error_count
+
+# ============================================================
+# WORKER POOL
+# ============================================================
+def _get_pool(workers):
+    """
+    Reuse one process pool across runs; rebuild it if the size changes.
+    """
+    global _pool, _pool_workers
+    from concurrent.futures import ProcessPoolExecutor
+
+    if _pool is None or _pool_workers != workers:
+        shutdown_pool()
+        _pool = ProcessPoolExecutor(max_workers=workers)
+        _pool_workers = workers
+    return _pool
+
+def shutdown_pool():
+    global _pool, _pool_workers
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+    _pool = None
+    _pool_workers = 0
+
+def _iter_partials(paths, engine, workers, stream, prefetch=PREFETCH_DEPTH,
+                   read_buffer=READ_BUFFER_BYTES, stop_event=None, reader=DEFAULT_READER,
+                   approx=False):
+    """
+    Yield (partial, error_count) per path, in input order.
+
+    Serial runs read ahead through a Prefetcher (prefetch = queue depth
+    in blocks of read_buffer bytes; 0 reads each file inline). Parallel
+    runs read in the workers. The mmap reader maps files itself and is
+    never prefetched (compressed files still decode on their own
+    reader thread, see process_file).
+
+    Results are consumed in submission order, so merging is identical
+    to the serial path regardless of which worker finishes first.
+
+    Once stop_event is set no further file is started; the caller
+    sees a shorter sequence and leaves the rest in the inbox.
+    """
+    def stopped():
+        return stop_event is not None and stop_event.is_set()
+
+    if workers <= 1 or len(paths) <= 1:
+        if prefetch and not (engine == "row" and reader == "mmap"):
+            with Prefetcher(paths, prefetch, read_buffer, stop_event) as pipeline:
+                for path, source in pipeline:
+                    logging.info(f"Processing file: {os.path.basename(path)}")
+                    yield process_file(path, engine, stream, source, approx=approx)
+            return
+        for path in paths:
+            if stopped():
+                return
+            logging.info(f"Processing file: {os.path.basename(path)}")
+            yield process_file(path, engine, stream, reader=reader, approx=approx)
+        return
+
+    pool = _get_pool(workers)
+    futures = []
+    for path in paths:
+        logging.info(f"Processing file: {os.path.basename(path)}")
+        futures.append(pool.submit(process_file, path, engine, stream, None, reader, approx))
+    for i, future in enumerate(futures):
+        if stopped():
+            for pending in futures[i:]:
+                pending.cancel()
+            return
+        yield future.result()
+
+# ============================================================
+# CLAIMS
+# ============================================================
+def _get_claims():
+    """
+    This process's claim directory under CLAIM_DIR.
+    """
+    global _claims
+    if _claims is None or _claims.root != CLAIM_DIR:
+        _claims = Claims(CLAIM_DIR)
+    return _claims
+
+def reclaim_expired_claims():
+    """
+    Return files held by workers whose lease expired to the inbox.
+    """
+    return reclaim_expired(CLAIM_DIR, DATA_IN, own=_get_claims().worker_id)
+
+# ============================================================
+# DUPLICATES
+# ============================================================
+def _get_index():
+    """
+    One ingest index per INDEX_FILE, loaded on first use.
+    """
+    global _index
+    if _index is None or _index.path != INDEX_FILE:
+        _index = IngestIndex(INDEX_FILE)
+    return _index
+
+def _skip_duplicates(paths, index, claims):
+    """
+    Move files already ingested (same content) to DATA_DUP unparsed.
+
+    Returns:
+        (paths to process, their index entries, number of duplicates)
+    """
+    keep, entries = [], []
+    duplicates = 0
+    seen = {}  # hash -> name, for copies delivered in the same batch
+    for path in paths:
+        name = os.path.basename(path)
+        try:
+            entry, earlier = index.check(path)
+        except FileNotFoundError:
+            continue  # reclaimed by another worker
+        original = earlier["name"] if earlier else seen.get(entry["hash"])
+        if original is None:
+            seen[entry["hash"]] = name
+            keep.append(path)
+            entries.append(entry)
+            continue
+
+        try:
+            claims.move(path, os.path.join(DATA_DUP, name))
+        except LeaseLost:
+            continue
+        duplicates += 1
+        metrics.FILES.inc(result="duplicate")
+        logging.warning(f"Duplicate of {original}: moved {name} to DUP unparsed")
+
+    return keep, entries, duplicates
+
+# ============================================================
+# METRICS
+# ============================================================
+def _record_file_metrics(partial, result):
+    metrics.FILES.inc(result=result)
+    if "reader" in partial:
+        metrics.FILES_READ.inc(reader=partial["reader"])
+    metrics.FILE_SECONDS.observe(partial["seconds"])
+    metrics.BYTES_READ.inc(partial["bytes"])
+    metrics.ROWS.inc(partial["valid"], status="valid")
+    metrics.ROWS.inc(partial["invalid"], status="invalid")
+    for reason, count in partial["errors_by_reason"].items():
+        metrics.ROW_ERRORS.inc(count, reason=reason)
+    for stage in ("read", "validate", "aggregate"):
+        metrics.STAGE_SECONDS.inc(partial["timings"][stage], stage=stage)
+
+def _record_run_metrics(stats, elapsed):
+    for stage in ("move", "write_reports"):
+        metrics.STAGE_SECONDS.inc(stats["timings"][stage], stage=stage)
+    metrics.RUNS.inc()
+    if elapsed > 0:
+        metrics.LAST_RUN_ROWS_PER_SEC.set(stats["rows"] / elapsed)
+    try:
+        backlog = sum(1 for f in os.listdir(DATA_IN) if f.endswith(INPUT_SUFFIXES))
+    except FileNotFoundError:
+        backlog = 0
+    metrics.INBOX_BACKLOG.set(backlog)
+
+# ============================================================
+# CORE PROCESSOR
+# ============================================================
+def _run_claimed(stats, pending, claims, index, engine, workers, stream,
+                 prefetch, read_buffer, stop_event, reader, approx):
+    """
+    Process claimed files into stats and move each out of the claim
+    directory. Files are removed from `pending` once moved; a file
+    reclaimed by another worker meanwhile (LeaseLost) contributes
+    nothing, so no file is ever counted twice.
+
+    Returns:
+        number of duplicates moved aside
+    """
+    paths, entries, duplicates = _skip_duplicates(list(pending), index, claims)
+    pending[:] = paths
+    if not paths:
+        return duplicates
+
+    files = [os.path.basename(p) for p in paths]
+    partials = _iter_partials(
+        paths, engine, workers, stream, prefetch, read_buffer, stop_event, reader, approx
+    )
+
+    for filename, filepath, entry, (partial, error_count) in zip(files, paths, entries, partials):
+        rejected = partial.get("rejected")
+        if not rejected and not partial.get("aborted"):
+            rejected = _merge_error(stats, partial)
 
         # ---- Move file based on error threshold ----
-        target_dir = DATA_ERR if error_count > ERROR_THRESHOLD else DATA_OUT
-        os.rename(filepath, os.path.join(target_dir, filename))
+        t0 = time.perf_counter()
+        failed = rejected or error_count > ERROR_THRESHOLD
+        target_dir = DATA_ERR if failed else DATA_OUT
+        pending.remove(filepath)
+        try:
+            claims.move(filepath, os.path.join(target_dir, filename))
+        except LeaseLost:
+            metrics.FILES.inc(result="lease_lost")
+            logging.warning(f"Lease lost on {filename}: reclaimed by another worker, results discarded")
+            continue
+        index.add(entry)
+        stats["timings"]["move"] += time.perf_counter() - t0
+
+        if rejected:
+            stats["files"] += 1
+            logging.error(f"Rejected {filename}: {rejected}")
+        elif partial.get("aborted"):
+            # Certain to land in ERR: discard its contributions
+            stats["files"] += 1
+            logging.warning(
+                f"Aborted {filename} after {error_count} errors; "
+                f"partial results discarded"
+            )
+        else:
+            _merge_stats(stats, partial)
+        _merge_cost(stats, partial)
+
+        if rejected:
+            result = "rejected"
+        elif partial.get("aborted"):
+            result = "aborted"
+        else:
+            result = "err" if failed else "out"
+        _record_file_metrics(partial, result)
 
         logging.info(
             f"File done | {filename} | "
             f"errors={error_count}"
         )
+    return duplicates
+
+def process_all_files(engine=DEFAULT_ENGINE, workers=DEFAULT_WORKERS, stream=False,
+                      files=None, prefetch=PREFETCH_DEPTH, read_buffer=READ_BUFFER_BYTES,
+                      stop_event=None, reader=DEFAULT_READER, approx=False):
+    """
+    Process every CSV in DATA_IN (or just `files`), move each to
+    OUT/ERR and append the run to the reports. Inputs may be
+    .csv.gz / .csv.bz2 / .csv.xz (see prefetch.INPUT_SUFFIXES); they
+    are decompressed as they stream into the parser.
+
+    engine:  "row" or "columnar"
+    reader:  row engine input, "csv" or "mmap" (fast path with csv fallback)
+    workers: process count; > 1 parses files in parallel and merges
+             per-file partial aggregates in the parent
+    stream:  bounded-memory chunked reads; a file is abandoned as soon
+             as it passes ERROR_THRESHOLD and contributes nothing to
+             the run stats
+    files:   explicit paths to process (e.g. from the inbox watcher);
+             missing ones are skipped
+    prefetch, read_buffer:
+             read-ahead queue depth (blocks) and block size in bytes
+             for serial runs; prefetch=0 disables read-ahead
+    stop_event:
+             when set, the file in hand is finished and the rest stay
+             in the inbox for the next run
+    approx:  fixed-memory top products and distinct counts instead of
+             exact per-product totals (see sketches.py). The estimates
+             only go to the sketch file; the run is recorded as approx
+             and kept out of the exact cumulative reports
+
+    Files whose content was already ingested are moved to DATA_DUP
+    without being parsed. Each file is first claimed into this worker's
+    directory under CLAIM_DIR, so any number of processes (or hosts
+    sharing the data directory) can serve one inbox.
+    """
+    run_start = time.perf_counter()
+    init_dirs()
+    claims = _get_claims()
+    reclaim_expired_claims()
+
+    if files is None:
+        paths = [
+            os.path.join(DATA_IN, f)
+            for f in os.listdir(DATA_IN) if f.endswith(INPUT_SUFFIXES)
+        ]
+    else:
+        paths = [p for p in files if os.path.exists(p)]
+    if not paths:
+        # Idle run: return before anything heavy is loaded
+        metrics.INBOX_BACKLOG.set(0)
+        return {"processed": 0, "duplicates": 0}
+
+    stats = _new_stats(approx)
+    index = _get_index()
+    index.refresh()  # entries other workers recorded since the last run
+
+    with claims:
+        # Claimed files live in this worker's directory until moved out;
+        # whatever is not processed goes back to the inbox
+        pending = claims.claim(paths)
+        try:
+            duplicates = _run_claimed(
+                stats, pending, claims, index, engine, workers, stream,
+                prefetch, read_buffer, stop_event, reader, approx,
+            )
+        finally:
+            claims.release(pending, DATA_IN)
+            index.flush()
+
+    if not stats["files"]:
+        # Nothing claimed, or stopped before the first file
+        if not pending:
+            metrics.INBOX_BACKLOG.set(0)
+        return {"processed": 0, "duplicates": duplicates}
 
     # ---- Write analytical reports ----
+    # (write_reports records its own time in stats["timings"])
     write_reports(RUN_ID, stats)
 
+    elapsed = time.perf_counter() - run_start
+    _record_run_metrics(stats, elapsed)
+
     logging.info(
         f"Run summary | files={stats['files']} rows={stats['rows']} "
         f"valid={stats['valid']} invalid={stats['invalid']} "
-        f"qty={stats['quantity']} revenue={stats['revenue']}"
+        f"qty={stats['quantity']} revenue={format_minor(stats['revenue'])}"
+    )
+    logging.info(
+        "Run timings | "
+        + " ".join(f"{k}={v:.3f}s" for k, v in stats["timings"].items())
+        + f" | {stats['rows'] / elapsed if elapsed else 0:,.0f} rows/s "
+        f"bytes={stats['bytes']}"
     )
 
     return {
         "processed": stats["files"],
         "out": stats["files"],
-        "err": stats["invalid"]
+        "err": stats["invalid"],
+        "duplicates": duplicates,
     }
@@ -0,0 +1,144 @@
+import os
+import time
+import logging
+
+from .context import RUN_ID
+
+# ============================================================
+# SETTINGS
+# ============================================================
+# Profiles are written to <report dir>/profiles/:
+#
+#   <RUN_ID>-<n>.prof   raw cProfile stats (pstats, snakeviz, ...)
+#   <RUN_ID>-<n>.txt    functions sorted by cumulative and own time,
+#                       then the top allocation sites (tracemalloc)
+#
+# n counts the session's processing runs, so sampled profiles of one
+# session sort in run order.
+PROFILE_DIR_NAME = "profiles"
+
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 25
+
+# Frames stored per traced allocation; deeper tracebacks cost more
+TRACE_FRAMES = 1
+
+def profile_dir(report_dir):
+    return os.path.join(report_dir, PROFILE_DIR_NAME)
+
+def _is_idle(result):
+    return isinstance(result, dict) and not result.get("processed")
+
+# ============================================================
+# PROFILER
+# ============================================================
+class RunProfiler:
+    """
+    Profile sampled processing runs with cProfile and tracemalloc.
+
+    every:      profile the 1st, (1 + every)th, (1 + 2 * every)th ... run
+    limit:      stop after this many profiles (None: no limit)
+    report_dir: where profiles/ goes (default: reports.REPORT_DIR)
+
+    Unsampled runs only pay for a counter, so a large `every` can stay
+    on in production. Runs that processed nothing are not counted and
+    leave no profile. Only this process is profiled: with workers > 1
+    parsing happens in the pool and shows up as waiting on results.
+    """
+
+    def __init__(self, every=1, limit=None, report_dir=None):
+        if every < 1:
+            raise ValueError("every must be at least 1")
+        self.every = every
+        self.limit = limit
+        self.report_dir = report_dir
+        self.runs = 0
+        self.written = []
+
+    def _sampled(self):
+        if self.limit is not None and len(self.written) >= self.limit:
+            return False
+        return self.runs % self.every == 0
+
+    def run(self, fn, *args, **kwargs):
+        """
+        fn(*args, **kwargs), profiled when this run is sampled.
+        """
+        if not self._sampled():
+            result = fn(*args, **kwargs)
+            if not _is_idle(result):
+                self.runs += 1
+            return result
+
+        import cProfile
+        import tracemalloc
+
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start(TRACE_FRAMES)
+        tracemalloc.reset_peak()
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Another profiler (or debugger) owns the hook
+            logging.warning(f"cProfile unavailable, recording allocations only: {e}")
+            profile = None
+
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            if profile is not None:
+                profile.disable()
+            elapsed = time.perf_counter() - start
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            if not tracing:
+                tracemalloc.stop()
+
+        if _is_idle(result):
+            return result
+        self.runs += 1
+        self.written.append(self._write(profile, snapshot, peak, elapsed, result))
+        return result
+
+    # ------------------------------------------------------------
+    # Output
+    # ------------------------------------------------------------
+    def _write(self, profile, snapshot, peak, elapsed, result):
+        import pstats
+        import tracemalloc
+        from . import reports
+
+        directory = profile_dir(self.report_dir or reports.REPORT_DIR)
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, f"{RUN_ID}-{self.runs:04d}")
+
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write(f"RunID={RUN_ID} run={self.runs} wall={elapsed:.3f}s result={result}\n")
+            if profile is not None:
+                profile.dump_stats(base + ".prof")
+                for order in ("cumulative", "tottime"):
+                    f.write(f"\n==== Functions by {order} time ====\n")
+                    stats = pstats.Stats(profile, stream=f)
+                    stats.sort_stats(order).print_stats(TOP_FUNCTIONS)
+
+            f.write(
+                f"\n==== Top allocation sites (live at end of run) ====\n"
+                f"peak traced memory: {peak / 2**20:,.1f} MiB\n"
+            )
+            snapshot = snapshot.filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            ))
+            for i, stat in enumerate(snapshot.statistics("lineno")[:TOP_ALLOCATIONS], 1):
+                frame = stat.traceback[0]
+                f.write(
+                    f"{i:>3}. {frame.filename}:{frame.lineno} "
+                    f"size={stat.size / 1024:,.1f} KiB count={stat.count}\n"
+                )
+
+        logging.info(f"Profile written: {base}.txt")
+        return base + ".txt"
@@ -0,0 +1,260 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+
+from .validators import is_valid_date
+
+# ============================================================
+# SETTINGS
+# ============================================================
+DEFAULT_PORT = 9109
+
+# Report files are re-stat'ed at most this often, however many requests
+STAMP_CHECK_SECONDS = 1.0
+
+DEFAULT_TOP_N = 10
+MAX_TOP_N = 1000
+DEFAULT_RUNS = 20
+
+# ============================================================
+# CACHE
+# ============================================================
+class QueryCache:
+    """
+    Warm query results for one report directory.
+
+    Every result belongs to a generation: a digest of the report files'
+    (size, mtime) stamp, which only changes when a run is written. Within
+    a generation the aggregates are loaded once and each distinct query
+    is computed once; any number of clients then share the same bytes.
+    The generation is also the base of every ETag.
+    """
+
+    def __init__(self, report_dir, check_interval=STAMP_CHECK_SECONDS):
+        self.report_dir = report_dir
+        self.check_interval = check_interval
+        self.loads = 0  # aggregate (re)loads, for tests and diagnostics
+        # Re-entrant: result() computes under it and queries call frame()
+        self._lock = threading.RLock()
+        self._generation = None
+        self._checked = 0.0
+        self._frames = {}
+        self._results = {}
+
+    def _stamp(self):
+        from .analytics.plots import report_signature
+
+        try:
+            st = os.stat(os.path.join(self.report_dir, "summary.csv"))
+            summary = (st.st_size, st.st_mtime_ns)
+        except FileNotFoundError:
+            summary = None
+        return repr((report_signature(self.report_dir), summary)).encode()
+
+    def generation(self):
+        """
+        Current generation id; the files are checked at most once per interval.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._generation is None or now - self._checked >= self.check_interval:
+                self._checked = now
+                generation = hashlib.blake2b(self._stamp(), digest_size=8).hexdigest()
+                if generation != self._generation:
+                    self._generation = generation
+                    self._frames.clear()
+                    self._results.clear()
+            return self._generation
+
+    def etag(self, key, generation=None):
+        digest = hashlib.blake2b(repr(key).encode(), digest_size=6).hexdigest()
+        return f'"{generation or self.generation()}-{digest}"'
+
+    def frame(self, name, loader):
+        """
+        Loaded aggregate for this generation (one load per name).
+        """
+        with self._lock:
+            df = self._frames.get(name)
+            if df is None:
+                df = self._frames[name] = loader(self.report_dir)
+                self.loads += 1
+            return df
+
+    def result(self, key, compute):
+        """
+        (ETag, JSON body) for a query key, computed once per generation.
+        Concurrent first requests wait for the one computation.
+        """
+        with self._lock:
+            generation = self.generation()
+            body = self._results.get(key)
+            if body is None:
+                body = self._results[key] = json.dumps(compute()).encode("utf-8")
+            return self.etag(key, generation), body
+
+# ============================================================
+# QUERIES
+# ============================================================
+def top_products(cache, n, by):
+    from .analytics.plots import load_by_product
+
+    df = cache.frame("by_product", load_by_product)
+    if df.empty:
+        return []
+    column = "total_revenue" if by == "revenue" else "total_quantity"
+    top = df.nlargest(n, column, keep="first")
+    return [
+        {"product": p, "total_quantity": int(q), "total_revenue": float(r)}
+        for p, q, r in zip(top["product"], top["total_quantity"], top["total_revenue"])
+    ]
+
+def date_totals(cache, start, end):
+    from .analytics.plots import load_by_date
+    from .money import round_minor, to_major
+
+    df = cache.frame("by_date", load_by_date)
+    dates = []
+    if not df.empty:
+        # ISO dates compare correctly as strings
+        if start:
+            df = df[df["date"] >= start]
+        if end:
+            df = df[df["date"] <= end]
+        dates = [
+            {"date": d, "total_revenue": float(r)}
+            for d, r in zip(df["date"], df["total_revenue"])
+        ]
+    return {
+        "start": start,
+        "end": end,
+        # Summed in minor units so the total is exact
+        "total_revenue": to_major(sum(round_minor(d["total_revenue"]) for d in dates)),
+        "dates": dates,
+    }
+
+def run_summaries(cache, limit):
+    from .analytics.plots import load_runs
+
+    df = cache.frame("runs", load_runs)
+    rows = df.head(limit)
+    return [
+        {
+            "run_id": str(r.run_id),
+            "files": int(r.files),
+            "rows": int(r.rows),
+            "valid": int(r.valid),
+            "invalid": int(r.invalid),
+            "total_quantity": int(r.total_quantity),
+            "total_revenue": float(r.total_revenue),
+            "approx": bool(r.approx),
+        }
+        for r in rows.itertuples(index=False)
+    ]
+
+# ============================================================
+# HTTP
+# ============================================================
+def _int_arg(args, name, default, low, high):
+    value = args.get(name, default)
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer") from None
+    if not low <= value <= high:
+        raise ValueError(f"{name} must be between {low} and {high}")
+    return value
+
+def _date_arg(args, name):
+    value = args.get(name) or None
+    if value is not None and not is_valid_date(value):
+        raise ValueError(f"{name} must be a YYYY-MM-DD date")
+    return value
+
+def create_app(report_dir=None, check_interval=STAMP_CHECK_SECONDS):
+    """
+    Flask app serving JSON aggregates from report_dir:
+
+        /api/products/top?n=10&by=revenue|quantity
+        /api/dates?start=YYYY-MM-DD&end=YYYY-MM-DD
+        /api/runs?limit=20
+
+    Responses carry an ETag; a matching If-None-Match gets 304.
+    """
+    from flask import Flask, Response, request
+
+    if report_dir is None:
+        from . import reports
+        report_dir = reports.REPORT_DIR
+
+    app = Flask("sales-query")
+    cache = app.config["QUERY_CACHE"] = QueryCache(report_dir, check_interval)
+
+    def respond(key, compute):
+        # A matching ETag is answered before anything is computed
+        etag = cache.etag(key)
+        if etag in request.headers.get("If-None-Match", ""):
+            return Response(status=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+        etag, body = cache.result(key, compute)
+        return Response(body, mimetype="application/json",
+                        headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    def bad_request(error):
+        return Response(json.dumps({"error": str(error)}), status=400, mimetype="application/json")
+
+    @app.route("/api/products/top")
+    def products_top():
+        try:
+            n = _int_arg(request.args, "n", DEFAULT_TOP_N, 1, MAX_TOP_N)
+            by = request.args.get("by", "revenue")
+            if by not in ("revenue", "quantity"):
+                raise ValueError("by must be revenue or quantity")
+        except ValueError as e:
+            return bad_request(e)
+        return respond(("top", n, by), lambda: top_products(cache, n, by))
+
+    @app.route("/api/dates")
+    def dates():
+        try:
+            start = _date_arg(request.args, "start")
+            end = _date_arg(request.args, "end")
+        except ValueError as e:
+            return bad_request(e)
+        return respond(("dates", start, end), lambda: date_totals(cache, start, end))
+
+    @app.route("/api/runs")
+    def runs():
+        try:
+            limit = _int_arg(request.args, "limit", DEFAULT_RUNS, 1, 10_000)
+        except ValueError as e:
+            return bad_request(e)
+        return respond(("runs", limit), lambda: run_summaries(cache, limit))
+
+    return app
+
+_server = None
+
+def start_query_server(port=DEFAULT_PORT, host="127.0.0.1", report_dir=None):
+    """
+    Serve the query API from a daemon thread (local only by default).
+    """
+    global _server
+    if _server is not None:
+        return _server
+
+    from werkzeug.serving import make_server
+
+    _server = make_server(host, port, create_app(report_dir), threaded=True)
+    threading.Thread(target=_server.serve_forever, daemon=True).start()
+    logging.info(f"Query API on http://{host}:{_server.server_port}/api")
+    return _server
+
+def stop_query_server():
+    global _server
+    if _server is not None:
+        _server.shutdown()
+        _server.server_close()
+    _server = None
@@ -0,0 +1,244 @@
+import mmap
+
+# ============================================================
+# READERS
+# ============================================================
+# Input backends for the row engine:
+#   csv   csv.reader + SchemaPlan, any header / quoting (reference)
+#   mmap  memory-mapped fast path for the canonical generator layout;
+#         files it cannot take fall back to csv with identical results
+READERS = ("csv", "mmap")
+DEFAULT_READER = "csv"
+
+# The only header (byte for byte) the fast path accepts
+FAST_HEADER = b"date,product,qty,price"
+FAST_FIELDS = ("date", "product", "quantity", "price")
+
+# Fields are gathered into fixed-width arrays; wider ones fall back
+MAX_FIELD_BYTES = 64
+
+# The map is scanned one window of about this many bytes at a time
+# (ending on a line break), so byte masks and field offsets stay bounded
+# however large the file is
+WINDOW_BYTES = 4 << 20
+
+_NL, _CR, _COMMA = 10, 13, 44
+
+# Odd 64-bit multiplier (golden ratio) for combining words in _factorize
+_HASH_MULT = 0x9E3779B97F4A7C15
+
+# NumPy is imported inside the functions: the reader constants above are
+# read at startup by the CLI, which must not pay for NumPy
+
+
+class FastPathUnavailable(Exception):
+    """
+    File is not in the canonical layout; read it with the csv module.
+    """
+
+# ============================================================
+# LAYOUT
+# ============================================================
+def _data_start(mm):
+    """
+    Offset of the first byte after the header, which must be FAST_HEADER
+    on the file's first line.
+    """
+    nl = mm.find(b"\n")
+    end = len(mm) if nl < 0 else nl
+    if nl > 0 and mm[nl - 1] == _CR:
+        end -= 1
+    if end != len(FAST_HEADER) or mm[:end] != FAST_HEADER:
+        raise FastPathUnavailable("header is not " + FAST_HEADER.decode())
+    return len(mm) if nl < 0 else nl + 1
+
+def _windows(mm, start):
+    """
+    (lo, hi) byte ranges covering mm[start:], about WINDOW_BYTES each and
+    ending just after a line break (or at the end of the file).
+    """
+    size = len(mm)
+    lo = start
+    while lo < size:
+        hi = lo + WINDOW_BYTES
+        if hi >= size:
+            hi = size
+        else:
+            cut = mm.rfind(b"\n", lo, hi)
+            if cut < 0:
+                cut = mm.find(b"\n", hi)  # line longer than a window
+            hi = size if cut < 0 else cut + 1
+        yield lo, hi
+        lo = hi
+
+def _line_bounds(buf):
+    """
+    (starts, ends) of every non-blank line, ends exclusive of \\r\\n.
+    """
+    import numpy as np
+
+    nl = np.flatnonzero(buf == _NL)
+    ends = nl if len(buf) and buf[-1] == _NL else np.append(nl, len(buf))
+    starts = np.concatenate(([0], ends[:-1] + 1))
+
+    crlf = (ends > starts) & (buf[np.maximum(ends - 1, 0)] == _CR)
+    ends = ends - crlf
+
+    keep = ends > starts  # blank lines are skipped, as csv.reader does
+    return starts[keep], ends[keep], int(crlf.sum())
+
+def _window_fields(buf):
+    """
+    Raise FastPathUnavailable unless every byte-level assumption holds
+    for the whole lines in buf.
+
+    Returns:
+        ((field starts, field ends) per FAST_FIELDS), offsets into buf
+    """
+    import numpy as np
+
+    # Quoting, embedded NULs (fixed-width arrays strip them) and lone
+    # carriage returns all need the csv module's rules
+    if (buf == ord('"')).any() or (buf == 0).any():
+        raise FastPathUnavailable("quoting or NUL bytes")
+
+    starts, ends, crlf = _line_bounds(buf)
+    if crlf != int((buf == _CR).sum()):
+        raise FastPathUnavailable("bare carriage return")
+
+    commas = np.flatnonzero(buf == _COMMA)
+    first = np.searchsorted(commas, starts)
+    if not (np.searchsorted(commas, ends) - first == 3).all():
+        raise FastPathUnavailable("row without exactly four fields")
+    commas = commas[first[:, None] + np.arange(3)]
+
+    # Field boundaries: [line start, c0) [c0+1, c1) [c1+1, c2) [c2+1, line end)
+    bounds = (
+        (starts, commas[:, 0]),
+        (commas[:, 0] + 1, commas[:, 1]),
+        (commas[:, 1] + 1, commas[:, 2]),
+        (commas[:, 2] + 1, ends),
+    )
+    for field_start, field_end in bounds:
+        if len(field_start) and (field_end - field_start).max() > MAX_FIELD_BYTES:
+            raise FastPathUnavailable(f"field wider than {MAX_FIELD_BYTES} bytes")
+    return bounds
+
+# ============================================================
+# FIELDS
+# ============================================================
+def _gather(buf, starts, ends):
+    """
+    Field bytes as an (rows, width) uint8 matrix, zero padded; width is
+    rounded up to whole 8-byte words.
+    """
+    import numpy as np
+
+    lengths = ends - starts
+    width = max(int(lengths.max()) if len(lengths) else 0, 1)
+    width = -(-width // 8) * 8
+
+    cols = np.arange(width)
+    idx = starts[:, None] + cols
+    np.minimum(idx, len(buf) - 1, out=idx)
+    out = buf[idx]
+    out[cols >= lengths[:, None]] = 0
+    return out
+
+def _factorize(field):
+    """
+    (codes, object array of distinct str); only distinct values are decoded.
+
+    Rows are factorized on a uint64 hash of their 8-byte words, which
+    sorts far faster than byte strings. Single-word fields are their
+    own hash; wider ones are checked for collisions and re-done on the
+    bytes if any is found.
+    """
+    import numpy as np
+
+    mult = np.uint64(_HASH_MULT)
+    words = field.view(np.uint64)
+    key = words[:, 0].copy()
+    for j in range(1, words.shape[1]):
+        key *= mult
+        key ^= words[:, j]
+
+    _, first, codes = np.unique(key, return_index=True, return_inverse=True)
+    codes = codes.ravel()
+    if words.shape[1] > 1 and not (words[first][codes] == words).all():
+        strings = field.view(f"S{field.shape[1]}").ravel()
+        _, first, codes = np.unique(strings, return_index=True, return_inverse=True)
+        codes = codes.ravel()
+
+    raw = field[first].view(f"S{field.shape[1]}").ravel()
+    decoded = np.array([u.decode("utf-8") for u in raw.tolist()], dtype=object)
+    return codes, decoded
+
+def iter_mmap_columns(path, batch_rows):
+    """
+    Memory-map a canonical-layout CSV and yield batches of factorized
+    columns: {field: (codes, distinct strings)} for FAST_FIELDS.
+
+    The whole layout is checked, window by window, before the first
+    batch, so a FastPathUnavailable is always raised before anything is
+    yielded. Rows are never materialized as lists or strings, and
+    memory is bounded by WINDOW_BYTES and batch_rows, not the file.
+    """
+    with open(path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise FastPathUnavailable("empty file") from None
+
+    try:
+        yield from _iter_batches(mm, batch_rows)
+    finally:
+        try:
+            mm.close()
+        except BufferError:
+            # A propagating error's traceback still holds a view; the map
+            # is released when that traceback is
+            pass
+
+def _iter_batches(mm, batch_rows):
+    import numpy as np
+
+    buf = np.frombuffer(mm, dtype=np.uint8)
+    window = None
+    # Pass 1 checks every window; the first one's fields are kept for
+    # pass 2, so a file within one window is scanned once
+    first = None
+    try:
+        start = _data_start(mm)
+        for lo, hi in _windows(mm, start):
+            bounds = _window_fields(buf[lo:hi])
+            if first is None:
+                first = (lo, bounds)
+            del bounds
+    except FastPathUnavailable as e:
+        reason = str(e)
+    else:
+        reason = None
+    if reason is not None:
+        # Re-raised without the traceback: its frames hold views of the map,
+        # which would keep it from closing
+        del buf
+        raise FastPathUnavailable(reason)
+
+    try:
+        for lo, hi in _windows(mm, start):
+            window = buf[lo:hi]
+            if first is not None and first[0] == lo:
+                bounds, first = first[1], None
+            else:
+                bounds = _window_fields(window)
+            for b in range(0, len(bounds[0][0]), batch_rows):
+                yield {
+                    name: _factorize(
+                        _gather(window, field_start[b:b + batch_rows], field_end[b:b + batch_rows])
+                    )
+                    for name, (field_start, field_end) in zip(FAST_FIELDS, bounds)
+                }
+    finally:
+        # Views into the map must be gone before it is closed
+        del buf, window
@@ -0,0 +1,183 @@
+import os
+import json
+import time
+
+import numpy as np
+
+# ============================================================
+# LAYOUT
+# ============================================================
+# parts/
+#   product.dict        one JSON string per line; line number = integer id
+#   date.dict
+#   <run_id>-<ns>/      one partition per write_reports call
+#     product_ids.npy   int32 ids into product.dict
+#     product_qty.npy   int64
+#     product_rev.npy   int64 minor units (money.py)
+#     date_*.npy        same for dates
+#
+# Dictionaries are append-only, so ids are stable across partitions and
+# a reader can reduce every partition straight off the memory map.
+PARTS_DIR_NAME = "parts"
+KINDS = {"product": "by_product", "date": "by_date"}
+
+_dictionaries = {}  # dict path -> (size read, {key: id}, [keys])
+
+# Partitions are immutable once renamed into place, so cumulative totals
+# are folded incrementally: (parts dir, kind) -> _Folded
+_folded = {}
+
+
+def parts_dir(report_dir):
+    return os.path.join(report_dir, PARTS_DIR_NAME)
+
+# ============================================================
+# DICTIONARY
+# ============================================================
+def _load_dictionary(path):
+    """
+    Incrementally (re)load an append-only dictionary file.
+    """
+    size, ids, keys = _dictionaries.get(path, (0, {}, []))
+    try:
+        current = os.path.getsize(path)
+    except FileNotFoundError:
+        return {}, []
+    if current < size:
+        size, ids, keys = 0, {}, []
+
+    if current > size:
+        with open(path, "rb") as f:
+            f.seek(size)
+            data = f.read(current - size)
+        # Only consume complete lines
+        end = data.rfind(b"\n") + 1
+        for raw in data[:end].split(b"\n")[:-1]:
+            key = json.loads(raw)
+            ids[key] = len(keys)
+            keys.append(key)
+        size += end
+
+    _dictionaries[path] = (size, ids, keys)
+    return ids, keys
+
+def _encode(path, keys):
+    """
+    Ids for keys, appending unseen keys to the dictionary first.
+    """
+    ids, _ = _load_dictionary(path)
+    new = [k for k in dict.fromkeys(keys) if k not in ids]
+    if new:
+        with open(path, "ab") as f:
+            f.write("".join(json.dumps(k) + "\n" for k in new).encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        ids, _ = _load_dictionary(path)
+    return np.fromiter((ids[k] for k in keys), dtype=np.int32, count=len(keys))
+
+# ============================================================
+# WRITE
+# ============================================================
+def write_partition(report_dir, run_id, stats):
+    """
+    Write one run's by_product/by_date totals as a binary partition
+    (by_date only for an approximate run).
+    The partition directory is renamed into place once complete.
+    """
+    root = parts_dir(report_dir)
+    os.makedirs(root, exist_ok=True)
+
+    name = f"{run_id}-{time.time_ns()}"
+    tmp = os.path.join(root, f".{name}.tmp")
+    os.makedirs(tmp)
+
+    approx = stats.get("approx", False)
+    for kind, field in KINDS.items():
+        if approx and field != "by_date":
+            # Product estimates live in sketches.npz; dates stay exact
+            keys, qty, rev = [], np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        else:
+            keys, qty, rev = stats[field].columns()
+        ids = _encode(os.path.join(root, f"{kind}.dict"), [str(k) for k in keys])
+
+        np.save(os.path.join(tmp, f"{kind}_ids.npy"), ids)
+        np.save(os.path.join(tmp, f"{kind}_qty.npy"), qty)
+        np.save(os.path.join(tmp, f"{kind}_rev.npy"), rev)
+
+    os.rename(tmp, os.path.join(root, name))
+
+# ============================================================
+# READ
+# ============================================================
+def list_partitions(report_dir):
+    root = parts_dir(report_dir)
+    try:
+        names = os.listdir(root)
+    except FileNotFoundError:
+        return []
+    return sorted(
+        os.path.join(root, n) for n in names
+        if not n.startswith(".") and os.path.isdir(os.path.join(root, n))
+    )
+
+class _Folded:
+    """
+    Totals folded so far from a set of partitions.
+    """
+    __slots__ = ("partitions", "qty", "rev", "seen")
+
+    def __init__(self):
+        self.partitions = set()
+        self.qty = np.zeros(0, dtype=np.int64)
+        self.rev = np.zeros(0, dtype=np.int64)
+        self.seen = np.zeros(0, dtype=bool)
+
+    def grow(self, n):
+        extra = n - len(self.qty)
+        if extra > 0:
+            self.qty = np.concatenate((self.qty, np.zeros(extra, dtype=np.int64)))
+            self.rev = np.concatenate((self.rev, np.zeros(extra, dtype=np.int64)))
+            self.seen = np.concatenate((self.seen, np.zeros(extra, dtype=bool)))
+
+def load_totals(report_dir, kind):
+    """
+    Cumulative totals across all partitions.
+
+    Every array is opened with mmap_mode="r" and folded into the result
+    by id, so nothing is parsed or copied per partition. Folded totals
+    are kept per process: a load only opens the partitions written
+    since the previous one, so the first load in a process is O(runs)
+    and later ones O(new runs). Removing a partition refolds them all.
+
+    Returns:
+        (keys, qty int64 array, revenue int64 array in minor units) for
+        keys present in at least one partition
+    """
+    # Partitions first: their dictionary entries are always written
+    # before the partition is renamed into place
+    partitions = list_partitions(report_dir)
+    root = parts_dir(report_dir)
+    _, keys = _load_dictionary(os.path.join(root, f"{kind}.dict"))
+
+    folded = _folded.get((root, kind))
+    if folded is None or not folded.partitions.issubset(partitions):
+        folded = _folded[(root, kind)] = _Folded()
+    folded.grow(len(keys))
+
+    for part in partitions:
+        if part in folded.partitions:
+            continue
+        # Opened in full before anything is added, so a failed read
+        # leaves the folded totals as they were
+        ids, qty, rev = (
+            np.load(os.path.join(part, f"{kind}_{column}.npy"), mmap_mode="r")
+            for column in ("ids", "qty", "rev")
+        )
+        # ids are unique within a partition, so fancy-index add is exact
+        folded.qty[ids] += qty
+        folded.rev[ids] += rev
+        folded.seen[ids] = True
+        folded.partitions.add(part)
+
+    present = np.flatnonzero(folded.seen)
+    return [keys[i] for i in present], folded.qty[present], folded.rev[present]
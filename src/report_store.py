@@ -0,0 +1,397 @@
+import os
+import csv
+from datetime import datetime, timedelta
+from functools import lru_cache
+from collections import defaultdict
+
+from sqlalchemy import (
+    create_engine, event, MetaData, Table, Column, Index,
+    Integer, String, select, desc,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .money import round_minor
+
+# ============================================================
+# SCHEMA
+# ============================================================
+# Cumulative totals are materialized per product / per date and upserted
+# once per run, so readers get the all-time view in O(keys). Per-run
+# detail is kept in indexed tables for drill-down. Revenue columns hold
+# integer minor units (money.py), so cumulative upserts stay exact.
+metadata = MetaData()
+
+runs = Table(
+    "runs", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("run_id", String, nullable=False, index=True),
+    Column("files", Integer, nullable=False),
+    Column("rows", Integer, nullable=False),
+    Column("valid", Integer, nullable=False),
+    Column("invalid", Integer, nullable=False),
+    Column("total_quantity", Integer, nullable=False),
+    Column("total_revenue", Integer, nullable=False),
+    # 1: approximate-mode run (sketches.py). Its totals above are exact,
+    # but it adds nothing to the per-product / per-date tables below
+    Column("approx", Integer, nullable=False, server_default="0"),
+)
+
+run_products = Table(
+    "run_products", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("run_id", String, nullable=False),
+    Column("product", String, nullable=False),
+    Column("total_quantity", Integer, nullable=False),
+    Column("total_revenue", Integer, nullable=False),
+    Index("ix_run_products_run_product", "run_id", "product"),
+)
+
+run_dates = Table(
+    "run_dates", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("run_id", String, nullable=False),
+    Column("date", String, nullable=False),
+    Column("total_quantity", Integer, nullable=False),
+    Column("total_revenue", Integer, nullable=False),
+    Index("ix_run_dates_run_date", "run_id", "date"),
+)
+
+product_totals = Table(
+    "product_totals", metadata,
+    Column("product", String, primary_key=True),
+    Column("total_quantity", Integer, nullable=False),
+    Column("total_revenue", Integer, nullable=False),
+)
+
+date_totals = Table(
+    "date_totals", metadata,
+    Column("date", String, primary_key=True),
+    Column("total_quantity", Integer, nullable=False),
+    Column("total_revenue", Integer, nullable=False),
+)
+
+# Product x time cube: one table per grain, keyed (product, period) and
+# upserted incrementally per run like the totals above. Periods are
+# strings that sort in time order:
+#   day    YYYY-MM-DD
+#   week   YYYY-MM-DD of the ISO week's Monday
+#   month  YYYY-MM
+def _rollup_table(name, period):
+    return Table(
+        name, metadata,
+        Column("product", String, primary_key=True),
+        Column(period, String, primary_key=True),
+        Column("total_quantity", Integer, nullable=False),
+        Column("total_revenue", Integer, nullable=False),
+        # Period scans and top-N per period, without touching the base table
+        Index(f"ix_{name}_{period}_revenue", period, "total_revenue"),
+    )
+
+ROLLUPS = {
+    "day": _rollup_table("product_date_totals", "date"),
+    "week": _rollup_table("product_week_totals", "week"),
+    "month": _rollup_table("product_month_totals", "month"),
+}
+GRAINS = tuple(ROLLUPS)
+
+# PRAGMA user_version: 0 while a new file is being set up, STORE_READY
+# once its tables exist and the CSV history is back-filled
+STORE_READY = 1
+
+_engines = {}
+_ready = set()  # database files known to be set up
+
+# ============================================================
+# ENGINE
+# ============================================================
+def _sqlite_pragmas(dbapi_conn, _):
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.close()
+
+def _engine(db_path):
+    engine = _engines.get(db_path)
+    if engine is None:
+        engine = create_engine(f"sqlite:///{db_path}")
+        event.listen(engine, "connect", _sqlite_pragmas)
+        _engines[db_path] = engine
+    return engine
+
+def get_engine(db_path):
+    """
+    One cached engine per database file, for writers: the first call in
+    a process sets a new file up (see _initialize). Loaders go through
+    _read and never create the store.
+    """
+    engine = _engine(db_path)
+    if db_path not in _ready:
+        _initialize(engine, os.path.dirname(db_path))
+        _ready.add(db_path)
+    return engine
+
+def _initialize(engine, report_dir):
+    """
+    Create all tables and back-fill the CSV reports next to the file, so
+    the cumulative totals include history written before the store
+    existed. Done in one immediate (write) transaction that re-reads
+    user_version, so of several processes opening a new file exactly
+    one back-fills it.
+    """
+    with engine.connect() as conn:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        if conn.exec_driver_sql("PRAGMA user_version").scalar() < STORE_READY:
+            metadata.create_all(conn)
+            _backfill_from_csv(conn, report_dir)
+            conn.exec_driver_sql(f"PRAGMA user_version = {STORE_READY}")
+        conn.commit()
+
+def _read(db_path, query):
+    """
+    Rows for a loader query; [] until a writer has set the store up.
+    """
+    if db_path not in _ready:
+        if not os.path.exists(db_path):
+            return []
+        with _engine(db_path).connect() as conn:
+            if conn.exec_driver_sql("PRAGMA user_version").scalar() < STORE_READY:
+                return []
+        _ready.add(db_path)
+    with _engine(db_path).connect() as conn:
+        return conn.execute(query).all()
+
+def dispose_engines():
+    for engine in _engines.values():
+        engine.dispose()
+    _engines.clear()
+    _ready.clear()
+
+# ============================================================
+# WRITE
+# ============================================================
+def _upsert_totals(conn, table, key, rows):
+    """
+    Add rows onto cumulative totals; key is a column name or a tuple of them.
+    """
+    if not rows:
+        return
+    stmt = sqlite_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[key] if isinstance(key, str) else list(key),
+        set_={
+            "total_quantity": table.c.total_quantity + stmt.excluded.total_quantity,
+            "total_revenue": table.c.total_revenue + stmt.excluded.total_revenue,
+        },
+    )
+    conn.execute(stmt, rows)  # executemany: no bound-parameter limit
+
+def _total_rows(key, totals):
+    return [
+        {key: k, "total_quantity": qty, "total_revenue": rev}
+        for k, qty, rev in totals.rows()
+    ]
+
+def _run_values(run_id, stats):
+    return {
+        "run_id": run_id,
+        "files": stats["files"],
+        "rows": stats["rows"],
+        "valid": stats["valid"],
+        "invalid": stats["invalid"],
+        "total_quantity": stats["quantity"],
+        "total_revenue": stats["revenue"],
+    }
+
+@lru_cache(maxsize=4096)
+def _buckets(date):
+    """
+    (ISO week Monday, month) for a YYYY-MM-DD date.
+    """
+    day = datetime.strptime(date, "%Y-%m-%d").date()
+    return (day - timedelta(days=day.weekday())).isoformat(), date[:7]
+
+def _rollup_rows(cube):
+    """
+    {grain: upsert rows} from a run's (product, date) totals. The week and
+    month rows are summed here, once per run, so readers never regroup.
+    """
+    day, week, month = [], defaultdict(lambda: [0, 0]), defaultdict(lambda: [0, 0])
+    for (product, date), qty, rev in cube.rows():
+        day.append({"product": product, "date": date, "total_quantity": qty, "total_revenue": rev})
+        w, m = _buckets(date)
+        for acc, period in ((week, w), (month, m)):
+            total = acc[product, period]
+            total[0] += qty
+            total[1] += rev
+
+    def rows(acc, column):
+        return [
+            {"product": p, column: period, "total_quantity": q, "total_revenue": r}
+            for (p, period), (q, r) in acc.items()
+        ]
+
+    return {"day": day, "week": rows(week, "week"), "month": rows(month, "month")}
+
+def write_run(db_path, run_id, stats):
+    """
+    Record one run: per-run detail + cumulative upserts, in one transaction.
+    An approximate-mode run is marked approx and keeps its exact date
+    totals; its product estimates go to sketches.npz instead.
+    """
+    approx = stats.get("approx", False)
+    product_rows = [] if approx else _total_rows("product", stats["by_product"])
+    date_rows = _total_rows("date", stats["by_date"])
+    cube = None if approx else stats.get("by_product_date")
+    rollup_rows = _rollup_rows(cube) if cube else {}
+
+    with get_engine(db_path).begin() as conn:
+        conn.execute(runs.insert().values(approx=int(approx), **_run_values(run_id, stats)))
+        if product_rows:
+            conn.execute(run_products.insert().values(run_id=run_id), product_rows)
+        if date_rows:
+            conn.execute(run_dates.insert().values(run_id=run_id), date_rows)
+
+        _upsert_totals(conn, product_totals, "product", product_rows)
+        _upsert_totals(conn, date_totals, "date", date_rows)
+        for grain, rows in rollup_rows.items():
+            table = ROLLUPS[grain]
+            _upsert_totals(conn, table, [c.name for c in table.primary_key], rows)
+
+# ============================================================
+# READ
+# ============================================================
+def load_product_totals(db_path):
+    """
+    [(product, total_quantity, total_revenue), ...]; revenue in minor
+    units here and in every loader below
+    """
+    return _read(db_path, select(
+        product_totals.c.product,
+        product_totals.c.total_quantity,
+        product_totals.c.total_revenue,
+    ))
+
+def load_date_totals(db_path):
+    """
+    [(date, total_quantity, total_revenue), ...] ordered by date
+    """
+    return _read(db_path, select(
+        date_totals.c.date,
+        date_totals.c.total_quantity,
+        date_totals.c.total_revenue,
+    ).order_by(date_totals.c.date))
+
+def load_runs(db_path, limit=None):
+    """
+    [(run_id, files, rows, valid, invalid, total_quantity, total_revenue,
+    approx), ...] newest first
+    """
+    query = select(
+        runs.c.run_id, runs.c.files, runs.c.rows, runs.c.valid,
+        runs.c.invalid, runs.c.total_quantity, runs.c.total_revenue, runs.c.approx,
+    ).order_by(runs.c.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return _read(db_path, query)
+
+def _rollup(grain):
+    if grain not in ROLLUPS:
+        raise ValueError(f"grain must be one of {', '.join(GRAINS)}")
+    table = ROLLUPS[grain]
+    return table, table.c[table.primary_key.columns.keys()[1]]
+
+def load_rollup(db_path, grain, product=None, start=None, end=None):
+    """
+    [(product, period, total_quantity, total_revenue), ...] ordered by
+    period then product; start / end are inclusive period strings.
+    """
+    table, period = _rollup(grain)
+    query = select(
+        table.c.product, period, table.c.total_quantity, table.c.total_revenue,
+    ).order_by(period, table.c.product)
+    if product is not None:
+        query = query.where(table.c.product == product)
+    if start is not None:
+        query = query.where(period >= start)
+    if end is not None:
+        query = query.where(period <= end)
+    return _read(db_path, query)
+
+def load_top_products(db_path, grain, period_value, n=10, by="revenue"):
+    """
+    [(product, total_quantity, total_revenue), ...] for one period,
+    largest first.
+    """
+    table, period = _rollup(grain)
+    column = table.c.total_revenue if by == "revenue" else table.c.total_quantity
+    query = (
+        select(table.c.product, table.c.total_quantity, table.c.total_revenue)
+        .where(period == period_value)
+        .order_by(desc(column), table.c.product)
+        .limit(n)
+    )
+    return _read(db_path, query)
+
+# ============================================================
+# BACKFILL
+# ============================================================
+def _read_csv_rows(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+def _backfill_from_csv(conn, report_dir):
+    """
+    Insert the CSV history through `conn`, inside _initialize's transaction.
+    """
+    summary = _read_csv_rows(os.path.join(report_dir, "summary.csv"))
+    products = _read_csv_rows(os.path.join(report_dir, "by_product.csv"))
+    dates = _read_csv_rows(os.path.join(report_dir, "by_date.csv"))
+    if not (summary or products or dates):
+        return
+
+    def detail(rows, key):
+        return [
+            {
+                "run_id": r["run_id"],
+                key: r[key],
+                "total_quantity": int(r["total_quantity"]),
+                "total_revenue": round_minor(r["total_revenue"]),
+            }
+            for r in rows
+        ]
+
+    def totals(rows, key):
+        acc = defaultdict(lambda: [0, 0])
+        for r in rows:
+            acc[r[key]][0] += r["total_quantity"]
+            acc[r[key]][1] += r["total_revenue"]
+        return [
+            {key: k, "total_quantity": q, "total_revenue": rev}
+            for k, (q, rev) in acc.items()
+        ]
+
+    product_rows = detail(products, "product")
+    date_rows = detail(dates, "date")
+
+    if summary:
+        conn.execute(runs.insert(), [
+            {
+                "run_id": r["run_id"],
+                "files": int(r["files"]),
+                "rows": int(r["rows"]),
+                "valid": int(r["valid"]),
+                "invalid": int(r["invalid"]),
+                "total_quantity": int(r["total_quantity"]),
+                "total_revenue": round_minor(r["total_revenue"]),
+                "approx": int(r.get("approx") or 0),
+            }
+            for r in summary
+        ])
+    if product_rows:
+        conn.execute(run_products.insert(), product_rows)
+        conn.execute(product_totals.insert(), totals(product_rows, "product"))
+    if date_rows:
+        conn.execute(run_dates.insert(), date_rows)
+        conn.execute(date_totals.insert(), totals(date_rows, "date"))
@@ -1,13 +1,36 @@
 import os
 import csv
+import json
+import time
+
+from .locks import file_lock
+from .money import format_minor
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 REPORT_DIR = os.path.join(BASE_DIR, "src", "reports")
-os.makedirs(REPORT_DIR, exist_ok=True)
 
 SUMMARY_FILE = os.path.join(REPORT_DIR, "summary.csv")
 PRODUCT_FILE = os.path.join(REPORT_DIR, "by_product.csv")
 DATE_FILE = os.path.join(REPORT_DIR, "by_date.csv")
+DB_FILE = os.path.join(REPORT_DIR, "reports.db")
+
+# "sqlite": materialized cumulative totals (read by analytics.plots)
+# "csv":    append-only per-run export
+# "parts":  optional binary, memory-mappable partition per run
+REPORT_BACKEND_CHOICES = ("sqlite", "csv", "parts")
+REPORT_BACKENDS = ("sqlite", "csv")
+
+# Per-run timing breakdown appended to summary.csv as <stage>_seconds
+TIMING_STAGES = ("read", "validate", "aggregate", "move", "write_reports")
+
+# approx: 1 for approximate-mode runs, whose per-product / per-date
+# detail is not in the exact reports (see _write_reports)
+SUMMARY_HEADER = [
+    "run_id", "files", "rows", "valid", "invalid", "total_quantity", "total_revenue",
+] + [f"{stage}_seconds" for stage in TIMING_STAGES] + ["approx"]
+
+def init_dirs():
+    os.makedirs(REPORT_DIR, exist_ok=True)
 
 def _init_file(path, header):
     """
@@ -19,29 +42,98 @@ def _init_file(path, header):
         with open(path, "w", newline="", encoding="utf-8") as f:
             writer = csv.writer(f)
             writer.writerow(header)
+        return
 
-def write_reports(run_id, stats):
-    # -------------------------
-    # Ensure files + headers
-    # -------------------------
-    _init_file(
-        SUMMARY_FILE,
-        ["run_id", "files", "rows", "valid", "invalid", "total_quantity", "total_revenue"]
-    )
+    _upgrade_header(path, header)
 
-    _init_file(
-        PRODUCT_FILE,
-        ["run_id", "product", "total_quantity", "total_revenue"]
-    )
+def _upgrade_header(path, header):
+    """
+    Widen an older header when columns were appended to it; existing
+    rows keep their shorter width (readers see blanks).
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        current = next(csv.reader(f), [])
+    if current == header or current != header[:len(current)]:
+        return
 
-    _init_file(
-        DATE_FILE,
-        ["run_id", "date", "total_quantity", "total_revenue"]
-    )
+    with open(path, encoding="utf-8") as f:
+        f.readline()
+        body = f.read()
+    tmp = path + ".tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerow(header)
+        f.write(body)
+    os.replace(tmp, path)
 
-    # -------------------------
-    # Summary report
-    # -------------------------
+# Held while a run is written: several workers share one report directory
+LOCK_NAME = ".write.lock"
+
+# Backends the latest run was written to; analytics.plots reads the
+# cumulative totals from these, so a backend that is no longer
+# configured cannot shadow fresher data with a stale copy
+BACKENDS_NAME = "backends.json"
+
+def write_reports(run_id, stats, backends=None):
+    """
+    Append one run to every report backend. Each worker's run is merged
+    into the shared cumulative reports under a cross-process lock, so
+    concurrent workers never interleave CSV rows or lose upserts.
+    """
+    backends = REPORT_BACKENDS if backends is None else backends
+    init_dirs()
+    with file_lock(os.path.join(REPORT_DIR, LOCK_NAME)):
+        _write_reports(run_id, stats, backends)
+
+def _write_reports(run_id, stats, backends):
+    start = time.perf_counter()
+
+    # Approximate runs hold estimates for the monitored products only:
+    # those stay out of the exact product outputs and go to the sketch
+    # file instead. Their date totals are exact and written as usual;
+    # the run is recorded, marked approx, so the product gap is visible
+    approx = stats.get("approx", False)
+
+    # SQLite first: a brand-new store back-fills from the CSV history,
+    # which must not include this run yet
+    if "sqlite" in backends:
+        from .report_store import write_run
+        write_run(DB_FILE, run_id, stats)
+
+    if "parts" in backends:
+        from .report_parts import write_partition
+        write_partition(REPORT_DIR, run_id, stats)
+
+    if "csv" in backends:
+        _write_detail_csv(run_id, stats)
+
+    if approx:
+        from .sketches import merge_into_file, sketch_path
+        merge_into_file(sketch_path(REPORT_DIR), stats["by_product"], stats["by_product_date"])
+
+    # Summary goes last so it can carry this function's own time
+    timings = stats.get("timings")
+    if timings is not None:
+        timings["write_reports"] = time.perf_counter() - start
+
+    if "csv" in backends:
+        _write_summary_csv(run_id, stats)
+
+    _record_backends(backends)
+
+def _record_backends(backends):
+    path = os.path.join(REPORT_DIR, BACKENDS_NAME)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(list(backends), f)
+    os.replace(tmp, path)
+
+# CSV reports carry money in major units as exact decimals ("2395467.00");
+# stats hold integer minor units until here
+
+def _write_summary_csv(run_id, stats):
+    _init_file(SUMMARY_FILE, SUMMARY_HEADER)
+
+    timings = stats.get("timings", {})
     with open(SUMMARY_FILE, "a", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
         writer.writerow([
@@ -51,31 +143,44 @@ def write_reports(run_id, stats):
             stats["valid"],
             stats["invalid"],
             stats["quantity"],
-            stats["revenue"]
-        ])
+            format_minor(stats["revenue"]),
+        ] + [
+            f"{timings[stage]:.6f}" if stage in timings else ""
+            for stage in TIMING_STAGES
+        ] + [int(stats.get("approx", False))])
+
+def _write_detail_csv(run_id, stats):
+    # -------------------------
+    # Ensure files + headers
+    # -------------------------
+    _init_file(
+        PRODUCT_FILE,
+        ["run_id", "product", "total_quantity", "total_revenue"]
+    )
+
+    _init_file(
+        DATE_FILE,
+        ["run_id", "date", "total_quantity", "total_revenue"]
+    )
 
     # -------------------------
     # By product report
     # -------------------------
-    with open(PRODUCT_FILE, "a", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        for product, values in stats["by_product"].items():
-            writer.writerow([
-                run_id,
-                product,
-                values["qty"],
-                values["rev"]
-            ])
+    # Not for approximate runs: their products are in the sketch file
+    if not stats.get("approx", False):
+        with open(PRODUCT_FILE, "a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerows(
+                (run_id, product, qty, format_minor(rev))
+                for product, qty, rev in stats["by_product"].rows()
+            )
 
     # -------------------------
     # By date report
     # -------------------------
     with open(DATE_FILE, "a", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
-        for date, values in stats["by_date"].items():
-            writer.writerow([
-                run_id,
-                date,
-                values["qty"],
-                values["rev"]
-            ])
+        writer.writerows(
+            (run_id, date, qty, format_minor(rev))
+            for date, qty, rev in stats["by_date"].rows()
+        )
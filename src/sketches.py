@@ -0,0 +1,401 @@
+import os
+import hashlib
+from collections import defaultdict
+
+import numpy as np
+
+from .totals import KeyedTotals
+
+# ============================================================
+# SETTINGS
+# ============================================================
+# Approximate mode keeps fixed-size summaries instead of one entry per
+# product. Memory does not depend on the number of products:
+#
+#   Space-Saving  TOP_CAPACITY counters per measure (revenue, quantity)
+#   Count-Min     CM_DEPTH x CM_WIDTH x 2 float64 (128 KiB)
+#   HyperLogLog   2**HLL_PRECISION one-byte registers per date (4 KiB)
+#
+# Error bounds (N = total weight of the measure over everything merged):
+#
+#   Space-Saving  estimates never undercount; a key's overcount is at
+#                 most its reported error, which is at most N / capacity.
+#                 Every key heavier than N / capacity is monitored.
+#   Count-Min     estimates never undercount; the overcount is at most
+#                 e / CM_WIDTH * N with probability 1 - e**-CM_DEPTH
+#                 (0.13% of N, 98% of the time, with the defaults).
+#   HyperLogLog   relative standard error 1.04 / sqrt(2**HLL_PRECISION)
+#                 (1.6% with the defaults).
+#
+# All three merge exactly: across files, workers and runs. Revenue is
+# counted in minor units (money.py); float64 counters hold those sums
+# exactly up to 2**53.
+TOP_CAPACITY = 1024
+CM_WIDTH = 2048
+CM_DEPTH = 4
+HLL_PRECISION = 12
+
+SKETCH_FILE_NAME = "sketches.npz"
+
+# ============================================================
+# HASHING
+# ============================================================
+def hash64(keys):
+    """
+    Stable 64-bit hashes of str keys (Python's hash() is salted per
+    process, so it cannot be merged across runs).
+    """
+    blake2b = hashlib.blake2b
+    return np.fromiter(
+        (int.from_bytes(blake2b(k.encode("utf-8"), digest_size=8).digest(), "little")
+         for k in keys),
+        dtype=np.uint64, count=len(keys),
+    )
+
+# ============================================================
+# SPACE-SAVING
+# ============================================================
+class SpaceSaving:
+    """
+    Weighted Space-Saving summary of the heaviest keys.
+
+    Holds at most `capacity` (key, count, error) counters. A key that is
+    not monitored weighs at most `floor`. Two summaries merge by adding
+    counters (an absent key counts as the other side's floor) and
+    keeping the `capacity` largest.
+    """
+
+    def __init__(self, capacity=TOP_CAPACITY):
+        self.capacity = capacity
+        self.keys = []
+        self.counts = np.zeros(0, dtype=np.float64)
+        self.errors = np.zeros(0, dtype=np.float64)
+        self.floor = 0.0
+        self.total = 0.0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def update(self, keys, weights):
+        """
+        Add exact per-key weights (keys unique, e.g. one file's totals).
+        """
+        weights = np.asarray(weights, dtype=np.float64)
+        self._combine(list(keys), weights, np.zeros_like(weights), 0.0, float(weights.sum()))
+
+    def merge(self, other):
+        if other.capacity != self.capacity:
+            raise ValueError("cannot merge Space-Saving summaries of different capacity")
+        self._combine(other.keys, other.counts, other.errors, other.floor, other.total)
+
+    def _combine(self, keys, counts, errors, floor, total):
+        ids = {k: i for i, k in enumerate(self.keys)}
+        union = list(self.keys)
+        other_ids = np.empty(len(keys), dtype=np.intp)
+        for j, k in enumerate(keys):
+            i = ids.get(k)
+            if i is None:
+                i = ids[k] = len(union)
+                union.append(k)
+            other_ids[j] = i
+
+        n, size = len(self.keys), len(union)
+        # Absent on one side: that side's floor bounds both count and error
+        est = np.full(size, self.floor)
+        err = np.full(size, self.floor)
+        est[:n] = self.counts
+        err[:n] = self.errors
+        add_est = np.full(size, floor)
+        add_err = np.full(size, floor)
+        add_est[other_ids] = counts
+        add_err[other_ids] = errors
+        est += add_est
+        err += add_err
+
+        new_floor = self.floor + floor
+        # Largest first; stable, so ties keep first-seen order
+        order = np.argsort(-est, kind="stable")
+        if size > self.capacity:
+            new_floor = max(new_floor, float(est[order[self.capacity]]))
+            order = order[: self.capacity]
+
+        self.keys = [union[i] for i in order.tolist()]
+        self.counts = est[order]
+        self.errors = err[order]
+        self.floor = new_floor
+        self.total += total
+
+    def estimate(self, keys):
+        """
+        Upper bounds for keys (monitored count, else the floor).
+        """
+        ids = {k: i for i, k in enumerate(self.keys)}
+        return np.array(
+            [self.counts[ids[k]] if k in ids else self.floor for k in keys],
+            dtype=np.float64,
+        )
+
+    def top(self, n):
+        """
+        [(key, estimate, error), ...] largest first.
+        """
+        return list(zip(self.keys[:n], self.counts[:n].tolist(), self.errors[:n].tolist()))
+
+# ============================================================
+# COUNT-MIN
+# ============================================================
+class CountMin:
+    """
+    Count-Min sketch over (quantity, revenue) per key, for point queries
+    on keys a Space-Saving summary does not monitor.
+    """
+
+    def __init__(self, width=CM_WIDTH, depth=CM_DEPTH):
+        self.table = np.zeros((depth, width, 2), dtype=np.float64)
+
+    def _slots(self, hashes):
+        depth, width, _ = self.table.shape
+        # Kirsch-Mitzenmacher: row i uses h1 + i * h2
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        rows = np.arange(depth, dtype=np.uint64)[:, None]
+        return ((h1 + rows * h2) % np.uint64(width)).astype(np.intp)
+
+    def update(self, hashes, qty, rev):
+        slots = self._slots(hashes)
+        values = np.column_stack((np.asarray(qty, np.float64), np.asarray(rev, np.float64)))
+        for row, idx in enumerate(slots):
+            np.add.at(self.table[row], idx, values)
+
+    def merge(self, other):
+        if other.table.shape != self.table.shape:
+            raise ValueError("cannot merge Count-Min sketches of different shape")
+        self.table += other.table
+
+    def estimate(self, hashes):
+        """
+        (qty, rev) upper-bound arrays for the hashed keys.
+        """
+        slots = self._slots(hashes)
+        depth = self.table.shape[0]
+        cells = self.table[np.arange(depth)[:, None], slots]  # depth x keys x 2
+        est = cells.min(axis=0)
+        return est[:, 0], est[:, 1]
+
+# ============================================================
+# HYPERLOGLOG
+# ============================================================
+class HyperLogLog:
+    """
+    Distinct-count estimate from 2**precision one-byte registers.
+    """
+
+    def __init__(self, precision=HLL_PRECISION, registers=None):
+        self.precision = precision
+        if registers is None:
+            registers = np.zeros(1 << precision, dtype=np.uint8)
+        self.registers = registers
+
+    def add(self, hashes):
+        p = np.uint64(self.precision)
+        idx = (hashes >> (np.uint64(64) - p)).astype(np.intp)
+        w = hashes << p
+        # Bit length of w, exactly: float64 holds 53 bits, so split it
+        hi = (w >> np.uint64(11)).astype(np.float64)
+        lo = (w & np.uint64(0x7FF)).astype(np.float64)
+        bits = np.where(hi > 0, np.frexp(hi)[1] + 11, np.frexp(lo)[1])
+        rank = np.minimum(65 - bits, 65 - self.precision).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rank)
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("cannot merge HyperLogLogs of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.ldexp(1.0, -self.registers.astype(np.int64)).sum()
+        zeros = int((self.registers == 0).sum())
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)  # linear counting for small sets
+        return int(round(estimate))
+
+# ============================================================
+# RUN-LEVEL SUMMARIES
+# ============================================================
+class HeavyHitters:
+    """
+    Approximate stand-in for the run's by_product KeyedTotals.
+
+    Space-Saving picks the top products by revenue and by quantity; the
+    other measure of a product is the tighter of that measure's
+    Space-Saving bound and the Count-Min estimate. add() / add_coded()
+    take a batch of rows like KeyedTotals: the batch is totalled
+    exactly, then merged, so memory is bounded by the batch, not the
+    file. merge() takes an exact KeyedTotals or another HeavyHitters.
+    """
+
+    def __init__(self, capacity=TOP_CAPACITY, width=CM_WIDTH, depth=CM_DEPTH):
+        self.revenue = SpaceSaving(capacity)
+        self.quantity = SpaceSaving(capacity)
+        self.cm = CountMin(width, depth)
+
+    def __len__(self):
+        return len(self._keys())
+
+    def add(self, keys, qty, rev):
+        batch = KeyedTotals()
+        batch.add(keys, qty, rev)
+        self.merge(batch)
+
+    def add_coded(self, uniques, codes, qty, rev):
+        batch = KeyedTotals()
+        batch.add_coded(uniques, codes, qty, rev)
+        self.merge(batch)
+
+    def merge(self, other):
+        if isinstance(other, HeavyHitters):
+            self.revenue.merge(other.revenue)
+            self.quantity.merge(other.quantity)
+            self.cm.merge(other.cm)
+            return
+        keys, qty, rev = other.columns()
+        if not keys:
+            return
+        self.revenue.update(keys, rev)
+        self.quantity.update(keys, qty)
+        self.cm.update(hash64(keys), qty, rev)
+
+    def top(self, n, by="revenue"):
+        """
+        [(product, estimate, error), ...] largest first.
+        """
+        return (self.revenue if by == "revenue" else self.quantity).top(n)
+
+    def _keys(self):
+        return list(dict.fromkeys(self.revenue.keys + self.quantity.keys))
+
+    def columns(self):
+        """
+        (keys, int64 qty estimates, int64 revenue estimates in minor
+        units) for every monitored product, heaviest by revenue first.
+        """
+        keys = self._keys()
+        cm_qty, cm_rev = self.cm.estimate(hash64(keys))
+        qty = np.minimum(self.quantity.estimate(keys), cm_qty)
+        rev = np.minimum(self.revenue.estimate(keys), cm_rev)
+        return keys, np.rint(qty).astype(np.int64), np.rint(rev).astype(np.int64)
+
+    def rows(self):
+        keys, qty, rev = self.columns()
+        return list(zip(keys, qty.tolist(), rev.tolist()))
+
+
+class DistinctProducts:
+    """
+    HyperLogLog of distinct products per date.
+
+    Approximate-mode stand-in for the (product, date) cube: add() /
+    add_coded() take the cube's keys like KeyedTotals and ignore the
+    measures.
+    """
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.by_date = {}
+
+    def _get(self, date):
+        hll = self.by_date.get(date)
+        if hll is None:
+            hll = self.by_date[date] = HyperLogLog(self.precision)
+        return hll
+
+    def add(self, pairs, qty=None, rev=None):
+        self.add_pairs(dict.fromkeys(pairs))
+
+    def add_coded(self, uniques, codes, qty=None, rev=None):
+        self.add_pairs(uniques[np.unique(codes)])
+
+    def add_pairs(self, cube):
+        """
+        Feed (product, date) keys, e.g. those of an exact cube.
+        """
+        products = defaultdict(list)
+        for product, date in cube:
+            products[date].append(product)
+        for date, keys in products.items():
+            self._get(date).add(hash64(keys))
+
+    def merge(self, other):
+        for date, hll in other.by_date.items():
+            self._get(date).merge(hll)
+
+    def counts(self):
+        """
+        {date: estimated distinct products}, by date.
+        """
+        return {date: self.by_date[date].count() for date in sorted(self.by_date)}
+
+# ============================================================
+# PERSISTENCE
+# ============================================================
+def sketch_path(report_dir):
+    return os.path.join(report_dir, SKETCH_FILE_NAME)
+
+def save(path, heavy, distinct):
+    """
+    Write both summaries to one .npz (no pickling); atomic replace.
+    """
+    arrays = {
+        "cm": heavy.cm.table,
+        "hll_precision": np.array(distinct.precision),
+    }
+    for name in ("revenue", "quantity"):
+        ss = getattr(heavy, name)
+        arrays[f"{name}_keys"] = np.array(ss.keys, dtype=str)
+        arrays[f"{name}_counts"] = ss.counts
+        arrays[f"{name}_errors"] = ss.errors
+        arrays[f"{name}_state"] = np.array([ss.capacity, ss.floor, ss.total])
+    dates = sorted(distinct.by_date)
+    arrays["hll_dates"] = np.array(dates, dtype=str)
+    arrays["hll_registers"] = np.array(
+        [distinct.by_date[d].registers for d in dates], dtype=np.uint8,
+    ).reshape(len(dates), 1 << distinct.precision)
+
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, **arrays)
+    os.replace(tmp, path)
+
+def load(path):
+    """
+    (HeavyHitters, DistinctProducts) from a sketch file; empty if absent.
+    """
+    if not os.path.exists(path):
+        return HeavyHitters(), DistinctProducts()
+
+    with np.load(path) as data:
+        depth, width, _ = data["cm"].shape
+        capacity = int(data["revenue_state"][0])
+        heavy = HeavyHitters(capacity, width, depth)
+        heavy.cm.table = data["cm"].copy()
+        for name in ("revenue", "quantity"):
+            ss = getattr(heavy, name)
+            ss.keys = data[f"{name}_keys"].tolist()
+            ss.counts = data[f"{name}_counts"].copy()
+            ss.errors = data[f"{name}_errors"].copy()
+            _, ss.floor, ss.total = data[f"{name}_state"].tolist()
+
+        distinct = DistinctProducts(int(data["hll_precision"]))
+        for date, registers in zip(data["hll_dates"].tolist(), data["hll_registers"]):
+            distinct.by_date[date] = HyperLogLog(distinct.precision, registers.copy())
+    return heavy, distinct
+
+def merge_into_file(path, heavy, distinct):
+    """
+    Fold one run's summaries into the cumulative sketch file.
+    """
+    total_heavy, total_distinct = load(path)
+    total_heavy.merge(heavy)
+    total_distinct.merge(distinct)
+    save(path, total_heavy, total_distinct)
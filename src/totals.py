@@ -0,0 +1,184 @@
+import numpy as np
+
+from .money import add_total, check_total
+
+# Initial column capacity; columns double when full
+INITIAL_CAPACITY = 64
+
+
+def _restore(keys, qty, rev, sums):
+    totals = KeyedTotals(len(keys))
+    totals._ids = {k: i for i, k in enumerate(keys)}
+    totals._qty[: len(keys)] = qty
+    totals._rev[: len(keys)] = rev
+    totals._sums = sums
+    return totals
+
+
+class KeyedTotals:
+    """
+    Quantity / revenue totals per key (product, date or (product, date)).
+
+    Keys are interned to dense integer ids in first-seen order; totals
+    live in two growable int64 columns (quantity, revenue in minor
+    units, see money.py) indexed by id. Per key that is one dict slot
+    and its id plus 16 bytes (~87 B in all), instead of a dict entry
+    holding its own {"qty", "rev"} dict (~286 B).
+
+    Reads as a mapping: totals[key] -> {"qty": int, "rev": int}, and
+    iteration follows insertion order like the dicts it replaces.
+
+    Values are non-negative, so no key's total exceeds the exact grand
+    totals kept alongside. Checking those before every update keeps the
+    int64 columns from wrapping: an update that would pass MAX_MINOR
+    raises TotalOutOfRange and changes nothing.
+    """
+
+    __slots__ = ("_ids", "_qty", "_rev", "_sums")
+
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        self._ids = {}
+        capacity = max(capacity, 1)
+        self._qty = np.zeros(capacity, dtype=np.int64)
+        self._rev = np.zeros(capacity, dtype=np.int64)
+        self._sums = (0, 0)  # exact (quantity, revenue) over all keys
+
+    def __reduce__(self):
+        # Pickle only the used part of the columns (process pool results)
+        n = len(self._ids)
+        return _restore, (list(self._ids), self._qty[:n].copy(), self._rev[:n].copy(),
+                          self._sums)
+
+    # ------------------------------------------------------------
+    # Interning
+    # ------------------------------------------------------------
+    def _grow(self, n):
+        capacity = len(self._qty)
+        if n <= capacity:
+            return
+        while capacity < n:
+            capacity *= 2
+        for name in ("_qty", "_rev"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[: len(old)] = old
+            setattr(self, name, new)
+
+    def intern(self, keys):
+        """
+        Ids for keys (repeats allowed), assigning new ids to unseen keys.
+        """
+        ids = self._ids
+        before = len(ids)
+        setdefault = ids.setdefault
+        # len(ids) is evaluated before insertion, so a new key gets the next id
+        out = np.fromiter((setdefault(k, len(ids)) for k in keys), dtype=np.intp, count=len(keys))
+        if len(ids) > before:
+            self._grow(len(ids))
+        return out
+
+    # ------------------------------------------------------------
+    # Accumulation
+    # ------------------------------------------------------------
+    def add(self, keys, qty, rev):
+        """
+        Add qty / rev per key. Keys may repeat; np.add.at applies the
+        updates one by one in order, like a plain `+=` per row.
+        """
+        if not len(keys):
+            return
+        qty, rev = np.asarray(qty, dtype=np.int64), np.asarray(rev, dtype=np.int64)
+        sums = self._checked_sums(qty, rev)
+        ids = self.intern(keys)
+        np.add.at(self._qty, ids, qty)
+        np.add.at(self._rev, ids, rev)
+        self._sums = sums
+
+    def add_coded(self, uniques, codes, qty, rev):
+        """
+        add() for factorized keys: row i belongs to uniques[codes[i]].
+        Each distinct key is interned once, in order of first appearance,
+        instead of once per row.
+        """
+        if not len(codes):
+            return
+        qty, rev = np.asarray(qty, dtype=np.int64), np.asarray(rev, dtype=np.int64)
+        sums = self._checked_sums(qty, rev)
+        present, first = np.unique(codes, return_index=True)
+        order = present[np.argsort(first)]
+        lookup = np.empty(len(uniques), dtype=np.intp)
+        lookup[order] = self.intern([uniques[c] for c in order])
+        ids = lookup[codes]
+        np.add.at(self._qty, ids, qty)
+        np.add.at(self._rev, ids, rev)
+        self._sums = sums
+
+    def merge(self, other):
+        """
+        Fold another KeyedTotals into this one.
+        """
+        n = len(other)
+        if not n:
+            return
+        sums = (
+            check_total(self._sums[0] + other._sums[0], "quantity total"),
+            check_total(self._sums[1] + other._sums[1], "revenue total"),
+        )
+        # Keys are unique in `other`, so fancy-index add is exact
+        ids = self.intern(list(other._ids))
+        self._qty[ids] += other._qty[:n]
+        self._rev[ids] += other._rev[:n]
+        self._sums = sums
+
+    def _checked_sums(self, qty, rev):
+        return (
+            add_total(self._sums[0], qty, "quantity total"),
+            add_total(self._sums[1], rev, "revenue total"),
+        )
+
+    # ------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------
+    def __len__(self):
+        return len(self._ids)
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __contains__(self, key):
+        return key in self._ids
+
+    def __getitem__(self, key):
+        i = self._ids[key]
+        return {"qty": int(self._qty[i]), "rev": int(self._rev[i])}
+
+    def keys(self):
+        return self._ids.keys()
+
+    def items(self):
+        for key, (qty, rev) in zip(self._ids, self._pairs()):
+            yield key, {"qty": qty, "rev": rev}
+
+    def _pairs(self):
+        n = len(self._ids)
+        return zip(self._qty[:n].tolist(), self._rev[:n].tolist())
+
+    def rows(self):
+        """
+        [(key, qty, rev), ...] in insertion order, as Python scalars.
+        """
+        return [(k, q, r) for k, (q, r) in zip(self._ids, self._pairs())]
+
+    def columns(self):
+        """
+        (keys list, int64 qty array, int64 rev array); arrays are views.
+        """
+        n = len(self._ids)
+        return list(self._ids), self._qty[:n], self._rev[:n]
+
+    @property
+    def nbytes(self):
+        """
+        Column memory in bytes (excludes the key dictionary).
+        """
+        return self._qty.nbytes + self._rev.nbytes
@@ -1,4 +1,7 @@
 from datetime import datetime
+from functools import lru_cache
+
+from .money import MAX_MINOR, parse_minor
 
 # -----------------------------
 # Column aliases (schema map)
@@ -11,6 +14,105 @@ COLUMN_ALIASES = {
     "date": "date",
 }
 
+REQUIRED_COLUMNS = ("date", "product", "quantity", "price")
+
+# Input files are UTF-8; a byte order mark before the header is skipped
+CSV_ENCODING = "utf-8-sig"
+
+DATE_FORMAT = "%Y-%m-%d"
+
+# A file holds a few dozen distinct dates; strptime runs once per string
+DATE_CACHE_SIZE = 4096
+
+# Prices repeat across rows (a catalogue price per product), so each
+# distinct string is parsed to minor units once
+PRICE_CACHE_SIZE = 65536
+_parse_price = lru_cache(maxsize=PRICE_CACHE_SIZE)(parse_minor)
+
+class SchemaError(ValueError):
+    """
+    Header is missing required columns, or names one twice (e.g. both
+    "qty" and "quantity").
+    """
+    def __init__(self, missing=(), duplicates=()):
+        self.missing = tuple(missing)
+        self.duplicates = tuple(duplicates)
+        problems = []
+        if self.missing:
+            problems.append(f"missing required columns: {', '.join(self.missing)}")
+        if self.duplicates:
+            problems.append(f"duplicate columns: {', '.join(self.duplicates)}")
+        super().__init__("; ".join(problems))
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _parse_date(value: str) -> bool:
+    try:
+        datetime.strptime(value, DATE_FORMAT)
+    except ValueError:
+        return False
+    return True
+
+def is_valid_date(value) -> bool:
+    """
+    True if value parses as a DATE_FORMAT date (memoized per string).
+    """
+    if not isinstance(value, str):
+        return False
+    return _parse_date(value)
+
+def canonical_column(name) -> str:
+    clean_key = name.strip().lower()
+    return COLUMN_ALIASES.get(clean_key, clean_key)
+
+# -----------------------------
+# Schema plan (compiled per file)
+# -----------------------------
+class SchemaPlan:
+    """
+    Header compiled once per file: canonical column -> index.
+
+    Replaces per-row normalize_row: rows are plain lists and the
+    required fields are pulled out by position.
+    """
+    __slots__ = ("header", "indices", "duplicates")
+
+    def __init__(self, header):
+        self.header = list(header)
+        self.indices = {}
+        self.duplicates = []
+        for i, name in enumerate(self.header):
+            column = canonical_column(name)
+            if column in self.indices and column in REQUIRED_COLUMNS:
+                # Ambiguous: neither copy is taken over the other
+                if column not in self.duplicates:
+                    self.duplicates.append(column)
+            self.indices[column] = i
+
+    @property
+    def missing(self):
+        return [c for c in REQUIRED_COLUMNS if c not in self.indices]
+
+    def extract(self, row):
+        """
+        (date, product, quantity, price) from a row list; fields absent
+        from a short row come back as None.
+        """
+        n = len(row)
+        return tuple(
+            row[i] if i < n else None
+            for i in (self.indices[c] for c in REQUIRED_COLUMNS)
+        )
+
+def compile_schema(header) -> SchemaPlan:
+    """
+    Build a SchemaPlan, rejecting headers without the required columns
+    or with one of them twice.
+    """
+    plan = SchemaPlan(header)
+    if plan.missing or plan.duplicates:
+        raise SchemaError(plan.missing, plan.duplicates)
+    return plan
+
 def normalize_row(row: dict) -> dict:
     """
     Normalize CSV row:
@@ -21,37 +123,50 @@ def normalize_row(row: dict) -> dict:
     normalized = {}
 
     for key, value in row.items():
-        clean_key = key.strip().lower()
-        canonical_key = COLUMN_ALIASES.get(clean_key, clean_key)
-        normalized[canonical_key] = value
+        normalized[canonical_column(key)] = value
 
     return normalized
 
-def validate_row(row: dict):
+def check_values(date, product, quantity, price):
     """
+    Validate one row's fields.
+
     Returns:
-        (is_valid: bool, reason: str)
+        (is_valid, reason, qty, price) with qty parsed and price in
+        integer minor units (see money.py) when valid
     """
-    try:
-        datetime.strptime(row["date"], "%Y-%m-%d")
-    except Exception:
-        return False, "invalid_date"
+    if not is_valid_date(date):
+        return False, "invalid_date", None, None
 
-    if not row.get("product", "").strip():
-        return False, "empty_product"
+    if not isinstance(product, str) or not product.strip():
+        return False, "empty_product", None, None
 
     try:
-        qty = int(row["quantity"])
-        if qty <= 0:
-            return False, "quantity_non_positive"
+        qty = int(quantity)
     except Exception:
-        return False, "quantity_not_integer"
+        return False, "quantity_not_integer", None, None
+    if qty <= 0:
+        return False, "quantity_non_positive", None, None
 
-    try:
-        price = float(row["price"])
-        if price <= 0:
-            return False, "price_non_positive"
-    except Exception:
-        return False, "price_not_number"
+    price = _parse_price(price)
+    if price is None:
+        return False, "price_not_number", None, None
+    if price <= 0:
+        return False, "price_non_positive", None, None
+
+    # Revenue must fit the int64 totals (money.py)
+    if qty * price > MAX_MINOR:
+        return False, "amount_out_of_range", None, None
+
+    return True, "ok", qty, price
 
-    return True, "ok"
+def validate_row(row: dict):
+    """
+    Returns:
+        (is_valid: bool, reason: str)
+    """
+    is_valid, reason, _, _ = check_values(
+        row.get("date"), row.get("product", ""),
+        row.get("quantity"), row.get("price"),
+    )
+    return is_valid, reason
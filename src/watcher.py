@@ -0,0 +1,191 @@
+import os
+import sys
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+import threading
+
+from .prefetch import INPUT_SUFFIXES
+
+# inotify flags (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len
+
+# Scan fallback: a file is ready once size/mtime are unchanged between
+# two scans. Poll interval backs off while the inbox stays idle.
+MIN_POLL_SECONDS = 0.25
+MAX_POLL_SECONDS = 5.0
+
+
+def _load_libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class InboxWatcher:
+    """
+    Report CSV files in `directory` once they are fully written
+    (`suffix`: a suffix or tuple of them, by default plain and
+    compressed CSV).
+
+    On Linux this uses inotify: a file is ready on IN_CLOSE_WRITE
+    (writer closed it) or IN_MOVED_TO (renamed into place, e.g.
+    `sales.csv.tmp` -> `sales.csv`). Elsewhere, or if inotify is
+    unavailable, it falls back to polling and treats a file as ready
+    once its size and mtime are stable across two scans.
+
+    Files already present when the watcher starts are reported on the
+    first wait().
+    """
+
+    def __init__(self, directory, suffix=INPUT_SUFFIXES, use_inotify=True):
+        self.directory = directory
+        self.suffix = suffix
+        self._wake = threading.Event()
+        self._pending = set(self._scan())
+        self._seen = {}
+        self._poll = MIN_POLL_SECONDS
+        self._fd = None
+        self._pipe = None
+
+        libc = _load_libc() if use_inotify else None
+        if libc is not None:
+            self._start_inotify(libc)
+
+        logging.info(f"Inbox watcher using {self.mode}")
+
+    @property
+    def mode(self):
+        return "inotify" if self._fd is not None else "scan"
+
+    # ---------------- INOTIFY ----------------
+    def _start_inotify(self, libc):
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return
+        wd = libc.inotify_add_watch(
+            fd, os.fsencode(self.directory), IN_CLOSE_WRITE | IN_MOVED_TO
+        )
+        if wd < 0:
+            os.close(fd)
+            return
+        self._fd = fd
+        self._pipe = os.pipe()
+        # Re-scan: catch files that landed between the first scan and the watch
+        self._pending.update(self._scan())
+
+    def _read_events(self):
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return
+            raise
+
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                self._pending.update(self._scan())
+            elif name:
+                name = os.fsdecode(name)
+                if name.endswith(self.suffix):
+                    self._pending.add(name)
+
+    def _wait_inotify(self, timeout):
+        rfds, _, _ = select.select([self._fd, self._pipe[0]], [], [], timeout)
+        if self._pipe[0] in rfds:
+            os.read(self._pipe[0], 512)
+        if self._fd in rfds:
+            self._read_events()
+
+    # ---------------- SCAN FALLBACK ----------------
+    def _scan(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return [n for n in names if n.endswith(self.suffix)]
+
+    def _wait_scan(self, timeout):
+        self._wake.wait(min(timeout, self._poll))
+        self._wake.clear()
+
+        seen = {}
+        for name in self._scan():
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            sig = (st.st_size, st.st_mtime_ns)
+            seen[name] = sig
+            if self._seen.get(name) == sig:
+                self._pending.add(name)
+        self._seen = seen
+
+        # Back off while idle; snap back as soon as something shows up
+        if seen:
+            self._poll = MIN_POLL_SECONDS
+        else:
+            self._poll = min(self._poll * 2, MAX_POLL_SECONDS)
+
+    # ---------------- PUBLIC ----------------
+    def wait(self, timeout):
+        """
+        Block up to `timeout` seconds for ready files.
+
+        Returns:
+            list of full paths (possibly empty on timeout / wake())
+        """
+        if not self._pending:
+            if self._fd is not None:
+                self._wait_inotify(timeout)
+            else:
+                self._wait_scan(timeout)
+
+        ready = sorted(self._pending)
+        self._pending.clear()
+        paths = [os.path.join(self.directory, n) for n in ready]
+        return [p for p in paths if os.path.exists(p)]
+
+    def requeue(self, paths):
+        """
+        Report `paths` again on the next wait(), those still in the inbox
+        (files of a run that failed).
+        """
+        self._pending.update(os.path.basename(p) for p in paths if os.path.exists(p))
+
+    def wake(self):
+        """
+        Interrupt a blocking wait() (used by stop requests).
+        """
+        self._wake.set()
+        if self._pipe is not None:
+            os.write(self._pipe[1], b"x")
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            os.close(self._pipe[0])
+            os.close(self._pipe[1])
+        self._fd = None
+        self._pipe = None
@@ -1,10 +1,13 @@
 import os
+import io
 import csv
 import random
 import time
+import argparse
 import threading
 import logging
 from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
 
 # ============================================================
 # CONFIG
@@ -39,11 +42,25 @@ PRODUCTS = [
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, ".."))
 OUTPUT_DIR = os.path.join(PROJECT_ROOT, "data", "in")
-os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 _stop_flag = threading.Event()
 
+HEADER = ["date", "product", "qty", "price"]
+
+# Bulk mode: rows are built in batches of this size
+BULK_BATCH_ROWS = 100_000
+
 # ============================================================
+def _write_atomic(path, data):
+    """
+    Write to a temp name the processor ignores, then rename into place,
+    so a half-written file is never picked up.
+    """
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
 def _generate_row():
     date = (START_DATE + timedelta(days=random.randint(0, 30))).strftime("%Y-%m-%d")
     product = random.choice(PRODUCTS)
@@ -51,18 +68,19 @@ def _generate_row():
     price = random.randint(1000, 50000)
     return [date, product, qty, price]
 
-def _run_generator():
+def _run_generator(output_dir):
     logging.info("CSV generator started")
     while not _stop_flag.is_set():
         ts = datetime.now().strftime("%Y%m%d_%H%M%S")
         fname = f"sales_{ts}.csv"
-        path = os.path.join(OUTPUT_DIR, fname)
+        path = os.path.join(output_dir, fname)
 
-        with open(path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow(["date", "product", "qty", "price"])
-            for _ in range(ROWS_PER_FILE):
-                writer.writerow(_generate_row())
+        buf = io.StringIO(newline="")
+        writer = csv.writer(buf)
+        writer.writerow(HEADER)
+        for _ in range(ROWS_PER_FILE):
+            writer.writerow(_generate_row())
+        _write_atomic(path, buf.getvalue().encode("utf-8"))
 
         logging.info(f"Generated CSV file: {fname}")
 
@@ -73,10 +91,149 @@ def _run_generator():
 
     logging.info("CSV generator stopped")
 
-def start_csv_generator():
+def start_csv_generator(output_dir=None):
+    output_dir = output_dir or OUTPUT_DIR
+    os.makedirs(output_dir, exist_ok=True)
     _stop_flag.clear()
-    threading.Thread(target=_run_generator, daemon=True).start()
+    threading.Thread(target=_run_generator, args=(output_dir,), daemon=True).start()
 
 def stop_csv_generator():
     _stop_flag.set()
     logging.info("Stop CSV generator requested")
+
+# ============================================================
+# BULK MODE
+# ============================================================
+def bulk_products(count):
+    """
+    PRODUCTS first, then synthetic SKUs up to `count` names.
+    """
+    names = PRODUCTS[:count]
+    names += [f"SKU-{i:07d}" for i in range(len(names), count)]
+    return names
+
+def _bulk_batch(rng, n, products, dates, invalid_ratio):
+    import numpy as np
+
+    date_col = dates[rng.integers(0, len(dates), n)]
+    product_col = products[rng.integers(0, len(products), n)]
+    qty_col = rng.integers(1, 11, n).astype(str).astype(object)
+    price_col = rng.integers(1000, 50_001, n).astype(str).astype(object)
+
+    if invalid_ratio:
+        bad = np.flatnonzero(rng.random(n) < invalid_ratio)
+        kind = rng.integers(0, 4, len(bad))
+        date_col[bad[kind == 0]] = "2025-13-45"
+        product_col[bad[kind == 1]] = ""
+        qty_col[bad[kind == 2]] = "x"
+        price_col[bad[kind == 3]] = "-5"
+
+    lines = date_col + "," + product_col + "," + qty_col + "," + price_col
+    return "\n".join(lines) + "\n"
+
+def _bulk_file(task):
+    """
+    Worker: build one file in NumPy batches and publish it atomically,
+    no earlier than its scheduled time (files/second throttle).
+    """
+    import numpy as np
+
+    (path, rows, seed, products, days, invalid_ratio, publish_at) = task
+    rng = np.random.default_rng(seed)
+
+    start = np.datetime64(START_DATE.date())
+    dates = (start + np.arange(days)).astype(str).astype(object)
+    products = np.asarray(bulk_products(products), dtype=object)
+
+    parts = [",".join(HEADER) + "\n"]
+    for offset in range(0, rows, BULK_BATCH_ROWS):
+        n = min(BULK_BATCH_ROWS, rows - offset)
+        parts.append(_bulk_batch(rng, n, products, dates, invalid_ratio))
+    data = "".join(parts).encode("utf-8")
+
+    delay = publish_at - time.time()
+    if delay > 0:
+        time.sleep(delay)
+    _write_atomic(path, data)
+    return rows
+
+def generate_bulk(total_rows=1_000_000, rows_per_file=100_000, files_per_second=0,
+                  products=len(PRODUCTS), days=30, invalid_ratio=0.0, seed=None,
+                  processes=None, output_dir=None):
+    """
+    High-rate load generator.
+
+    total_rows:       volume to produce (split into rows_per_file files)
+    files_per_second: publish rate; 0 = as fast as possible
+    products:         distinct product names (beyond PRODUCTS: SKU-nnnnnnn)
+    days:             date span starting at START_DATE
+    invalid_ratio:    fraction of rows with one bad field
+    seed:             same seed -> same file contents, whatever `processes`
+    processes:        worker processes (default: CPU count)
+
+    Returns:
+        list of written file paths
+    """
+    import numpy as np
+
+    output_dir = output_dir or OUTPUT_DIR
+    os.makedirs(output_dir, exist_ok=True)
+
+    n_files = max(1, -(-total_rows // rows_per_file))
+    seeds = np.random.SeedSequence(seed).spawn(n_files)
+    tag = datetime.now().strftime("%Y%m%d_%H%M%S")
+    start = time.time()
+
+    tasks = []
+    for i in range(n_files):
+        rows = min(rows_per_file, total_rows - i * rows_per_file)
+        publish_at = start + i / files_per_second if files_per_second else 0
+        path = os.path.join(output_dir, f"bulk_{tag}_{i:06d}.csv")
+        tasks.append((path, rows, seeds[i], products, days, invalid_ratio, publish_at))
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        written = sum(pool.map(_bulk_file, tasks))
+
+    elapsed = time.time() - start
+    logging.info(
+        f"Bulk generated {n_files} files / {written} rows in {elapsed:.2f}s "
+        f"({written / elapsed:,.0f} rows/s)"
+    )
+    return [t[0] for t in tasks]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate test sales CSVs")
+    parser.add_argument("--bulk", action="store_true",
+                        help="high-rate NumPy generator instead of the 2-second loop")
+    parser.add_argument("--total-rows", type=int, default=1_000_000)
+    parser.add_argument("--rows-per-file", type=int, default=100_000)
+    parser.add_argument("--files-per-second", type=float, default=0)
+    parser.add_argument("--products", type=int, default=len(PRODUCTS))
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--invalid-ratio", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    if not args.bulk:
+        os.makedirs(args.output_dir, exist_ok=True)
+        _run_generator(args.output_dir)
+        return
+
+    generate_bulk(
+        total_rows=args.total_rows,
+        rows_per_file=args.rows_per_file,
+        files_per_second=args.files_per_second,
+        products=args.products,
+        days=args.days,
+        invalid_ratio=args.invalid_ratio,
+        seed=args.seed,
+        processes=args.processes,
+        output_dir=args.output_dir,
+    )
+
+if __name__ == "__main__":
+    main()
@@ -2,3 +2,34 @@
 # Ensure tests can import the package under the project root
 import sys, os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """
+    Point the processor and report writer at a throwaway data tree.
+    """
+    from src import processor, reports
+
+    dirs = {name: tmp_path / "data" / name for name in ("in", "out", "err", "dup")}
+    for d in dirs.values():
+        d.mkdir(parents=True)
+    report_dir = tmp_path / "reports"
+    report_dir.mkdir()
+
+    monkeypatch.setattr(processor, "DATA_IN", str(dirs["in"]))
+    monkeypatch.setattr(processor, "DATA_OUT", str(dirs["out"]))
+    monkeypatch.setattr(processor, "DATA_ERR", str(dirs["err"]))
+    monkeypatch.setattr(processor, "DATA_DUP", str(dirs["dup"]))
+    monkeypatch.setattr(processor, "INDEX_FILE", str(tmp_path / "data" / "ingested.jsonl"))
+    monkeypatch.setattr(processor, "CLAIM_DIR", str(tmp_path / "data" / "claimed"))
+    monkeypatch.setattr(reports, "REPORT_DIR", str(report_dir))
+    monkeypatch.setattr(reports, "SUMMARY_FILE", str(report_dir / "summary.csv"))
+    monkeypatch.setattr(reports, "PRODUCT_FILE", str(report_dir / "by_product.csv"))
+    monkeypatch.setattr(reports, "DATE_FILE", str(report_dir / "by_date.csv"))
+    monkeypatch.setattr(reports, "DB_FILE", str(report_dir / "reports.db"))
+
+    dirs["reports"] = report_dir
+    return dirs
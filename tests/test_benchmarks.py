@@ -0,0 +1,71 @@
+import os
+import copy
+
+import numpy as np
+import pytest
+
+from benchmarks import bench_pipeline
+from benchmarks.bench_pipeline import (
+    STAGES, compare, make_dataset, run_case, run_case_isolated,
+)
+
+@pytest.mark.parametrize("compression", [None, "gz"])
+def test_dataset_is_deterministic(tmp_path, compression):
+    a, b = tmp_path / "a", tmp_path / "b"
+    a.mkdir(); b.mkdir()
+    make_dataset(a, 1000, files=3, products=50, error_rate=0.1, seed=1, compression=compression)
+    make_dataset(b, 1000, files=3, products=50, error_rate=0.1, seed=1, compression=compression)
+
+    for f in sorted(a.iterdir()):
+        assert f.read_bytes() == (b / f.name).read_bytes()
+
+def test_run_case_and_compare():
+    case = run_case(2000, "columnar", 1, False, products=20, error_rate=0.01,
+                    seed=3, report_runs=2)
+    assert set(case["stages"]) == set(STAGES)
+
+    results = {"cases": [case]}
+    assert compare(results, results) == []
+
+    slower = copy.deepcopy(results)
+    slower["cases"][0]["stages"]["write_reports"]["items_per_sec"] /= 2
+    regressions = compare(slower, results)
+    assert [r[1:3] for r in regressions] == [("write_reports", "items_per_sec")]
+
+def test_compare_flags_memory_growth():
+    base = {"cases": [{
+        "rows": 1, "engine": "row", "workers": 2, "stream": False, "products": 1,
+        "error_rate": 0.0, "compression": None,
+        "stages": {"process_all_files": {
+            "items_per_sec": 100.0, "peak_rss_bytes": 100 << 20,
+            "children_peak_rss_bytes": 80 << 20, "alloc_peak_bytes": 10 << 20,
+        }},
+    }]}
+    within = copy.deepcopy(base)
+    within["cases"][0]["stages"]["process_all_files"]["peak_rss_bytes"] = 110 << 20
+    assert compare(within, base) == []
+
+    grown = copy.deepcopy(base)
+    stage = grown["cases"][0]["stages"]["process_all_files"]
+    stage["children_peak_rss_bytes"] = 200 << 20
+    stage["alloc_peak_bytes"] = 5 << 20
+    assert [r[2] for r in compare(grown, base)] == ["children_peak_rss_bytes"]
+
+@pytest.mark.skipif(not os.path.exists(bench_pipeline._CLEAR_REFS),
+                    reason="RSS peak cannot be reset on this platform")
+def test_peak_rss_is_per_stage():
+    big, small = {}, {}
+    with bench_pipeline._measure(big, trace_allocations=True):
+        np.ones(64 << 20, dtype=np.uint8)
+    with bench_pipeline._measure(small, trace_allocations=True):
+        pass
+
+    assert big["alloc_peak_bytes"] >= 64 << 20 > small["alloc_peak_bytes"]
+    assert small["peak_rss_bytes"] < big["peak_rss_bytes"] - (32 << 20)
+
+def test_isolated_case_reports_worker_memory():
+    case = run_case_isolated(2000, "row", 2, False, products=20, error_rate=0.0,
+                             seed=3, report_runs=1)
+    stage = case["stages"]["process_all_files"]
+    assert stage["children_peak_rss_bytes"] > 0
+    assert "children_peak_rss_bytes" not in case["stages"]["write_reports"]
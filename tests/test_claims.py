@@ -0,0 +1,103 @@
+import os
+import time
+import multiprocessing
+
+import pytest
+
+from src import processor, reports, report_store
+from src.claims import Claims, LeaseLost, reclaim_expired, LEASE_FILE
+from src.ingest_index import IngestIndex
+
+def make_inbox(inbox, n):
+    paths = []
+    for i in range(n):
+        path = inbox / f"sales_{i:03d}.csv"
+        path.write_text(f"date,product,qty,price\n2025-11-01,P{i % 7},{i + 1},2.5\n")
+        paths.append(str(path))
+    return paths
+
+def test_each_file_is_claimed_once(tmp_path):
+    inbox = tmp_path / "in"
+    inbox.mkdir()
+    paths = make_inbox(inbox, 20)
+    a = Claims(str(tmp_path / "claimed"), "a")
+    b = Claims(str(tmp_path / "claimed"), "b")
+
+    got_a = a.claim(paths[::2] + paths[1::2])
+    got_b = b.claim(paths)
+
+    assert len(got_a) == 20 and got_b == []
+    assert not os.listdir(inbox)
+    assert sorted(os.listdir(a.dir)) == [LEASE_FILE] + sorted(os.path.basename(p) for p in paths)
+
+def test_expired_claims_return_to_inbox(tmp_path):
+    inbox = tmp_path / "in"
+    inbox.mkdir()
+    root = str(tmp_path / "claimed")
+    dead = Claims(root, "dead", lease_seconds=60)
+    live = Claims(root, "live", lease_seconds=60)
+    held = dead.claim(make_inbox(inbox, 3))
+    live.claim([str(inbox / "missing.csv")])
+
+    assert reclaim_expired(root, str(inbox), 60, own="live") == 0
+    (inbox / "sales_000.csv").write_text("a newer delivery")
+
+    assert reclaim_expired(root, str(inbox), 60, own="live", now=time.time() + 61) == 3
+    names = sorted(os.listdir(inbox))
+    assert len(names) == 4 and "sales_001.csv" in names
+    assert (inbox / "sales_000.csv").read_text() == "a newer delivery"
+    assert os.listdir(root) == ["live"]
+
+    # The late worker cannot move what was reclaimed, and claims afresh
+    with pytest.raises(LeaseLost):
+        dead.move(held[1], str(tmp_path / "out.csv"))
+    assert dead.claim([str(inbox / "sales_001.csv")])
+
+def test_shared_ingest_index(tmp_path):
+    path = str(tmp_path / "index.jsonl")
+    a, b = IngestIndex(path), IngestIndex(path)
+    for i in range(3):
+        a.add({"hash": f"h{i}", "size": 1, "name": f"{i}.csv", "mtime_ns": i, "at": time.time()})
+    a.flush()
+
+    b.refresh()
+    assert len(b) == 3
+    a.compact()  # log replaced: b starts over on its next read
+    b.add({"hash": "hb", "size": 1, "name": "b.csv", "mtime_ns": 9, "at": time.time()})
+    b.flush()
+    assert len(b) == 4 and len(IngestIndex(path)) == 4
+
+def _worker(paths):
+    (processor.DATA_IN, processor.DATA_OUT, processor.DATA_ERR, processor.DATA_DUP,
+     processor.INDEX_FILE, processor.CLAIM_DIR, reports.REPORT_DIR, reports.SUMMARY_FILE,
+     reports.PRODUCT_FILE, reports.DATE_FILE, reports.DB_FILE) = paths
+    processor._claims = processor._index = None
+    report_store.dispose_engines()
+    processor.process_all_files(prefetch=0)
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_concurrent_workers_share_one_inbox(workspace):
+    make_inbox(workspace["in"], 60)
+    paths = (
+        processor.DATA_IN, processor.DATA_OUT, processor.DATA_ERR, processor.DATA_DUP,
+        processor.INDEX_FILE, processor.CLAIM_DIR, reports.REPORT_DIR, reports.SUMMARY_FILE,
+        reports.PRODUCT_FILE, reports.DATE_FILE, reports.DB_FILE,
+    )
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=_worker, args=(paths,)) for _ in range(3)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join(30)
+        assert w.exitcode == 0
+
+    assert len(os.listdir(workspace["out"])) == 60
+    assert not os.listdir(workspace["in"])
+    try:
+        totals = dict((p, q) for p, q, _ in report_store.load_product_totals(reports.DB_FILE))
+        runs = report_store.load_runs(reports.DB_FILE)
+    finally:
+        report_store.dispose_engines()
+    # Every file counted exactly once across the workers' runs
+    assert sum(r.files for r in runs) == 60
+    assert sum(totals.values()) == sum(range(1, 61))
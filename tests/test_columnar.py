@@ -0,0 +1,109 @@
+import pytest
+
+from src.processor import process_file
+
+ROWS = [
+    ("2025-11-01", "ProdX", "2", "10.5"),
+    ("2025-11-01", "ProdY", "1", "5"),
+    ("BAD_DATE", "ProdX", "1", "10"),        # invalid_date
+    ("2025-11-02", "  ", "1", "10"),         # empty_product
+    ("2025-11-02", "ProdX", "x", "10"),      # quantity_not_integer
+    ("2025-11-02", "ProdX", "0", "10"),      # quantity_non_positive
+    ("2025-11-02", "ProdX", "1", "abc"),     # price_not_number
+    ("2025-11-02", "ProdX", "1", "-1"),      # price_non_positive
+    ("2025-11-02", "ProdZ", "3", "0.1"),
+    ("2025-11-03", "ProdX", "3", "0.2"),
+]
+
+def write_csv(path, header, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(",".join(header) + "\n")
+        for r in rows:
+            f.write(",".join(r) + "\n")
+
+@pytest.mark.parametrize("header", [
+    ["date", "product", "qty", "price"],
+    [" Date", "PRODUCT ", "Quantity", "Price"],
+])
+def test_columnar_matches_row_engine(tmp_path, header):
+    path = tmp_path / "sample.csv"
+    write_csv(path, header, ROWS)
+
+    row_stats, row_errors = process_file(str(path), "row")
+    col_stats, col_errors = process_file(str(path), "columnar")
+
+    assert row_errors == col_errors == 6
+    for key in ("files", "rows", "valid", "invalid", "quantity", "revenue"):
+        assert row_stats[key] == col_stats[key]
+    assert dict(row_stats["by_product"]) == dict(col_stats["by_product"])
+    assert dict(row_stats["by_date"]) == dict(col_stats["by_date"])
+    assert list(row_stats["by_product"]) == list(col_stats["by_product"])
+
+@pytest.mark.parametrize("engine", ["row", "columnar"])
+def test_missing_column_rejects_file(tmp_path, engine):
+    path = tmp_path / "no_price.csv"
+    write_csv(path, ["date", "product", "qty"], [r[:3] for r in ROWS])
+
+    stats, errors = process_file(str(path), engine)
+
+    assert "price" in stats["rejected"]
+    assert stats["rows"] == 0
+    assert not stats["by_product"]
+
+def test_unknown_engine_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        process_file(str(tmp_path / "x.csv"), "nope")
+
+def test_process_all_files_columnar_moves_and_reports(workspace):
+    write_csv(workspace["in"] / "ok.csv", ["date", "product", "qty", "price"], ROWS[:2])
+    write_csv(workspace["in"] / "bad.csv", ["date", "product", "qty", "price"], ROWS)
+
+    from src.processor import process_all_files
+    summary = process_all_files(engine="columnar")
+
+    assert summary["processed"] == 2
+    assert (workspace["out"] / "ok.csv").exists()
+    assert (workspace["err"] / "bad.csv").exists()
+    assert (workspace["reports"] / "by_product.csv").exists()
+
+ENGINES = [("row", "csv", False), ("row", "mmap", False), ("columnar", "csv", False),
+           ("columnar", "csv", True)]
+
+def run_engines(path):
+    return [process_file(str(path), engine, stream, reader=reader)
+            for engine, reader, stream in ENGINES]
+
+def test_duplicate_column_rejected_by_every_engine(tmp_path):
+    path = tmp_path / "dup.csv"
+    write_csv(path, ["date", "product", "qty", "quantity", "price"],
+              [("2025-11-01", "ProdX", "1", "2", "10")])
+
+    for stats, _ in run_engines(path):
+        assert "duplicate columns: quantity" in stats["rejected"]
+        assert stats["rows"] == 0
+
+def test_extra_and_missing_fields_agree(tmp_path):
+    path = tmp_path / "ragged.csv"
+    path.write_text(
+        "date,product,qty,price\n"
+        "2025-11-01,ProdX,2,10.5,extra\n"
+        "2025-11-01,ProdY,1,5\n"
+        "2025-11-02,ProdX,3,0.1,a,b\n"
+        "2025-11-02,ProdX,3\n"
+    )
+
+    results = run_engines(path)
+
+    for stats, errors in results:
+        assert (stats["rows"], stats["valid"], errors) == (4, 3, 1)
+        assert stats["errors_by_reason"] == {"price_not_number": 1}
+        assert stats["revenue"] == 2 * 1050 + 500 + 3 * 10
+    assert all(s["by_product"].rows() == results[0][0]["by_product"].rows() for s, _ in results)
+
+def test_byte_order_mark_is_skipped(tmp_path):
+    path = tmp_path / "bom.csv"
+    path.write_bytes(b"\xef\xbb\xbfdate,product,qty,price\n2025-11-01,ProdX,2,10.5\n")
+
+    for stats, errors in run_engines(path):
+        assert "rejected" not in stats
+        assert (stats["valid"], stats["revenue"], errors) == (1, 2100, 0)
@@ -0,0 +1,110 @@
+import bz2
+import gzip
+import lzma
+import os
+
+import pytest
+
+from src import io_utils, reports, report_store
+from src.prefetch import Prefetcher, INPUT_SUFFIXES
+from src.processor import process_all_files, process_file
+from src.watcher import InboxWatcher
+
+CODECS = {".gz": gzip, ".bz2": bz2, ".xz": lzma}
+
+def csv_bytes(rows=2000, seed=0):
+    lines = ["date,product,qty,price"]
+    for r in range(rows):
+        lines.append(f"2025-11-{r % 28 + 1:02d},P{(seed + r) % 11},{r % 9 + 1},{r % 50 + 0.25}")
+    return ("\n".join(lines) + "\n").encode()
+
+def write(path, data, ext=""):
+    if ext:
+        data = CODECS[ext].compress(data)
+    path.write_bytes(data)
+    return str(path)
+
+@pytest.mark.parametrize("ext", list(CODECS))
+@pytest.mark.parametrize("engine,reader", [("row", "csv"), ("row", "mmap"), ("columnar", "csv")])
+@pytest.mark.parametrize("stream", [False, True])
+def test_compressed_results_match_plain(tmp_path, ext, engine, reader, stream):
+    data = csv_bytes()
+    plain = write(tmp_path / "sales.csv", data)
+    packed = write(tmp_path / f"sales.csv{ext}", data, ext)
+
+    a, ea = process_file(plain, engine, stream, reader=reader)
+    b, eb = process_file(packed, engine, stream, reader=reader)
+
+    assert ea == eb
+    assert b["rows"] == a["rows"] and b["revenue"] == pytest.approx(a["revenue"])
+    assert b["by_product"].rows() == a["by_product"].rows()
+    assert b["bytes"] == os.path.getsize(packed)
+
+def stored_quantities():
+    try:
+        return {p: q for p, q, _ in report_store.load_product_totals(reports.DB_FILE)}
+    finally:
+        report_store.dispose_engines()
+
+def test_prefetcher_decodes_multi_member_gzip(tmp_path):
+    data = csv_bytes(rows=500)
+    path = tmp_path / "sales.csv.gz"
+    # Concatenated members, as produced by appending to a .gz export
+    path.write_bytes(gzip.compress(data[:4000]) + gzip.compress(data[4000:]))
+
+    with Prefetcher([str(path)], depth=2, buffer_bytes=256) as pipeline:
+        (got,) = [source.read() for _, source in pipeline]
+    assert got == data
+
+def test_inbox_picks_up_compressed_files(workspace, monkeypatch):
+    data = csv_bytes(rows=300, seed=3)
+    names = ["a.csv"] + [f"a{i}.csv{ext}" for i, ext in enumerate(CODECS)]
+    for name in names:
+        ext = next((e for e in CODECS if name.endswith(e)), "")
+        write(workspace["in"] / name, data, ext)
+    (workspace["in"] / "notes.txt.gz").write_bytes(gzip.compress(b"not a csv"))
+
+    monkeypatch.setattr(io_utils, "INPUT_DIR", str(workspace["in"]))
+    assert sorted(map(os.path.basename, io_utils.get_input_files())) == sorted(names)
+    assert sorted(InboxWatcher(str(workspace["in"]), use_inotify=False)._scan()) == sorted(names)
+    assert all(n.endswith(INPUT_SUFFIXES) for n in names)
+
+    # Content hashes differ per codec, so none is taken for a duplicate
+    stats = process_all_files()
+    assert stats["processed"] == 4 and stats["duplicates"] == 0
+    assert sorted(os.listdir(workspace["out"])) == sorted(names)
+    single, _ = process_file(str(workspace["out"] / "a.csv"))
+    assert stored_quantities() == {p: 4 * q for p, q, _ in single["by_product"].rows()}
+
+def test_corrupt_archive_goes_to_err(workspace):
+    data = gzip.compress(csv_bytes(rows=20_000))
+    (workspace["in"] / "truncated.csv.gz").write_bytes(data[: len(data) // 2])
+    (workspace["in"] / "garbage.csv.xz").write_bytes(b"\xfd7zXZ\x00" + b"\x01" * 64)
+    write(workspace["in"] / "good.csv.bz2", csv_bytes(rows=100), ".bz2")
+
+    stats = process_all_files(prefetch=0)
+
+    assert stats["processed"] == 3
+    assert sorted(os.listdir(workspace["err"])) == ["garbage.csv.xz", "truncated.csv.gz"]
+    assert os.listdir(workspace["out"]) == ["good.csv.bz2"]
+    # Rows decoded before the truncation point are not counted
+    assert sum(stored_quantities().values()) == sum(r % 9 + 1 for r in range(100))
+
+def test_corrupt_archive_does_not_desync_prefetch(workspace):
+    data = gzip.compress(csv_bytes(rows=20_000))
+    (workspace["in"] / "a_truncated.csv.gz").write_bytes(data[: len(data) // 2])
+    write(workspace["in"] / "b_good.csv", csv_bytes(rows=100, seed=1))
+    write(workspace["in"] / "c_good.csv.bz2", csv_bytes(rows=50, seed=2), ".bz2")
+
+    stats = process_all_files()  # default prefetch: files share one queue
+
+    assert stats["processed"] == 3
+    assert os.listdir(workspace["err"]) == ["a_truncated.csv.gz"]
+    assert sorted(os.listdir(workspace["out"])) == ["b_good.csv", "c_good.csv.bz2"]
+    expected = {}
+    for rows, seed in ((100, 1), (50, 2)):
+        for r in range(rows):
+            product = f"P{(seed + r) % 11}"
+            expected[product] = expected.get(product, 0) + r % 9 + 1
+    assert stored_quantities() == expected
+    assert os.path.exists(reports.SUMMARY_FILE)
@@ -1,4 +1,4 @@
-from src.processor import SalesProcessor
+from src.processor import ERROR_THRESHOLD, process_all_files, process_file
 
 def write_csv(path, rows):
     with open(path, "w", encoding="utf-8") as f:
@@ -19,12 +19,11 @@ def test_file_with_5_or_less_errors(tmp_path):
 
     write_csv(csv_file, rows)
 
-    proc = SalesProcessor()
-    errors = proc.process_file(csv_file)
+    stats, errors = process_file(str(csv_file))
 
-    assert errors <= 5
-    assert proc.rows_processed == 3
-    assert proc.rows_skipped == 2
+    assert errors <= ERROR_THRESHOLD
+    assert stats["valid"] == 3
+    assert stats["invalid"] == 2
 
 def test_file_with_more_than_5_errors(tmp_path):
     csv_file = tmp_path / "bad.csv"
@@ -40,9 +39,17 @@ def test_file_with_more_than_5_errors(tmp_path):
 
     write_csv(csv_file, rows)
 
-    proc = SalesProcessor()
-    errors = proc.process_file(csv_file)
+    stats, errors = process_file(str(csv_file))
 
-    assert errors > 5
-    assert proc.rows_processed == 0
-    assert proc.rows_skipped == 6
+    assert errors > ERROR_THRESHOLD
+    assert stats["valid"] == 0
+    assert stats["invalid"] == 6
+
+def test_files_are_routed_by_threshold(workspace):
+    write_csv(workspace["in"] / "ok.csv", [["BAD", "A", "1", "1"]] * 5)
+    write_csv(workspace["in"] / "bad.csv", [["BAD", "A", "1", "1"]] * 6)
+
+    process_all_files()
+
+    assert (workspace["out"] / "ok.csv").exists()
+    assert (workspace["err"] / "bad.csv").exists()
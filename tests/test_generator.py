@@ -0,0 +1,48 @@
+import csv
+
+from src.validators import validate_row, normalize_row
+from test_data_create.generate_test_csv import bulk_products, generate_bulk
+
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+def test_bulk_files_are_complete_and_seeded(tmp_path):
+    a = generate_bulk(total_rows=2500, rows_per_file=1000, products=50,
+                      seed=5, processes=2, output_dir=str(tmp_path / "a"))
+    b = generate_bulk(total_rows=2500, rows_per_file=1000, products=50,
+                      seed=5, processes=1, output_dir=str(tmp_path / "b"))
+
+    assert [len(read_rows(p)) for p in a] == [1000, 1000, 500]
+    assert not list((tmp_path / "a").glob("*.tmp"))
+    for pa, pb in zip(a, b):
+        assert open(pa, "rb").read() == open(pb, "rb").read()
+
+def test_bulk_invalid_ratio_and_cardinality(tmp_path):
+    paths = generate_bulk(total_rows=5000, rows_per_file=5000, products=300,
+                          invalid_ratio=0.1, seed=1, processes=1,
+                          output_dir=str(tmp_path))
+    rows = read_rows(paths[0])
+
+    invalid = sum(not validate_row(normalize_row(r))[0] for r in rows)
+    assert 350 < invalid < 650
+    assert {r["product"] for r in rows if r["product"]} <= set(bulk_products(300))
+    assert len(bulk_products(300)) == 300
+
+def test_loop_mode_creates_and_uses_output_dir(tmp_path, monkeypatch):
+    from test_data_create import generate_test_csv as gen
+    real = gen._write_atomic
+
+    def write_once(path, data):
+        real(path, data)
+        gen._stop_flag.set()
+    monkeypatch.setattr(gen, "_write_atomic", write_once)
+
+    out = tmp_path / "fresh" / "in"
+    try:
+        gen.main(["--output-dir", str(out)])
+    finally:
+        gen._stop_flag.clear()
+
+    (path,) = out.iterdir()
+    assert len(read_rows(path)) == gen.ROWS_PER_FILE
@@ -0,0 +1,64 @@
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("PySide6")
+
+from src import gui_qt, report_store  # noqa: E402
+
+class InlineExecutor:
+    def __init__(self):
+        self.submitted = 0
+
+    def submit(self, fn, *args):
+        self.submitted += 1
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+class ChartHarness:
+    """
+    The App's chart refresh logic without a window: draws are recorded.
+    """
+    refresh_chart = gui_qt.App.refresh_chart
+    _emit_chart_data = gui_qt.App._emit_chart_data
+    _on_chart_data = gui_qt.App._on_chart_data
+
+    def __init__(self):
+        self.chart = object()
+        self._bars = None
+        self._chart_loading = False
+        self._chart_signature = None
+        self._chart_executor = InlineExecutor()
+        self.chart_data_ready = SimpleNamespace(emit=self._on_chart_data)
+        self.draws = []
+
+    def _draw_waiting(self):
+        self.draws.append([])
+
+    def _draw_chart(self, products, revenue):
+        self.draws.append(products)
+
+    _update_chart = _draw_chart
+
+def test_chart_redraws_only_when_reports_change(workspace, monkeypatch):
+    from src.processor import process_all_files
+    monkeypatch.setattr(gui_qt, "REPORT_DIR", str(workspace["reports"]))
+    window = ChartHarness()
+
+    window.refresh_chart()
+    assert window.draws == [[]]
+
+    (workspace["in"] / "a.csv").write_text("date,product,qty,price\n2025-11-01,A,1,2.50\n")
+    process_all_files()
+    for _ in range(3):
+        window.refresh_chart()
+    assert window.draws == [[], ["A"]]
+    assert window._chart_executor.submitted == 2
+
+    (workspace["in"] / "b.csv").write_text("date,product,qty,price\n2025-11-01,B,2,9.00\n")
+    process_all_files()
+    window.refresh_chart()
+    assert window.draws == [[], ["A"], ["B", "A"]]
+    report_store.dispose_engines()
@@ -0,0 +1,46 @@
+import os
+import sys
+import json
+import subprocess
+import importlib.util
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Libraries that must load on first use, never at import
+HEAVY = ("numpy", "pandas", "matplotlib", "seaborn", "sqlalchemy", "flask", "scipy")
+
+ENTRY_POINTS = ("src.main", "src.processor", "src.gui_qt")
+
+PROBE = """
+import os, sys, time, json
+made = []
+os.makedirs = lambda path, *a, **k: made.append(path)
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "modules": sorted(sys.modules), "makedirs": made}}))
+"""
+
+def probe(module):
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True, timeout=60,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+@pytest.mark.parametrize("module", ENTRY_POINTS)
+def test_entry_point_imports_stay_light(module):
+    if module == "src.gui_qt" and importlib.util.find_spec("PySide6") is None:
+        pytest.skip("PySide6 not installed")
+
+    result = probe(module)
+
+    loaded = {m.split(".")[0] for m in result["modules"]}
+    assert not loaded & set(HEAVY), f"{module} imports {sorted(loaded & set(HEAVY))}"
+    # Reported, not asserted: wall-clock time depends on the runner's load
+    print(f"{module} imported in {result['seconds'] * 1000:.0f} ms")
+    # Directories are created by the explicit init steps, not on import
+    assert result["makedirs"] == []
@@ -0,0 +1,62 @@
+import json
+
+from src import ingest_index, processor
+from src.ingest_index import IngestIndex, file_digest
+from src.processor import process_all_files
+
+CONTENT = "date,product,qty,price\n2025-11-01,A,2,10\n2025-11-02,B,1,5\n"
+
+def test_redelivered_file_is_moved_aside_unparsed(workspace, monkeypatch):
+    captured = []
+    monkeypatch.setattr(processor, "write_reports", lambda run_id, stats: captured.append(stats))
+    (workspace["in"] / "export_a.csv").write_text(CONTENT)
+    process_all_files()
+
+    (workspace["in"] / "export_a_resent.csv").write_text(CONTENT)
+    (workspace["in"] / "export_b.csv").write_text(CONTENT.replace("A,2", "A,3"))
+    (workspace["in"] / "export_b_copy.csv").write_text(CONTENT.replace("A,2", "A,3"))
+    result = process_all_files()
+
+    assert result["duplicates"] == 2
+    assert captured[1]["files"] == 1
+    assert captured[1]["revenue"] == (3 * 10 + 5) * 100
+    assert sorted(p.name for p in workspace["dup"].iterdir()) == [
+        "export_a_resent.csv", "export_b_copy.csv",
+    ]
+
+def test_same_name_size_and_mtime_skips_hashing(tmp_path, monkeypatch):
+    path = tmp_path / "a.csv"
+    path.write_text(CONTENT)
+    index = IngestIndex(str(tmp_path / "index.jsonl"))
+    entry, _ = index.check(str(path))
+    index.add(entry)
+    index.flush()
+
+    def no_hashing(_):
+        raise AssertionError("file should not be read")
+    monkeypatch.setattr(ingest_index, "file_digest", no_hashing)
+
+    entry, earlier = IngestIndex(index.path).check(str(path))
+    assert earlier["name"] == "a.csv"
+    assert entry["hash"] == earlier["hash"]
+
+def test_digest_streams_in_blocks(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest_index, "HASH_BUFFER_BYTES", 7)
+    path = tmp_path / "a.csv"
+    path.write_text(CONTENT)
+    small = file_digest(str(path))
+    monkeypatch.setattr(ingest_index, "HASH_BUFFER_BYTES", 1 << 20)
+    assert file_digest(str(path)) == small
+
+def test_compaction_drops_expired_and_superseded_entries(tmp_path, monkeypatch):
+    path = tmp_path / "index.jsonl"
+    old = {"hash": "h1", "size": 1, "name": "old.csv", "mtime_ns": 1, "at": 0}
+    lines = [json.dumps(old)]
+    for i in range(5):
+        lines.append(json.dumps({"hash": "h2", "size": 2, "name": f"n{i}.csv", "mtime_ns": i, "at": 4e9}))
+    path.write_text("\n".join(lines) + '\n{"hash": "torn')
+
+    index = IngestIndex(str(path), retention=3600)
+
+    assert len(index) == 1
+    assert [json.loads(l)["name"] for l in path.read_text().splitlines()] == ["n4.csv"]
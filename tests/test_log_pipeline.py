@@ -0,0 +1,90 @@
+import io
+import queue
+import logging
+
+import pytest
+
+from src import main, metrics
+from src.log_pipeline import (
+    SamplingFilter, NonBlockingQueueHandler, BatchStreamHandler, LogListener,
+)
+
+def make_record(msg, lineno=10, created=100.0, level=logging.INFO):
+    record = logging.LogRecord("x", level, "/src/processor.py", lineno, msg, None, None)
+    record.created = created
+    return record
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+def test_sampling_limits_per_call_site_and_reports_suppressed():
+    sampler = SamplingFilter(burst=2, window=1.0)
+
+    passed = [sampler.filter(make_record(f"file {i}")) for i in range(5)]
+    assert passed == [True, True, False, False, False]
+    # Other call sites and errors are independent
+    assert sampler.filter(make_record("other", lineno=11))
+    assert sampler.filter(make_record("boom", level=logging.ERROR))
+    assert metrics.LOG_SUPPRESSED.value(site="processor.py:10") == 3
+
+    later = make_record("file 9", created=101.5)
+    assert sampler.filter(later)
+    assert later.getMessage() == "file 9 [3 similar messages suppressed]"
+
+    sampler.filter(make_record("a", created=101.6))
+    sampler.filter(make_record("b", created=101.7))
+    assert sampler.drain() == {"processor.py:10": 1}
+    assert sampler.drain() == {}
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(1))
+
+    handler.handle(make_record("one"))
+    handler.handle(make_record("two"))
+
+    assert handler.queue.qsize() == 1
+    assert metrics.LOG_DROPPED.value() == 1
+
+def test_listener_writes_batches_in_order():
+    out = io.StringIO()
+    handler = BatchStreamHandler(out)
+    handler.setFormatter(main.EmojiFormatter("%(levelname)s %(message)s"))
+    q = queue.Queue()
+    for i in range(1000):
+        q.put(make_record(f"line {i}"))
+    listener = LogListener(q, [handler], batch_size=100)
+
+    listener.start()
+    listener.stop()
+
+    lines = out.getvalue().splitlines()
+    assert len(lines) == 1000
+    assert lines[0] == "INFO ℹ️ line 0" and lines[-1] == "INFO ℹ️ line 999"
+
+def test_emoji_formatter_does_not_mutate_record():
+    formatter = main.EmojiFormatter("%(message)s")
+    record = make_record("⚠️ careful", level=logging.WARNING)
+
+    assert formatter.format(record) == "⚠️ careful"
+    assert formatter.format(record) == "⚠️ careful"
+    assert record.msg == "⚠️ careful"
+
+def test_configure_logging_writes_through_queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "LOG_FILE", str(tmp_path / "system.log"))
+    root = logging.getLogger()
+    saved = root.handlers[:], root.level
+
+    try:
+        main.configure_logging(print_console=False)
+        logging.info("hello")
+        main.shutdown_logging()
+    finally:
+        root.handlers[:], level = saved
+        root.setLevel(level)
+
+    text = (tmp_path / "system.log").read_text(encoding="utf-8")
+    assert "[INFO]" in text and "hello" in text
+    assert "Logging initialized" in text
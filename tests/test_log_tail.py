@@ -0,0 +1,59 @@
+import os
+
+from src import log_tail
+from src.log_tail import LogTailer
+
+def line(level, msg):
+    return f"2026-01-01 00:00:00,000 [{level}] RunID=abc | {msg}\n"
+
+def append(path, text):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+
+def test_reads_only_appended_lines(tmp_path):
+    path = tmp_path / "system.log"
+    append(path, line("INFO", "one") + line("ERROR", "two"))
+    tailer = LogTailer(str(path))
+
+    assert [lvl for lvl, _ in tailer.poll()] == ["INFO", "ERROR"]
+    assert tailer.poll() == []
+
+    append(path, line("WARNING", "three") + "partial")
+    new = tailer.poll()
+    assert len(new) == 1 and new[0][1].endswith("three")
+
+    append(path, " line\n")
+    assert tailer.poll()[0][1] == "partial line"
+
+def test_level_index_and_ring_buffer(tmp_path):
+    path = tmp_path / "system.log"
+    tailer = LogTailer(str(path), max_lines=3)
+    append(path, "".join(line("INFO" if i % 2 else "ERROR", str(i)) for i in range(6)))
+    tailer.poll()
+
+    assert [l.rsplit(" ", 1)[1] for l in tailer.lines()] == ["3", "4", "5"]
+    assert [l.rsplit(" ", 1)[1] for l in tailer.lines("ERROR")] == ["0", "2", "4"]
+
+def test_truncation_and_rotation(tmp_path):
+    path = tmp_path / "system.log"
+    append(path, line("INFO", "old") * 5)
+    tailer = LogTailer(str(path))
+    tailer.poll()
+
+    open(path, "w").close()
+    append(path, line("INFO", "after truncate"))
+    assert [l for _, l in tailer.poll()][0].endswith("after truncate")
+
+    os.rename(path, tmp_path / "system.log.1")
+    append(path, line("ERROR", "rotated"))
+    assert [l for _, l in tailer.poll()][0].endswith("rotated")
+
+def test_initial_read_starts_at_tail(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_tail, "INITIAL_BACKLOG_BYTES", 200)
+    path = tmp_path / "system.log"
+    append(path, "".join(line("INFO", f"n{i}") for i in range(100)))
+
+    new = LogTailer(str(path)).poll()
+
+    assert 0 < len(new) < 5
+    assert new[-1][1].endswith("n99")
@@ -0,0 +1,81 @@
+import csv
+
+import pytest
+
+from src import metrics
+from src.processor import process_all_files
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+def write_csv(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("date,product,qty,price\n")
+        for r in rows:
+            f.write(",".join(r) + "\n")
+
+def test_histogram_and_label_rendering():
+    h = metrics.Histogram("t_seconds", "test", buckets=(0.1, 1))
+    h.observe(0.05)
+    h.observe(0.5)
+    h.observe(5)
+    c = metrics.Counter("t_total", "test", ["reason"])
+    c.inc(2, reason='say "hi"')
+
+    text = "\n".join(h.render() + c.render())
+
+    assert 't_seconds_bucket{le="0.1"} 1' in text
+    assert 't_seconds_bucket{le="1"} 2' in text
+    assert 't_seconds_bucket{le="+Inf"} 3' in text
+    assert "t_seconds_count 3" in text
+    assert 't_total{reason="say \\"hi\\""} 2' in text
+
+def test_run_updates_metrics_and_summary_timings(workspace):
+    write_csv(workspace["in"] / "a.csv", [
+        ["2025-11-01", "A", "2", "10"],
+        ["BAD", "A", "1", "1"],
+        ["2025-11-01", "A", "x", "1"],
+    ])
+    write_csv(workspace["in"] / "b.csv", [["BAD", "A", "1", "1"]] * 6)
+
+    process_all_files()
+
+    assert metrics.ROWS.value(status="valid") == 1
+    assert metrics.ROWS.value(status="invalid") == 8
+    assert metrics.ROW_ERRORS.value(reason="invalid_date") == 7
+    assert metrics.ROW_ERRORS.value(reason="quantity_not_integer") == 1
+    assert metrics.FILES.value(result="out") == 1
+    assert metrics.FILES.value(result="err") == 1
+    assert metrics.FILE_SECONDS.value() == 2
+    assert metrics.BYTES_READ.value() > 0
+    assert metrics.INBOX_BACKLOG.value() == 0
+    assert "sales_stage_seconds_total{stage=\"write_reports\"}" in metrics.render()
+
+    with open(workspace["reports"] / "summary.csv", newline="") as f:
+        row = list(csv.DictReader(f))[0]
+    assert float(row["read_seconds"]) >= 0
+    assert float(row["write_reports_seconds"]) > 0
+
+def test_old_summary_header_is_widened(workspace):
+    old = "run_id,files,rows,valid,invalid,total_quantity,total_revenue\nabc,1,1,1,0,1,1.0\n"
+    (workspace["reports"] / "summary.csv").write_text(old)
+    write_csv(workspace["in"] / "a.csv", [["2025-11-01", "A", "2", "10"]])
+
+    process_all_files()
+
+    with open(workspace["reports"] / "summary.csv", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert rows[0]["run_id"] == "abc" and rows[0]["read_seconds"] is None
+    assert rows[1]["read_seconds"] != ""
+
+def test_metrics_endpoint():
+    metrics.RUNS.inc()
+    client = metrics.create_app().test_client()
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert "sales_runs_total 1" in response.get_data(as_text=True)
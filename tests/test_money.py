@@ -0,0 +1,113 @@
+import os
+import csv
+
+import numpy as np
+import pytest
+
+from src import reports, report_store
+from src.money import MAX_MINOR, parse_minor, format_minor, round_minor
+from src.processor import process_all_files, process_file
+from src.analytics.plots import load_by_product
+
+@pytest.mark.parametrize("text, minor", [
+    ("12", 1200), ("12.5", 1250), ("12.05", 1205), (" 7.10 ", 710), (".5", 50),
+    ("12.", 1200), ("1.250", 125), ("-0.5", -50), ("+3", 300),
+    ("1.255", None), ("1e3", None), ("nan", None), ("inf", None), ("", None),
+    (".", None), ("1.2.3", None), ("9" * 20, None), (None, None),
+])
+def test_parse_minor(text, minor):
+    assert parse_minor(text) == minor
+
+def test_format_round_trip():
+    for value in (0, 5, 1205, -50, 239546700, 2**62):
+        assert parse_minor(format_minor(value)) == value
+    assert format_minor(239546700) == "2395467.00"
+    # Float report values written before minor units
+    assert round_minor("0.30000000000000004") == round_minor(0.1 + 0.2) == 30
+
+@pytest.mark.parametrize("engine, reader", [("row", "csv"), ("row", "mmap"), ("columnar", "csv")])
+def test_totals_are_exact(tmp_path, engine, reader):
+    # 0.1 has no exact float: a float sum of these drifts
+    n = 100_000
+    path = tmp_path / "dimes.csv"
+    path.write_text("date,product,qty,price\n" + "2025-11-01,A,1,0.10\n" * n)
+
+    stats, _ = process_file(str(path), engine, reader=reader)
+
+    assert sum(np.full(n, 0.1).tolist()) != n / 10
+    assert stats["revenue"] == n * 10
+    assert stats["by_product"]["A"]["rev"] == n * 10
+
+@pytest.mark.parametrize("engine, reader, stream", [
+    ("row", "csv", False), ("row", "mmap", False), ("columnar", "csv", False), ("columnar", "csv", True),
+])
+def test_amounts_beyond_int64_are_row_errors(tmp_path, engine, reader, stream):
+    largest = MAX_MINOR // 100  # qty that still fits at a price of 1.00
+    path = tmp_path / "huge.csv"
+    path.write_text(
+        "date,product,qty,price\n"
+        "2025-11-01,A,100000000000,1000000.00\n"
+        f"2025-11-01,A,{10**20},0.01\n"
+        f"2025-11-01,A,{largest + 1},1.00\n"
+        f"2025-11-01,A,-{10**20},0.01\n"
+        f"2025-11-01,B,{largest},1.00\n"
+        "2025-11-01,C,1,0.01\n"
+    )
+
+    stats, errors = process_file(str(path), engine, stream, reader=reader)
+
+    assert stats.get("reader", reader) == reader
+    assert errors == 4
+    assert stats["errors_by_reason"] == {"amount_out_of_range": 3, "quantity_non_positive": 1}
+    assert stats["revenue"] == largest * 100 + 1 <= MAX_MINOR
+    assert stats["by_product"].rows() == [("B", largest, largest * 100), ("C", 1, 1)]
+
+@pytest.mark.parametrize("engine, reader, stream", [
+    ("row", "csv", False), ("row", "mmap", False), ("columnar", "csv", False), ("columnar", "csv", True),
+])
+def test_key_totals_up_to_int64_are_exact_and_beyond_are_rejected(tmp_path, engine, reader, stream):
+    half = format_minor(2 ** 62)
+    almost = format_minor(2 ** 62 - 1)
+    fits = tmp_path / "fits.csv"
+    fits.write_text(f"date,product,qty,price\n2025-11-01,A,1,{half}\n2025-11-02,A,1,{almost}\n")
+    over = tmp_path / "over.csv"
+    over.write_text(f"date,product,qty,price\n2025-11-01,A,1,{half}\n2025-11-02,A,1,{half}\n")
+
+    stats, errors = process_file(str(fits), engine, stream, reader=reader)
+    assert errors == 0 and "rejected" not in stats
+    assert stats["revenue"] == stats["by_product"]["A"]["rev"] == MAX_MINOR
+
+    stats, errors = process_file(str(over), engine, stream, reader=reader)
+    assert "int64" in stats["rejected"]
+    assert stats["revenue"] == 0 and not len(stats["by_product"])
+
+def test_run_totals_past_int64_reject_the_file(workspace):
+    half = format_minor(2 ** 62)
+    for day, name in enumerate(("a.csv", "b.csv"), 1):
+        (workspace["in"] / name).write_text(f"date,product,qty,price\n2025-11-0{day},A,1,{half}\n")
+
+    stats = process_all_files()
+
+    assert stats["processed"] == 2
+    assert os.listdir(workspace["out"]) == ["a.csv"]
+    assert os.listdir(workspace["err"]) == ["b.csv"]
+    assert report_store.load_product_totals(reports.DB_FILE) == [("A", 1, 2 ** 62)]
+    report_store.dispose_engines()
+
+def test_reports_write_exact_decimals(workspace):
+    (workspace["in"] / "a.csv").write_text(
+        "date,product,qty,price\n2025-11-01,A,3,0.10\n2025-11-01,B,1,2395467\n"
+    )
+    process_all_files()
+    report_store.dispose_engines()
+
+    with open(reports.PRODUCT_FILE, newline="") as f:
+        rows = {r["product"]: r["total_revenue"] for r in csv.DictReader(f)}
+    with open(reports.SUMMARY_FILE, newline="") as f:
+        summary = next(csv.DictReader(f))
+    assert rows == {"A": "0.30", "B": "2395467.00"}
+    assert summary["total_revenue"] == "2395467.30"
+
+    df = load_by_product(str(workspace["reports"])).sort_values("product")
+    assert df["total_revenue"].tolist() == [0.3, 2395467.0]
+    report_store.dispose_engines()
@@ -0,0 +1,44 @@
+import random
+
+import pytest
+
+from src import processor
+from src.processor import process_all_files
+
+def write_files(directory, count, rows=200, seed=7):
+    rnd = random.Random(seed)
+    for i in range(count):
+        with open(directory / f"sales_{i:03d}.csv", "w", encoding="utf-8") as f:
+            f.write("date,product,qty,price\n")
+            for _ in range(rows):
+                date = f"2025-11-{rnd.randint(1, 30):02d}"
+                if rnd.random() < 0.01:
+                    date = "BAD"
+                f.write(f"{date},P{rnd.randint(0, 9)},{rnd.randint(1, 10)},{rnd.uniform(1, 500):.2f}\n")
+
+def run(workspace, monkeypatch, engine, workers):
+    captured = {}
+    monkeypatch.setattr(processor, "write_reports", lambda run_id, stats: captured.update(stats))
+    # Same data on every run: a fresh ingest index so it is not skipped as duplicate
+    monkeypatch.setattr(processor, "INDEX_FILE", str(workspace["in"].parent / f"ingested-{workers}.jsonl"))
+    write_files(workspace["in"], 6)
+    try:
+        process_all_files(engine=engine, workers=workers)
+    finally:
+        processor.shutdown_pool()
+    moved = sorted(p.name for p in workspace["out"].iterdir())
+    moved += sorted(p.name for p in workspace["err"].iterdir())
+    for p in list(workspace["out"].iterdir()) + list(workspace["err"].iterdir()):
+        p.unlink()
+    return captured, moved
+
+@pytest.mark.parametrize("engine", ["row", "columnar"])
+def test_parallel_matches_serial(workspace, monkeypatch, engine):
+    serial, serial_moved = run(workspace, monkeypatch, engine, 1)
+    parallel, parallel_moved = run(workspace, monkeypatch, engine, 3)
+
+    assert serial_moved == parallel_moved
+    for key in ("files", "rows", "valid", "invalid", "quantity", "revenue"):
+        assert serial[key] == parallel[key]
+    assert dict(serial["by_product"]) == dict(parallel["by_product"])
+    assert dict(serial["by_date"]) == dict(parallel["by_date"])
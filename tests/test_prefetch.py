@@ -0,0 +1,106 @@
+import threading
+
+import pytest
+
+from src import prefetch, processor
+from src.prefetch import Prefetcher
+from src.processor import process_all_files, process_file
+
+def write_files(directory, count, rows=300):
+    paths = []
+    for i in range(count):
+        path = directory / f"sales_{i:03d}.csv"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("date,product,qty,price\n")
+            for r in range(rows):
+                f.write(f"2025-11-{r % 28 + 1:02d},P{(i + r) % 7},{r % 9 + 1},{r % 50 + 0.5}\n")
+        paths.append(str(path))
+    return paths
+
+def test_streams_match_file_contents_with_small_blocks(tmp_path):
+    paths = write_files(tmp_path, 4)
+
+    with Prefetcher(paths, depth=2, buffer_bytes=100) as pipeline:
+        got = [(path, source.read()) for path, source in pipeline]
+
+    assert got == [(p, open(p, "rb").read()) for p in paths]
+
+def test_abandoned_file_is_skipped_and_next_file_is_intact(tmp_path):
+    paths = write_files(tmp_path, 3)
+
+    with Prefetcher(paths, depth=1, buffer_bytes=64) as pipeline:
+        heads = [source.read(10) for _, source in pipeline]
+
+    assert heads == [open(p, "rb").read(10) for p in paths]
+
+class FailingRead:
+    """
+    A file whose second read fails, as when a share drops mid-run.
+    """
+    def __init__(self, path):
+        self._f = open(path, "rb")
+        self._reads = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._f.close()
+
+    def read(self, n):
+        self._reads += 1
+        if self._reads > 1:
+            raise OSError("Input/output error")
+        return self._f.read(n)
+
+@pytest.mark.parametrize("failure", ["removed", "read"])
+def test_unreadable_file_does_not_desync_the_next_ones(tmp_path, monkeypatch, failure):
+    paths = write_files(tmp_path, 3)
+    expected = [open(p, "rb").read() for p in paths[1:]]
+    if failure == "removed":
+        (tmp_path / "sales_000.csv").unlink()
+    else:
+        real = prefetch.open_input
+        monkeypatch.setattr(prefetch, "open_input",
+                            lambda path: FailingRead(path) if path == paths[0] else real(path))
+
+    got = []
+    with Prefetcher(paths, depth=4, buffer_bytes=64) as pipeline:
+        for path, source in pipeline:
+            try:
+                got.append(source.read())
+            except OSError:
+                got.append(None)
+
+    assert got == [None] + expected
+
+@pytest.mark.parametrize("engine", ["row", "columnar"])
+@pytest.mark.parametrize("stream", [False, True])
+def test_prefetched_results_match_direct_reads(tmp_path, engine, stream):
+    paths = write_files(tmp_path, 3)
+
+    with Prefetcher(paths, depth=2, buffer_bytes=512) as pipeline:
+        prefetched = [process_file(p, engine, stream, source) for p, source in pipeline]
+    direct = [process_file(p, engine, stream) for p in paths]
+
+    for (a, ea), (b, eb) in zip(prefetched, direct):
+        assert ea == eb
+        assert a["revenue"] == b["revenue"]
+        assert a["by_product"].rows() == b["by_product"].rows()
+
+def test_stop_event_finishes_current_file_and_leaves_the_rest(workspace, monkeypatch):
+    write_files(workspace["in"], 5)
+    stop = threading.Event()
+    real = processor.process_file
+
+    def stop_after_first(*args, **kwargs):
+        result = real(*args, **kwargs)
+        stop.set()
+        return result
+    monkeypatch.setattr(processor, "process_file", stop_after_first)
+
+    result = process_all_files(stop_event=stop, prefetch=1, read_buffer=256)
+
+    assert result["processed"] == 1
+    assert len(list(workspace["out"].iterdir())) == 1
+    assert len(list(workspace["in"].iterdir())) == 4
@@ -1,8 +1,11 @@
 # tests/test_processor.py
-import tempfile
-import os
-from src.processor import SalesProcessor
-from src.io_utils import write_csv
+from src.processor import process_file
+
+def write_csv(path, header, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(",".join(header) + "\n")
+        for r in rows:
+            f.write(",".join(r) + "\n")
 
 def test_basic_aggregation(tmp_path):
     # prepare a temporary csv
@@ -15,9 +18,10 @@ def test_basic_aggregation(tmp_path):
     ]
     write_csv(str(csv_path), header, rows)
 
-    proc = SalesProcessor()
-    proc.process_file(str(csv_path))
+    stats, errors = process_file(str(csv_path))
 
-    assert proc.total_revenue == 2*10 + 1*5 + 3*10
-    assert proc.product_totals["ProdX"]["quantity"] == 5
-    assert proc.daily_totals["2025-11-01"]["revenue"] == 2*10 + 1*5
+    assert errors == 0
+    # Money in minor units (cents)
+    assert stats["revenue"] == (2*10 + 1*5 + 3*10) * 100
+    assert stats["by_product"]["ProdX"]["qty"] == 5
+    assert stats["by_date"]["2025-11-01"]["rev"] == (2*10 + 1*5) * 100
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from src import report_store
+from src.context import RUN_ID
+from src.processor import process_all_files
+from src.profiling import RunProfiler, profile_dir
+
+def test_sampling_and_limit(tmp_path):
+    profiler = RunProfiler(every=2, report_dir=str(tmp_path))
+    for i in range(5):
+        assert profiler.run(lambda n: {"processed": n}, i + 1) == {"processed": i + 1}
+    # Runs 1, 3 and 5
+    assert profiler.runs == 5
+    assert [os.path.basename(p) for p in profiler.written] == [
+        f"{RUN_ID}-{n:04d}.txt" for n in (1, 3, 5)
+    ]
+
+    limited = RunProfiler(every=1, limit=2, report_dir=str(tmp_path / "limited"))
+    for _ in range(4):
+        limited.run(lambda: {"processed": 1})
+    assert len(limited.written) == 2
+
+def test_idle_runs_are_not_counted(tmp_path):
+    profiler = RunProfiler(every=3, report_dir=str(tmp_path))
+    for _ in range(3):
+        profiler.run(lambda: {"processed": 0})
+    assert profiler.runs == 0 and profiler.written == []
+    assert not os.path.exists(profile_dir(str(tmp_path)))
+
+    with pytest.raises(ValueError):
+        RunProfiler(every=0)
+
+def test_profiles_land_in_reports_dir(workspace):
+    (workspace["in"] / "a.csv").write_text(
+        "date,product,qty,price\n2025-11-01,A,3,0.10\n2025-11-02,B,1,2.50\n"
+    )
+    profiler = RunProfiler()
+
+    stats = profiler.run(process_all_files, prefetch=0)
+    report_store.dispose_engines()
+
+    assert stats["processed"] == 1
+    directory = workspace["reports"] / "profiles"
+    assert sorted(os.listdir(directory)) == [f"{RUN_ID}-0001.prof", f"{RUN_ID}-0001.txt"]
+    text = (directory / f"{RUN_ID}-0001.txt").read_text()
+    assert text.startswith(f"RunID={RUN_ID} run=1 ")
+    assert "Functions by cumulative time" in text and "process_all_files" in text
+    assert "Top allocation sites" in text and "peak traced memory" in text
+
+@pytest.mark.parametrize("argv", [["--profile", "0"], ["--profile", "-2"], ["--profile-limit", "0"]])
+def test_cli_rejects_non_positive_profile_options(argv):
+    from src.main import main
+
+    # Rejected while parsing, before logging or the inbox are touched
+    with pytest.raises(SystemExit):
+        main(argv + ["--once"])
@@ -0,0 +1,70 @@
+import pytest
+
+from src import reports, report_store
+from src.query_api import create_app
+from src.money import round_minor
+from src.totals import KeyedTotals
+
+def make_stats(products, dates):
+    stats = {
+        "files": 1, "rows": 0, "valid": 0, "invalid": 0, "quantity": 0, "revenue": 0,
+        "by_product": KeyedTotals(), "by_date": KeyedTotals(),
+    }
+    # Revenue given in major units, as the API reports it
+    products = [(k, q, round_minor(r)) for k, q, r in products]
+    dates = [(k, q, round_minor(r)) for k, q, r in dates]
+    for key, qty, rev in products:
+        stats["by_product"].add([key], [qty], [rev])
+        stats["rows"] += 1
+        stats["valid"] += 1
+        stats["quantity"] += qty
+        stats["revenue"] += rev
+    for key, qty, rev in dates:
+        stats["by_date"].add([key], [qty], [rev])
+    return stats
+
+@pytest.fixture
+def client(workspace):
+    reports.write_reports("run1", make_stats(
+        [("A", 1, 10.0), ("B", 5, 50.0), ("C", 2, 30.0)],
+        [("2025-11-01", 3, 40.0), ("2025-11-02", 5, 50.0)],
+    ))
+    app = create_app(str(workspace["reports"]), check_interval=0)
+    yield app.test_client()
+    report_store.dispose_engines()
+
+def test_top_products(client):
+    by_revenue = client.get("/api/products/top?n=2").get_json()
+    by_quantity = client.get("/api/products/top?n=1&by=quantity").get_json()
+
+    assert [p["product"] for p in by_revenue] == ["B", "C"]
+    assert by_quantity == [{"product": "B", "total_quantity": 5, "total_revenue": 50.0}]
+    assert client.get("/api/products/top?n=0").status_code == 400
+
+def test_date_range_and_runs(client):
+    body = client.get("/api/dates?start=2025-11-02").get_json()
+    runs = client.get("/api/runs").get_json()
+
+    assert body["dates"] == [{"date": "2025-11-02", "total_revenue": 50.0}]
+    assert body["total_revenue"] == 50.0
+    assert runs[0]["run_id"] == "run1" and runs[0]["total_quantity"] == 8
+    assert client.get("/api/dates?end=yesterday").status_code == 400
+
+def test_etag_304_and_invalidation_on_new_run(client):
+    cache = client.application.config["QUERY_CACHE"]
+    first = client.get("/api/products/top")
+    etag = first.headers["ETag"]
+
+    for _ in range(20):
+        again = client.get("/api/products/top", headers={"If-None-Match": etag})
+        assert again.status_code == 304
+    client.get("/api/products/top?n=3")
+    assert cache.loads == 1
+
+    reports.write_reports("run2", make_stats([("A", 10, 100.0)], []))
+
+    fresh = client.get("/api/products/top", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["ETag"] != etag
+    assert fresh.get_json()[0] == {"product": "A", "total_quantity": 11, "total_revenue": 110.0}
+    assert cache.loads == 2
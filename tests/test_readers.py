@@ -0,0 +1,148 @@
+import random
+
+import pytest
+
+from src.processor import process_file, process_all_files
+from src.readers import FastPathUnavailable, iter_mmap_columns
+
+def write(path, text):
+    path.write_bytes(text.encode("utf-8"))
+    return str(path)
+
+def random_rows(seed, n=3000):
+    rnd = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        date = f"2025-11-{rnd.randint(1, 30):02d}"
+        product = f"Produkt {rnd.randint(0, 40)} ü"
+        qty = str(rnd.randint(1, 10))
+        price = f"{rnd.uniform(1, 500):.2f}"
+        roll = rnd.random()
+        if roll < 0.02:
+            date = "2025-02-30"
+        elif roll < 0.04:
+            qty = "x"
+        elif roll < 0.05:
+            price = "-1"
+        elif roll < 0.06:
+            product = " "
+        rows.append(",".join((date, product, qty, price)))
+    return rows
+
+def assert_same(a, b):
+    (pa, ea), (pb, eb) = a, b
+    assert ea == eb
+    for key in ("rows", "valid", "invalid", "quantity", "revenue", "errors_by_reason"):
+        assert pa[key] == pb[key], key
+    assert pa["by_product"].rows() == pb["by_product"].rows()
+    assert pa["by_date"].rows() == pb["by_date"].rows()
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_mmap_matches_csv_reader_exactly(tmp_path, newline):
+    rows = random_rows(1)
+    rows.insert(100, "")  # blank line: skipped by both
+    path = write(tmp_path / "a.csv", newline.join(["date,product,qty,price"] + rows))
+
+    fast = process_file(path, reader="mmap")
+    assert fast[0]["reader"] == "mmap"
+    assert_same(fast, process_file(path, reader="csv"))
+
+def test_mmap_batches_match(tmp_path, monkeypatch):
+    from src import processor
+    monkeypatch.setattr(processor, "MMAP_BATCH_ROWS", 7)
+    path = write(tmp_path / "a.csv", "\n".join(["date,product,qty,price"] + random_rows(2, 500)) + "\n")
+
+    assert_same(process_file(path, reader="mmap"), process_file(path, reader="csv"))
+
+@pytest.mark.parametrize("text", [
+    'date,product,qty,price\n2025-11-01,"A, Inc",1,2\n',   # quoting
+    "date,product,quantity,price\n2025-11-01,A,1,2\n",     # alias header
+    "date,product,qty,price\n2025-11-01,A,1\n",            # short row
+    "date,product,qty,price\n2025-11-01,A,1,2,extra\n",    # extra field
+    "date,product,qty,price\r2025-11-01,A,1,2\r",          # bare CR
+    "",                                                    # empty file
+])
+def test_unsupported_layouts_fall_back_to_csv(tmp_path, text):
+    path = write(tmp_path / "a.csv", text)
+
+    with pytest.raises(FastPathUnavailable):
+        next(iter_mmap_columns(path, 10))
+    fast, slow = process_file(path, reader="mmap"), process_file(path, reader="csv")
+    assert fast[0].get("rejected") == slow[0].get("rejected")
+    if not fast[0].get("rejected"):
+        assert fast[0]["reader"] == "csv"
+        assert_same(fast, slow)
+
+def test_mmap_stream_abort_stops_on_the_same_row(tmp_path):
+    rows = ["2025-11-01,A,1,2"] * 3 + ["BAD,A,1,2"] * 10 + ["2025-11-01,A,1,2"] * 3
+    path = write(tmp_path / "a.csv", "\n".join(["date,product,qty,price"] + rows))
+
+    fast = process_file(path, stream=True, reader="mmap")
+    assert fast[0]["aborted"]
+    assert_same(fast, process_file(path, stream=True, reader="csv"))
+
+def test_process_all_files_with_mmap_reader(workspace):
+    write(workspace["in"] / "a.csv", "date,product,qty,price\n2025-11-01,A,2,10\n")
+
+    result = process_all_files(reader="mmap")
+
+    assert result["processed"] == 1
+    assert (workspace["out"] / "a.csv").exists()
+
+def test_hash_collisions_fall_back_to_byte_factorization(tmp_path, monkeypatch):
+    import numpy as np
+    from src import readers
+    # Multiplier 0 keeps only the last word: "A Produc|t 01" / "B Produc|t 01" collide
+    monkeypatch.setattr(readers, "_HASH_MULT", np.uint64(0))
+    rows = [f"2025-11-01,{c} Product 01,1,{i + 1}" for i, c in enumerate("ABAB")]
+    path = write(tmp_path / "a.csv", "\n".join(["date,product,qty,price"] + rows))
+
+    fast = process_file(path, reader="mmap")
+
+    assert list(fast[0]["by_product"]) == ["A Product 01", "B Product 01"]
+    assert_same(fast, process_file(path, reader="csv"))
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_windows_split_on_line_breaks(tmp_path, monkeypatch, newline):
+    from src import readers
+    monkeypatch.setattr(readers, "WINDOW_BYTES", 64)
+    rows = random_rows(3, 400)
+    rows.insert(50, "")
+    path = write(tmp_path / "a.csv", newline.join(["date,product,qty,price"] + rows) + newline)
+
+    fast = process_file(path, reader="mmap")
+    assert fast[0]["reader"] == "mmap"
+    assert_same(fast, process_file(path, reader="csv"))
+
+def test_unsupported_row_in_a_later_window_falls_back(tmp_path, monkeypatch):
+    from src import readers
+    monkeypatch.setattr(readers, "WINDOW_BYTES", 256)
+    rows = random_rows(4, 300)
+    rows[-1] = '2025-11-01,"A, Inc",1,2'
+    path = write(tmp_path / "a.csv", "\n".join(["date,product,qty,price"] + rows))
+
+    with pytest.raises(FastPathUnavailable):
+        next(iter_mmap_columns(path, 10))
+    fast = process_file(path, reader="mmap")
+    assert fast[0]["reader"] == "csv"
+    assert_same(fast, process_file(path, reader="csv"))
+
+def test_mmap_memory_is_bounded_by_the_window(tmp_path, monkeypatch):
+    import tracemalloc
+    from src import processor, readers
+    monkeypatch.setattr(readers, "WINDOW_BYTES", 256 * 1024)
+    monkeypatch.setattr(processor, "MMAP_BATCH_ROWS", 5_000)
+    row = "2025-11-01,Product 01,3,19.99\n"
+    path = tmp_path / "big.csv"
+    path.write_text("date,product,qty,price\n" + row * 400_000)  # ~12 MiB
+    size = path.stat().st_size
+
+    tracemalloc.start()
+    try:
+        stats, _ = process_file(str(path), stream=True, reader="mmap")
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    assert stats["reader"] == "mmap" and stats["valid"] == 400_000
+    assert peak < size / 4
@@ -0,0 +1,181 @@
+import os
+import shutil
+import pytest
+
+from src import reports, report_store
+from src.money import round_minor
+from src.totals import KeyedTotals
+from src.analytics.plots import load_by_product, load_by_date, load_runs
+
+def make_stats(products, dates):
+    stats = {
+        "files": 1, "rows": 0, "valid": 0, "invalid": 0, "quantity": 0, "revenue": 0,
+        "by_product": KeyedTotals(),
+        "by_date": KeyedTotals(),
+    }
+    for field, items in (("by_product", products), ("by_date", dates)):
+        for key, qty, rev in items:
+            # Given in major units; stats carry minor units
+            rev = round_minor(rev)
+            stats[field].add([key], [qty], [rev])
+            if field == "by_product":
+                stats["rows"] += 1
+                stats["valid"] += 1
+                stats["quantity"] += qty
+                stats["revenue"] += rev
+    return stats
+
+@pytest.fixture(autouse=True)
+def fresh_engines():
+    yield
+    report_store.dispose_engines()
+
+def test_totals_are_upserted_across_runs(workspace):
+    reports.write_reports("run1", make_stats([("A", 1, 10.0), ("B", 2, 5.0)], [("2025-11-01", 3, 15.0)]))
+    reports.write_reports("run2", make_stats([("A", 4, 40.0)], [("2025-11-02", 4, 40.0)]))
+
+    db = reports.DB_FILE
+    # The store keeps minor units
+    assert sorted(report_store.load_product_totals(db)) == [("A", 5, 5000), ("B", 2, 500)]
+    assert report_store.load_date_totals(db) == [("2025-11-01", 3, 1500), ("2025-11-02", 4, 4000)]
+
+def test_plots_read_store_and_match_csv(workspace):
+    reports.write_reports("run1", make_stats([("A", 1, 10.0), ("B", 2, 5.0)], [("2025-11-01", 3, 15.0)]))
+    reports.write_reports("run2", make_stats([("A", 4, 40.0)], [("2025-11-01", 4, 40.0)]))
+
+    from_db = load_by_product(str(workspace["reports"])).sort_values("product")
+    by_date = load_by_date(str(workspace["reports"]))
+    report_store.dispose_engines()
+    os.remove(reports.DB_FILE)
+    from_csv = load_by_product(str(workspace["reports"])).sort_values("product")
+
+    assert from_db.values.tolist() == from_csv.values.tolist() == [["A", 5, 50.0], ["B", 2, 5.0]]
+    assert by_date.values.tolist() == [["2025-11-01", 55.0]]
+
+def test_new_store_backfills_csv_history(workspace):
+    reports.write_reports("old", make_stats([("A", 1, 10.0)], [("2025-11-01", 1, 10.0)]), backends=("csv",))
+    reports.write_reports("new", make_stats([("A", 2, 20.0)], [("2025-11-01", 2, 20.0)]))
+
+    assert report_store.load_product_totals(reports.DB_FILE) == [("A", 3, 3000)]
+
+def test_binary_partitions_match_csv(workspace, monkeypatch):
+    monkeypatch.setattr(reports, "REPORT_BACKENDS", ("parts", "csv"))
+    reports.write_reports("run1", make_stats([("A", 1, 10.0), ("B", 2, 5.0)], [("2025-11-02", 3, 15.0)]))
+    reports.write_reports("run2", make_stats([("A", 4, 40.0), ("C", 1, 1.0)], [("2025-11-01", 5, 41.0)]))
+    reports.write_reports("run3", make_stats([], []))
+
+    report_dir = str(workspace["reports"])
+    from_parts = load_by_product(report_dir).sort_values("product")
+    by_date = load_by_date(report_dir)
+
+    assert not os.path.exists(reports.DB_FILE)
+    assert from_parts.values.tolist() == [["A", 5, 50.0], ["B", 2, 5.0], ["C", 1, 1.0]]
+    assert by_date.values.tolist() == [["2025-11-01", 41.0], ["2025-11-02", 15.0]]
+
+    shutil.rmtree(workspace["reports"] / "parts")
+    from_csv = load_by_product(report_dir).sort_values("product")
+    assert from_csv.values.tolist() == from_parts.values.tolist()
+
+def test_stale_store_does_not_shadow_other_backends(workspace, monkeypatch):
+    report_dir = str(workspace["reports"])
+    reports.write_reports("run1", make_stats([("A", 1, 10.0)], [("2025-11-01", 1, 10.0)]))
+    assert os.path.exists(reports.DB_FILE)
+
+    # Switched to partitions + CSV: reports.db stays behind, frozen at run1
+    monkeypatch.setattr(reports, "REPORT_BACKENDS", ("parts", "csv"))
+    reports.write_reports("run2", make_stats([("A", 2, 20.0)], [("2025-11-01", 2, 20.0)]))
+    assert load_by_product(report_dir).values.tolist() == [["A", 2, 20.0]]  # partitions only
+
+    monkeypatch.setattr(reports, "REPORT_BACKENDS", ("csv",))
+    reports.write_reports("run3", make_stats([("A", 4, 40.0)], [("2025-11-02", 4, 40.0)]))
+    assert load_by_product(report_dir).values.tolist() == [["A", 7, 70.0]]
+    assert load_by_date(report_dir).values.tolist() == [["2025-11-01", 30.0], ["2025-11-02", 40.0]]
+    assert load_runs(report_dir)["run_id"].tolist() == ["run3", "run2", "run1"]
+
+def test_partitions_are_folded_incrementally(workspace, monkeypatch):
+    from src import report_parts
+    monkeypatch.setattr(reports, "REPORT_BACKENDS", ("parts",))
+    report_dir = str(workspace["reports"])
+    opened = []
+    load = report_parts.np.load
+    monkeypatch.setattr(report_parts.np, "load", lambda path, **kw: opened.append(path) or load(path, **kw))
+
+    for i in range(3):
+        reports.write_reports(f"run{i}", make_stats([("A", 1, 1.0)], []))
+    assert report_parts.load_totals(report_dir, "product")[1].tolist() == [3]
+    assert len(opened) == 3 * 3
+
+    opened.clear()
+    reports.write_reports("run3", make_stats([("B", 2, 5.0)], []))
+    keys, qty, rev = report_parts.load_totals(report_dir, "product")
+    assert (keys, qty.tolist(), rev.tolist()) == (["A", "B"], [3, 2], [300, 500])
+    assert len(opened) == 3  # only the new partition
+
+    # A removed partition refolds the rest
+    shutil.rmtree(report_parts.list_partitions(report_dir)[0])
+    assert report_parts.load_totals(report_dir, "product")[1].tolist() == [2, 2]
+
+def test_readers_never_create_the_store(workspace):
+    reports.write_reports("run1", make_stats([("A", 1, 10.0)], [("2025-11-01", 1, 10.0)]),
+                          backends=("csv",))
+    report_dir = str(workspace["reports"])
+
+    assert report_store.load_product_totals(reports.DB_FILE) == []
+    assert report_store.load_rollup(reports.DB_FILE, "day") == []
+    assert not os.path.exists(reports.DB_FILE)
+    assert load_by_product(report_dir).values.tolist() == [["A", 1, 10.0]]  # from the CSV
+
+def _open_store(db_path, barrier):
+    barrier.wait()
+    report_store.get_engine(db_path)
+    report_store.dispose_engines()
+
+def test_concurrent_first_opens_backfill_once(workspace):
+    import multiprocessing
+    for i in range(5):
+        reports.write_reports(f"run{i}", make_stats([("A", 1, 10.0)], [("2025-11-01", 1, 10.0)]),
+                              backends=("csv",))
+
+    context = multiprocessing.get_context("fork")
+    barrier = context.Barrier(4)
+    procs = [context.Process(target=_open_store, args=(reports.DB_FILE, barrier)) for _ in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(30)
+    assert [p.exitcode for p in procs] == [0, 0, 0, 0]
+
+    assert report_store.load_product_totals(reports.DB_FILE) == [("A", 5, 5000)]
+    assert len(report_store.load_runs(reports.DB_FILE)) == 5
+
+@pytest.mark.parametrize("backends, approx, files", [
+    (("sqlite",), False, ("reports.db-wal",)),
+    (("parts",), False, ("parts",)),
+    (("csv",), False, ("by_product.csv", "by_date.csv")),
+    ((), True, ("sketches.npz",)),
+])
+def test_report_signature_tracks_every_backend(workspace, monkeypatch, backends, approx, files):
+    from src.processor import process_all_files
+    from src.analytics.plots import report_signature
+    monkeypatch.setattr(reports, "REPORT_BACKENDS", backends)
+    report_dir = str(workspace["reports"])
+
+    def ingest(name):
+        (workspace["in"] / name).write_text(f"date,product,qty,price\n2025-11-01,{name},1,2.50\n")
+        assert process_all_files(approx=approx)["processed"] == 1
+
+    ingest("a.csv")
+    for name in files:
+        assert os.path.exists(os.path.join(report_dir, name))
+    before = report_signature(report_dir)
+
+    # Nothing written: polling and reading leave the stamp alone
+    process_all_files(approx=approx)
+    if not approx:
+        load_by_product(report_dir)
+    assert report_signature(report_dir) == before
+
+    # backends.json is rewritten every run; the backend's own files must move the stamp
+    monkeypatch.setattr(reports, "_record_backends", lambda backends: None)
+    ingest("b.csv")
+    assert report_signature(report_dir) != before
@@ -0,0 +1,118 @@
+import time
+import random
+
+import pytest
+
+from src import reports, report_store
+from src.money import round_minor
+from src.processor import process_file
+from src.totals import KeyedTotals
+from src.analytics.plots import load_rollup, load_top_products
+
+def write_rows(path, n=3000, seed=7):
+    rnd = random.Random(seed)
+    lines = ["date,product,qty,price"]
+    for _ in range(n):
+        lines.append(",".join((
+            f"2025-{rnd.randint(10, 12)}-{rnd.randint(1, 28):02d}",
+            f"Prod {rnd.randint(0, 40)}",
+            str(rnd.choice([1, 2, 3, 0])),  # 0 -> invalid row
+            f"{rnd.uniform(1, 500):.2f}",
+        )))
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+def make_stats(cube):
+    stats = {
+        "files": 1, "rows": 0, "valid": 0, "invalid": 0, "quantity": 0, "revenue": 0,
+        "by_product": KeyedTotals(),
+        "by_date": KeyedTotals(),
+        "by_product_date": KeyedTotals(),
+    }
+    for (product, date), qty, rev in cube:
+        rev = round_minor(rev)  # given in major units
+        stats["by_product"].add([product], [qty], [rev])
+        stats["by_date"].add([date], [qty], [rev])
+        stats["by_product_date"].add([(product, date)], [qty], [rev])
+    return stats
+
+@pytest.fixture(autouse=True)
+def fresh_engines():
+    yield
+    report_store.dispose_engines()
+
+@pytest.mark.parametrize("engine, reader", [("columnar", "csv"), ("row", "mmap")])
+def test_engines_build_the_same_cube(tmp_path, engine, reader):
+    path = write_rows(tmp_path / "in.csv")
+
+    fast, _ = process_file(path, engine, reader=reader)
+    slow, _ = process_file(path, "row", reader="csv")
+
+    assert len(slow["by_product_date"]) > 100
+    assert fast["by_product_date"].rows() == slow["by_product_date"].rows()
+    # The cube folds back into the one-dimensional totals
+    by_product = {}
+    for (product, _), qty, _ in slow["by_product_date"].rows():
+        by_product[product] = by_product.get(product, 0) + qty
+    assert by_product == {p: t["qty"] for p, t in slow["by_product"].items()}
+
+def test_rollups_are_upserted_across_runs(workspace):
+    # 2025-11-02 is a Sunday: its ISO week starts on Monday 2025-10-27
+    reports.write_reports("run1", make_stats([
+        (("A", "2025-10-31"), 1, 10.0),
+        (("A", "2025-11-02"), 2, 20.0),
+        (("B", "2025-11-03"), 3, 30.0),
+    ]))
+    reports.write_reports("run2", make_stats([
+        (("A", "2025-11-02"), 4, 40.0),
+        (("B", "2025-11-04"), 1, 5.0),
+    ]))
+    db = reports.DB_FILE
+
+    # Store values are minor units
+    assert report_store.load_rollup(db, "day", product="A") == [
+        ("A", "2025-10-31", 1, 1000), ("A", "2025-11-02", 6, 6000),
+    ]
+    assert report_store.load_rollup(db, "week") == [
+        ("A", "2025-10-27", 7, 7000), ("B", "2025-11-03", 4, 3500),
+    ]
+    assert report_store.load_rollup(db, "month", start="2025-11") == [
+        ("A", "2025-11", 6, 6000), ("B", "2025-11", 4, 3500),
+    ]
+
+def test_top_products_per_period(workspace):
+    reports.write_reports("run1", make_stats([
+        (("A", "2025-11-01"), 1, 10.0),
+        (("B", "2025-11-02"), 9, 20.0),
+        (("C", "2025-11-03"), 2, 30.0),
+        (("C", "2025-12-01"), 1, 99.0),
+    ]))
+    report_dir = str(workspace["reports"])
+
+    top = load_top_products(report_dir, "month", "2025-11", n=2)
+    assert top.values.tolist() == [["C", 2, 30.0], ["B", 9, 20.0]]
+    top = load_top_products(report_dir, "month", "2025-11", n=1, by="quantity")
+    assert top["product"].tolist() == ["B"]
+
+    with pytest.raises(ValueError):
+        load_rollup(report_dir, "year")
+
+def test_rollup_queries_are_fast(workspace):
+    cube = [
+        ((f"P{p:04d}", f"2025-{m:02d}-{d:02d}"), 1, 1.0)
+        for p in range(200) for m in range(1, 13) for d in (1, 15)
+    ]
+    reports.write_reports("run1", make_stats(cube))
+    db = reports.DB_FILE
+    report_store.load_top_products(db, "month", "2025-06")  # warm the engine
+
+    start = time.perf_counter()
+    for _ in range(20):
+        top = report_store.load_top_products(db, "month", "2025-06", n=10)
+    assert len(top) == 10
+    # Indexed read of precomputed rows; generous bound for slow CI
+    assert (time.perf_counter() - start) / 20 < 0.01
+
+def test_plots_rollup_without_store_is_empty(tmp_path):
+    df = load_rollup(str(tmp_path), "week")
+    assert df.empty and list(df.columns) == ["product", "week", "total_quantity", "total_revenue"]
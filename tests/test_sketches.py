@@ -0,0 +1,216 @@
+import os
+import csv
+
+import numpy as np
+import pytest
+
+from src import reports, sketches
+from src.processor import process_all_files
+from src.sketches import (
+    SpaceSaving, CountMin, HyperLogLog, HeavyHitters, DistinctProducts, hash64,
+)
+from src.totals import KeyedTotals
+from src.analytics.plots import load_top_estimates, load_distinct_products
+
+def skewed_files(n_files=12, rows=5000, seed=0):
+    """
+    Per-file exact totals over a Zipf-distributed product catalogue.
+    """
+    rng = np.random.default_rng(seed)
+    files = []
+    for _ in range(n_files):
+        keys = [f"P{p}" for p in rng.zipf(1.3, rows) % 50_000]
+        totals = KeyedTotals()
+        totals.add(keys, rng.integers(1, 5, rows), rng.uniform(1, 100, rows))
+        files.append(totals)
+    return files
+
+def exact_totals(files):
+    out = {}
+    for totals in files:
+        for key, qty, rev in totals.rows():
+            acc = out.setdefault(key, [0, 0.0])
+            acc[0] += qty
+            acc[1] += rev
+    return out
+
+def test_space_saving_bounds_and_top_n():
+    files = skewed_files()
+    exact = exact_totals(files)
+    heavy = HeavyHitters(capacity=128)
+    for totals in files:
+        heavy.merge(totals)
+
+    ss = heavy.revenue
+    assert len(ss) == 128
+    for key, estimate, error in ss.top(128):
+        true = exact[key][1]
+        assert true <= estimate + 1e-6
+        assert estimate - true <= error + 1e-6
+        assert error <= ss.total / ss.capacity
+    expected = sorted(exact, key=lambda k: -exact[k][1])[:10]
+    assert [k for k, _, _ in heavy.top(10)] == expected
+
+    keys, qty, rev = heavy.columns()
+    for key, q, r in zip(keys, qty.tolist(), rev.tolist()):
+        assert q >= exact[key][0] and r >= exact[key][1] - 1e-6
+
+def test_merged_summaries_keep_their_bounds():
+    files = skewed_files(seed=1)
+    exact = exact_totals(files)
+    left, right = HeavyHitters(capacity=64), HeavyHitters(capacity=64)
+    for i, totals in enumerate(files):
+        (left if i % 2 else right).merge(totals)
+    left.merge(right)
+
+    for key, estimate, error in left.top(64, by="quantity"):
+        assert exact[key][0] <= estimate <= exact[key][0] + error
+    with pytest.raises(ValueError):
+        SpaceSaving(64).merge(SpaceSaving(32))
+
+def test_small_inputs_are_exact():
+    totals = KeyedTotals()
+    totals.add(["A", "B", "A"], [1, 2, 3], [1000, 500, 150])
+    heavy = HeavyHitters()
+    heavy.merge(totals)
+    assert heavy.rows() == [("A", 4, 1150), ("B", 2, 500)]
+    assert heavy.top(1) == [("A", 1150.0, 0.0)]
+
+def test_count_min_never_undercounts():
+    keys = [f"K{i}" for i in range(20_000)]
+    cm = CountMin(width=256, depth=4)
+    cm.update(hash64(keys), np.ones(len(keys)), np.arange(len(keys), dtype=float))
+    qty, rev = cm.estimate(hash64(keys))
+    assert (qty >= 1).all() and (rev >= np.arange(len(keys))).all()
+
+def test_hyperloglog_accuracy_and_merge():
+    a, b = HyperLogLog(), HyperLogLog()
+    a.add(hash64([f"x{i}" for i in range(60_000)]))
+    b.add(hash64([f"x{i}" for i in range(40_000, 100_000)]))
+    assert abs(a.count() - 60_000) / 60_000 < 0.05
+    a.merge(b)
+    assert abs(a.count() - 100_000) / 100_000 < 0.05
+
+    small = HyperLogLog()
+    small.add(hash64(["a", "b", "c", "a"]))
+    assert small.count() == 3
+
+def test_sketch_file_round_trip(tmp_path):
+    heavy, distinct = HeavyHitters(capacity=8), DistinctProducts()
+    for totals in skewed_files(n_files=2, rows=500):
+        heavy.merge(totals)
+    cube = KeyedTotals()
+    cube.add([("A", "2025-11-01"), ("B", "2025-11-01"), ("A", "2025-11-02")], [1, 1, 1], [1.0, 1.0, 1.0])
+    distinct.add_pairs(cube)
+
+    path = str(tmp_path / "sketches.npz")
+    sketches.save(path, heavy, distinct)
+    heavy2, distinct2 = sketches.load(path)
+    assert heavy2.rows() == heavy.rows()
+    assert heavy2.revenue.floor == heavy.revenue.floor
+    assert distinct2.counts() == {"2025-11-01": 2, "2025-11-02": 1}
+
+def test_approx_runs_merge_into_reports(workspace):
+    lines = ["date,product,qty,price"]
+    for i in range(300):
+        lines.append(f"2025-11-0{i % 3 + 1},Prod{i % 40},{1 + i % 4},{10 + i % 7}.5")
+    for run in range(2):
+        for part in range(2):
+            (workspace["in"] / f"r{run}_{part}.csv").write_text(
+                "\n".join(lines[:1] + lines[1 + part::2]) + f"\n2025-11-05,Run{run},1,1\n"
+            )
+        assert process_all_files(approx=True)["processed"] == 2
+
+    report_dir = str(workspace["reports"])
+    top = load_top_estimates(report_dir, n=3)
+    assert top["error"].tolist() == [0.0, 0.0, 0.0]  # fewer products than capacity
+    distinct = load_distinct_products(report_dir)
+    assert distinct.values.tolist() == [
+        ["2025-11-01", 40], ["2025-11-02", 40], ["2025-11-03", 40], ["2025-11-05", 2],
+    ]
+    # No exact cube in approximate mode
+    from src import report_store
+    assert report_store.load_rollup(reports.DB_FILE, "day") == []
+    report_store.dispose_engines()
+
+def many_products_csv(path, tail=3000, rows=20_000):
+    # 50 heavy products (revenue grows with the number) and a long tail
+    lines = ["date,product,qty,price"]
+    for i in range(rows):
+        product, price = (i // 2 % 50, 10 + i // 2 % 50) if i % 2 else (50 + i // 2 % tail, 1)
+        lines.append(f"2025-11-{i % 5 + 1:02d},P{product},1,{price}.00")
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+@pytest.mark.parametrize("engine, reader, stream", [
+    ("row", "csv", False), ("row", "mmap", False), ("columnar", "csv", False), ("columnar", "csv", True),
+])
+def test_approx_partials_are_fixed_size(tmp_path, engine, reader, stream):
+    from src.processor import process_file
+    path = many_products_csv(tmp_path / "many.csv")
+
+    exact, _ = process_file(path, engine, stream, reader=reader)
+    approx, _ = process_file(path, engine, stream, reader=reader, approx=True)
+
+    heavy = approx["by_product"]
+    assert isinstance(heavy, HeavyHitters) and isinstance(approx["by_product_date"], DistinctProducts)
+    assert len(exact["by_product"]) == 3050 and len(heavy) <= 2 * sketches.TOP_CAPACITY
+    assert (approx["rows"], approx["revenue"]) == (exact["rows"], exact["revenue"])
+    assert [k for k, _, _ in heavy.top(10)] == [f"P{p}" for p in range(49, 39, -1)]
+    distinct = sum(1 for _, date in exact["by_product_date"] if date == "2025-11-01")
+    estimate = approx["by_product_date"].by_date["2025-11-01"].count()
+    assert abs(estimate - distinct) / distinct < 0.05
+
+def test_approx_runs_keep_exact_dates_out_of_product_reports(workspace, monkeypatch):
+    from src import report_store, report_parts
+    from src.processor import process_file
+    from src.analytics.plots import load_by_product, load_by_date, load_runs
+    monkeypatch.setattr(reports, "REPORT_BACKENDS", ("sqlite", "parts", "csv"))
+    report_dir = str(workspace["reports"])
+    (workspace["in"] / "exact.csv").write_text("date,product,qty,price\n2025-11-01,A,2,1.50\n")
+    process_all_files()
+
+    def snapshot():
+        try:
+            return (
+                load_by_product(report_dir).values.tolist(),
+                report_store.load_rollup(reports.DB_FILE, "month"),
+                (workspace["reports"] / "by_product.csv").read_text(),
+                [tuple(a.tolist()) for a in report_parts.load_totals(report_dir, "product")[1:]],
+            )
+        finally:
+            report_store.dispose_engines()
+
+    def date_totals():
+        try:
+            store = [tuple(r) for r in report_store.load_date_totals(reports.DB_FILE)]
+            keys, qty, rev = report_parts.load_totals(report_dir, "date")
+            parts = sorted(zip(keys, qty.tolist(), rev.tolist()))
+            with open(reports.DATE_FILE, newline="") as f:
+                csv_dates = {}
+                for r in csv.DictReader(f):
+                    csv_dates[r["date"]] = csv_dates.get(r["date"], 0) + int(r["total_quantity"])
+            return store, parts, csv_dates
+        finally:
+            report_store.dispose_engines()
+
+    before = snapshot()
+    many_products_csv(workspace["in"] / "approx.csv")
+    assert process_all_files(approx=True)["processed"] == 1
+
+    assert snapshot() == before
+    expected = KeyedTotals()
+    for name in ("approx.csv", "exact.csv"):
+        partial, _ = process_file(str(workspace["out"] / name))
+        expected.merge(partial["by_date"])
+    store, parts, csv_dates = date_totals()
+    assert store == parts == sorted(expected.rows())
+    assert csv_dates == {d: q for d, q, _ in expected.rows()}
+    assert load_by_date(report_dir)["date"].tolist() == sorted(csv_dates)
+    report_store.dispose_engines()
+    runs = load_runs(report_dir)
+    report_store.dispose_engines()
+    assert runs[["approx", "rows"]].values.tolist() == [[1, 20_000], [0, 1]]
+    with open(reports.SUMMARY_FILE, newline="") as f:
+        assert [r["approx"] for r in csv.DictReader(f)] == ["0", "1"]
+    assert load_top_estimates(report_dir, n=1)["product"].tolist() == ["P49"]
@@ -0,0 +1,57 @@
+import pytest
+
+from src import processor
+from src.processor import process_file, process_all_files
+
+def write_csv(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("date,product,qty,price\n")
+        for r in rows:
+            f.write(",".join(r) + "\n")
+
+GOOD = ["2025-11-01", "A", "2", "10"]
+BAD = ["BAD", "A", "1", "10"]
+
+@pytest.mark.parametrize("engine", ["row", "columnar"])
+def test_stream_stops_at_threshold(tmp_path, monkeypatch, engine):
+    monkeypatch.setattr(processor, "CHUNK_ROWS", 4)
+    path = tmp_path / "bad.csv"
+    write_csv(path, [BAD] * 10 + [GOOD] * 100)
+
+    partial, errors = process_file(str(path), engine, stream=True)
+
+    # row engine stops on the offending row, columnar at the chunk boundary
+    expected_rows = {"row": 6, "columnar": 8}[engine]
+
+    assert partial["aborted"]
+    assert errors > processor.ERROR_THRESHOLD
+    assert partial["rows"] == expected_rows
+
+@pytest.mark.parametrize("engine", ["row", "columnar"])
+def test_stream_matches_full_read_for_clean_file(tmp_path, monkeypatch, engine):
+    monkeypatch.setattr(processor, "CHUNK_ROWS", 7)
+    path = tmp_path / "ok.csv"
+    write_csv(path, [GOOD, BAD] * 5 + [GOOD] * 30)
+
+    full, full_errors = process_file(str(path), engine)
+    streamed, stream_errors = process_file(str(path), engine, stream=True)
+
+    assert not streamed.get("aborted")
+    assert full_errors == stream_errors == 5
+    assert full["quantity"] == streamed["quantity"]
+    assert full["revenue"] == streamed["revenue"]
+    assert dict(full["by_product"]) == dict(streamed["by_product"])
+
+def test_aborted_file_is_not_merged(workspace, monkeypatch):
+    captured = {}
+    monkeypatch.setattr(processor, "write_reports", lambda run_id, stats: captured.update(stats))
+    write_csv(workspace["in"] / "ok.csv", [GOOD] * 3)
+    write_csv(workspace["in"] / "bad.csv", [GOOD] * 3 + [BAD] * 10)
+
+    process_all_files(stream=True)
+
+    assert captured["files"] == 2
+    assert captured["valid"] == 3
+    assert captured["quantity"] == 6
+    assert (workspace["err"] / "bad.csv").exists()
+    assert (workspace["out"] / "ok.csv").exists()
@@ -0,0 +1,50 @@
+import pytest
+
+from src import validators
+from src.validators import (
+    SchemaError, check_values, compile_schema, is_valid_date, validate_row,
+)
+
+def test_schema_plan_maps_aliases_to_indices():
+    plan = compile_schema([" Price", "QTY", "product", "Date "])
+
+    assert plan.extract(["10.5", "2", "A", "2025-11-01"]) == ("2025-11-01", "A", "2", "10.5")
+    assert plan.extract(["10.5", "2"]) == (None, None, "2", "10.5")
+
+def test_schema_rejects_missing_columns():
+    with pytest.raises(SchemaError) as exc:
+        compile_schema(["date", "qty"])
+    assert exc.value.missing == ("product", "price")
+
+def test_schema_rejects_required_column_twice():
+    with pytest.raises(SchemaError) as exc:
+        compile_schema(["date", "product", "qty", "Quantity", "price", "note", "note"])
+    assert exc.value.duplicates == ("quantity",) and not exc.value.missing
+
+@pytest.mark.parametrize("row, reason", [
+    ({"date": "2025-11-01", "product": "A", "quantity": "2", "price": "1.5"}, "ok"),
+    ({"date": "2025-13-01", "product": "A", "quantity": "2", "price": "1.5"}, "invalid_date"),
+    ({"product": "A", "quantity": "2", "price": "1.5"}, "invalid_date"),
+    ({"date": "2025-11-01", "product": " ", "quantity": "2", "price": "1.5"}, "empty_product"),
+    ({"date": "2025-11-01", "product": "A", "quantity": "2.0", "price": "1.5"}, "quantity_not_integer"),
+    ({"date": "2025-11-01", "product": "A", "quantity": "-1", "price": "1.5"}, "quantity_non_positive"),
+    ({"date": "2025-11-01", "product": "A", "quantity": "2", "price": "x"}, "price_not_number"),
+    ({"date": "2025-11-01", "product": "A", "quantity": "2", "price": "0"}, "price_non_positive"),
+    ({"date": "2025-11-01", "product": "A", "quantity": "2", "price": "nan"}, "price_not_number"),
+    ({"date": "2025-11-01", "product": "A", "quantity": "2", "price": "1.005"}, "price_not_number"),
+    ({"date": "2025-11-01", "product": "A", "quantity": str(2**62), "price": "0.02"}, "amount_out_of_range"),
+])
+def test_validate_row_reason_codes(row, reason):
+    assert validate_row(row) == (reason == "ok", reason)
+
+def test_check_values_returns_parsed_numbers():
+    # Price in integer minor units
+    assert check_values("2025-11-01", "A", " 3 ", "2.5") == (True, "ok", 3, 250)
+
+def test_date_validation_is_memoized():
+    validators._parse_date.cache_clear()
+    for _ in range(100):
+        assert is_valid_date("2025-11-01")
+    assert not is_valid_date(None)
+    info = validators._parse_date.cache_info()
+    assert info.misses == 1 and info.hits == 99
@@ -0,0 +1,115 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+from src import watcher as watcher_mod
+from src.watcher import InboxWatcher
+
+MODES = ["scan"]
+if sys.platform.startswith("linux"):
+    MODES.append("inotify")
+
+@pytest.fixture(autouse=True)
+def fast_poll(monkeypatch):
+    monkeypatch.setattr(watcher_mod, "MIN_POLL_SECONDS", 0.01)
+    monkeypatch.setattr(watcher_mod, "MAX_POLL_SECONDS", 0.05)
+
+def make(tmp_path, mode):
+    w = InboxWatcher(str(tmp_path), use_inotify=(mode == "inotify"))
+    assert w.mode == mode
+    return w
+
+def wait_for(w, seconds=2.0):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        ready = w.wait(0.05)
+        if ready:
+            return ready
+    return []
+
+def test_existing_files_reported_first(tmp_path):
+    (tmp_path / "old.csv").write_text("date,product,qty,price\n")
+    w = InboxWatcher(str(tmp_path))
+    try:
+        assert w.wait(0) == [str(tmp_path / "old.csv")]
+        assert w.wait(0.01) == []
+    finally:
+        w.close()
+
+@pytest.mark.parametrize("mode", MODES)
+def test_rename_into_place(tmp_path, mode):
+    w = make(tmp_path, mode)
+    try:
+        tmp = tmp_path / "new.csv.tmp"
+        tmp.write_text("date,product,qty,price\n")
+        assert w.wait(0.05) == []  # temp names are ignored
+
+        os.rename(tmp, tmp_path / "new.csv")
+        assert wait_for(w) == [str(tmp_path / "new.csv")]
+    finally:
+        w.close()
+
+@pytest.mark.parametrize("mode", MODES)
+def test_file_reported_once_closed(tmp_path, mode):
+    w = make(tmp_path, mode)
+    try:
+        with open(tmp_path / "drop.csv", "w") as f:
+            f.write("date,product,qty,price\n")
+            f.flush()
+            if mode == "inotify":
+                assert w.wait(0.05) == []
+        assert wait_for(w) == [str(tmp_path / "drop.csv")]
+    finally:
+        w.close()
+
+@pytest.mark.parametrize("mode", MODES)
+def test_wake_interrupts_wait(tmp_path, mode):
+    w = make(tmp_path, mode)
+    try:
+        threading.Timer(0.05, w.wake).start()
+        start = time.monotonic()
+        assert w.wait(10) == []
+        assert time.monotonic() - start < 5
+    finally:
+        w.close()
+
+def test_processor_loop_survives_a_failing_run(workspace, monkeypatch):
+    from src import main
+    monkeypatch.setattr(main, "DATA_IN", str(workspace["in"]))
+    monkeypatch.setattr(main, "FAILED_RUN_BACKOFF_SECONDS", 0.01)
+    calls = []
+
+    def flaky_run(profiler, **options):
+        calls.append(options["files"])
+        if len(calls) == 1:
+            raise RuntimeError("poison")
+        result = main.process_all_files(**options)
+        main._stop_event.set()
+        return result
+    monkeypatch.setattr(main, "_run", flaky_run)
+
+    (workspace["in"] / "a.csv").write_text("date,product,qty,price\n2025-11-01,A,1,2.50\n")
+    main._stop_event.clear()
+    loop = threading.Thread(target=main._processor_loop, args=({},))
+    loop.start()
+    loop.join(10)
+    main._stop_event.clear()
+
+    assert not loop.is_alive()
+    assert [list(map(os.path.basename, files)) for files in calls] == [["a.csv"], ["a.csv"]]
+    assert os.listdir(workspace["out"]) == ["a.csv"]
+
+@pytest.mark.parametrize("engine, reader", [("row", "csv"), ("row", "mmap"), ("columnar", "csv")])
+def test_undecodable_file_goes_to_err(workspace, engine, reader):
+    from src.processor import process_all_files
+    (workspace["in"] / "latin1.csv").write_bytes(
+        "date,product,qty,price\n2025-11-01,Café,1,2.50\n".encode("latin-1")
+    )
+    (workspace["in"] / "ok.csv").write_text("date,product,qty,price\n2025-11-01,A,1,2.50\n")
+
+    assert process_all_files(engine=engine, reader=reader)["processed"] == 2
+    assert os.listdir(workspace["err"]) == ["latin1.csv"]
+    assert os.listdir(workspace["out"]) == ["ok.csv"]